@@ -0,0 +1,123 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+GRANULARIDADES = ("dia", "semana", "mes")
+_COLUNAS = ["soma", "contagem", "maximo"]
+
+
+def inicio_periodo(datas: pd.Series, granularidade: str) -> pd.Series:
+    """
+    Data de início do período (dia, semana a partir da segunda-feira, ou mês) de cada data.
+
+    Args:
+        datas (pd.Series): Datas das coletas.
+        granularidade (str): "dia", "semana" ou "mes".
+
+    Returns:
+        pd.Series: Início do período de cada data.
+    """
+    dias = datas.dt.normalize()
+    if granularidade == "dia":
+        return dias
+    if granularidade == "semana":
+        return dias - pd.to_timedelta(dias.dt.dayofweek, unit="D")
+    if granularidade == "mes":
+        return dias.dt.to_period("M").dt.to_timestamp()
+    raise ValueError(f"Granularidade desconhecida: {granularidade!r} (use {', '.join(GRANULARIDADES)})")
+
+
+class Agregados:
+    """
+    Agregados por área (soma, contagem e máximo de ``quantidade_lixo``) por dia, semana e mês.
+
+    Gráficos e estatísticas leem daqui em vez de agrupar o histórico bruto. As
+    novas coletas são somadas com ``acumular``, que agrupa só as linhas novas e
+    combina o resultado com os períodos já existentes; a média é sempre
+    derivada de soma e contagem, então nunca fica desatualizada.
+
+    Attributes:
+        tabelas (dict): Para cada granularidade, DataFrame indexado por (area, inicio) com soma, contagem e maximo.
+        versao (int): Incrementada a cada ``acumular``; junto com a versão dos dados, identifica o conteúdo.
+    """
+
+    def __init__(self) -> None:
+        indice = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=["area", "inicio"])
+        vazio = pd.DataFrame({"soma": pd.Series(dtype="float64"), "contagem": pd.Series(dtype="int64"),
+                              "maximo": pd.Series(dtype="float64")}, index=indice)
+        self.tabelas: Dict[str, pd.DataFrame] = {granularidade: vazio for granularidade in GRANULARIDADES}
+        self.versao = 0
+
+    @classmethod
+    def de_dados(cls, dados: pd.DataFrame) -> "Agregados":
+        """
+        Calcula os agregados de um histórico completo.
+
+        Args:
+            dados (pd.DataFrame): Histórico com ``data``, ``area`` e ``quantidade_lixo``.
+
+        Returns:
+            Agregados: Agregados do histórico.
+        """
+        agregados = cls()
+        agregados.acumular(dados)
+        return agregados
+
+    def acumular(self, novos: pd.DataFrame) -> None:
+        """
+        Incorpora novas coletas. O agrupamento custa O(linhas novas); a combinação, O(períodos guardados).
+
+        Args:
+            novos (pd.DataFrame): Linhas com ``data``, ``area`` e ``quantidade_lixo``.
+        """
+        if novos.empty:
+            return
+        quantidade = novos["quantidade_lixo"].astype("float64")
+        areas = novos["area"].astype(str)
+        for granularidade in GRANULARIDADES:
+            parcial = quantidade.groupby([areas, inicio_periodo(novos["data"], granularidade)]).agg(["sum", "count", "max"])
+            parcial.columns = _COLUNAS
+            parcial.index.names = ["area", "inicio"]
+            tabela = self.tabelas[granularidade]
+            existentes = parcial.index.intersection(tabela.index)
+            if len(existentes):
+                anteriores = tabela.loc[existentes]
+                parcial.loc[existentes, "soma"] += anteriores["soma"]
+                parcial.loc[existentes, "contagem"] += anteriores["contagem"]
+                parcial.loc[existentes, "maximo"] = np.maximum(parcial.loc[existentes, "maximo"], anteriores["maximo"])
+                tabela = tabela.drop(existentes)
+            self.tabelas[granularidade] = pd.concat([tabela, parcial]).sort_index()
+        self.versao += 1
+
+    def tabela(self, granularidade: str = "dia") -> pd.DataFrame:
+        """
+        Agregados de uma granularidade, com a média calculada.
+
+        Args:
+            granularidade (str, optional): "dia", "semana" ou "mes". Defaults to "dia".
+
+        Returns:
+            pd.DataFrame: Colunas area, inicio, soma, media, contagem e maximo.
+        """
+        if granularidade not in self.tabelas:
+            raise ValueError(f"Granularidade desconhecida: {granularidade!r} (use {', '.join(GRANULARIDADES)})")
+        tabela = self.tabelas[granularidade].reset_index()
+        tabela.insert(3, "media", tabela["soma"] / tabela["contagem"])
+        return tabela
+
+    def por_area(self) -> pd.DataFrame:
+        """
+        Totais de todo o histórico por área, a partir dos agregados mensais.
+
+        Returns:
+            pd.DataFrame: Indexado por área, com soma, media, contagem e maximo.
+        """
+        mensal = self.tabelas["mes"].groupby(level="area").agg({"soma": "sum", "contagem": "sum", "maximo": "max"})
+        mensal.insert(1, "media", mensal["soma"] / mensal["contagem"])
+        return mensal
+
+    @property
+    def registros(self) -> int:
+        """Número de coletas agregadas."""
+        return int(self.tabelas["mes"]["contagem"].sum())
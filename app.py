@@ -1,21 +1,29 @@
 import streamlit as st
+from collections import deque
+from itertools import islice
 from streamlit_chat import message
-import pandas as pd
-import matplotlib.pyplot as plt
 import io
-import openai
+import pandas as pd
+import os
 import sys
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
+import time
+
+from cache_previsoes import CacheLRU
+from calendario import calendario_do_periodo, feriados_do_periodo
+from cache_respostas import CacheRespostas
+from cliente_llm import ClienteLLM
+from contexto_llm import ContextoConversa, resumo_estatistico
+from exportacao_lote import ExportadorLote
+from metricas import iniciar_servidor_metricas, registro as registro_metricas, span
+from modelo_compartilhado import ModeloCompartilhado
+from monitor_llm import MonitorLLM
+from planejamento import frota_uniforme, planejar_coletas, precisa_coleta_extra
+from previsao import dias_da_semana
+from relatorios import gerar_csv, gerar_pdf, tabela_previsoes
 
 # Importar configurações do config.py
 try:
-    from config import OLLAMA_API_BASE, OLLAMA_API_KEY
+    from config import OLLAMA_API_BASE, CAPACIDADE_CACHE_PREVISOES, LIMITE_HISTORICO_CHAT, JANELA_CHAT, LLM_MAX_TOKENS, LLM_TEMPERATURA, METRICAS_PORTA
 except ImportError:
     st.error("Erro: O arquivo config.py não foi encontrado. Crie o arquivo config.py na pasta do projeto com as configurações do Ollama.")
     sys.exit(1)
@@ -55,181 +63,231 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Configurar a API do Ollama com deepscaler usando config.py
-openai.api_key = OLLAMA_API_KEY
-openai.api_base = OLLAMA_API_BASE
+# Cliente do Ollama com deepscaler usando config.py, compartilhado pelas sessões (pool de conexões keep-alive)
+@st.cache_resource
+def obter_cliente_llm():
+    return ClienteLLM()
 
-# Verificar se o Ollama está rodando
-def check_ollama_service():
-    try:
-        import requests
-        response = requests.get(f"{OLLAMA_API_BASE}/api/health", timeout=5)
-        return response.status_code == 200
-    except requests.exceptions.ConnectionError:
-        return False
-    except requests.exceptions.Timeout:
-        return False
-    except Exception as e:
-        print(f"Erro ao verificar Ollama: {str(e)}")
-        return False
-
-def get_port_process():
-    try:
-        import subprocess
-        result = subprocess.run(['netstat', '-aon'], capture_output=True, text=True)
-        for line in result.stdout.splitlines():
-            if ':11434' in line:
-                parts = line.split()
-                if len(parts) >= 5:
-                    return parts[-1]
-        return None
-    except:
-        return None
-
-if not check_ollama_service():
-    # Tenta encerrar automaticamente qualquer processo na porta 11434
-    import check_and_kill_process
-    pid = check_and_kill_process.kill_process_on_port(11434)
-    if pid:
-        st.info(f"Processo {pid} finalizado automaticamente para liberar a porta 11434.")
-        import time, subprocess
-        time.sleep(2)
-    # Tenta iniciar automaticamente o serviço usando a flag de porta
-    st.info("Tentando iniciar automaticamente o serviço Ollama na porta 11434...")
-    subprocess.Popen(["ollama", "serve", "--port", "11434"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    import time
-    time.sleep(5)
-    if not check_ollama_service():
-        st.error("O serviço Ollama não foi iniciado automaticamente. Verifique se está instalado e configurado corretamente ou inicie manualmente executando 'ollama serve --port 11434'.")
-        st.stop()
+# Monitor do Ollama em segundo plano: a página abre na hora e o chat só é liberado quando a API responde
+@st.cache_resource
+def obter_monitor_llm():
+    return MonitorLLM().iniciar()
+
+monitor_llm = obter_monitor_llm()
 
 # Título estilizado
 st.markdown("<h1 class='stHeader'>Cérebro Urbano - Assistente Inteligente para Resíduos em Mossoró</h1>", unsafe_allow_html=True)
 
-# Carregar os dados
-dados = pd.read_csv("lixo_mossoro.csv")
+ARQUIVO_DADOS = "lixo_mossoro.csv"
+_inicio_execucao = time.time()
 
-# Verificar se as colunas esperadas existem
-colunas_esperadas = ["dia_semana", "tipo_area", "chuva", "feriado", "quantidade_lixo"]
-for col in colunas_esperadas:
-    if col not in dados.columns and col != "dia_semana":
-        st.error(f"Erro: A coluna '{col}' não está presente no arquivo CSV!")
-        st.stop()
 
-# Preparar os dados
-if "data" not in dados.columns:
-    st.error("A coluna 'data' não foi encontrada no arquivo CSV!")
-    st.stop()
+# Endpoint /metrics (Prometheus), iniciado uma vez por processo quando as métricas estão ativas
+@st.cache_resource
+def obter_servidor_metricas():
+    if registro_metricas.ativo and METRICAS_PORTA is not None:
+        return iniciar_servidor_metricas(METRICAS_PORTA)
+    return None
+
+obter_servidor_metricas()
 
-try:
-    # Converte a coluna 'data' para datetime usando o formato desejado
-    dados["data"] = pd.to_datetime(dados["data"], format="%d/%m/%Y")
-except Exception as e:
-    st.error(f"Erro ao converter a coluna 'data': {e}. Verifique se as datas estão no formato DD/MM/AAAA no arquivo CSV.")
-    st.stop()
 
-dados["dia_semana"] = dados["data"].dt.dayofweek
+# Dados e modelo são únicos por processo: todas as sessões leem a versão publicada, e uma thread
+# monta a próxima em segundo plano quando o CSV muda (ver modelo_compartilhado.py)
+@st.cache_resource(show_spinner="Carregando dados e modelo...")
+def obter_modelo_compartilhado():
+    return ModeloCompartilhado(ARQUIVO_DADOS).iniciar()
 
-# Codificar o tipo de área
-le = LabelEncoder()
-dados["tipo_area_num"] = le.fit_transform(dados["tipo_area"])
 
-# Definir variáveis de entrada (X) e saída (y)
-X = dados[["dia_semana", "tipo_area_num", "chuva", "feriado"]]
-y = dados["quantidade_lixo"]
+@st.cache_resource
+def obter_cache_respostas():
+    return CacheRespostas()
 
-# Dividir os dados em treino e teste
-X_treino, X_teste, y_treino, y_teste = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Treinar o modelo
-modelo = LinearRegression()
-modelo.fit(X_treino, y_treino)
+@st.cache_resource(max_entries=2)
+def resumo_dados(numero_versao, _agregados):
+    # Estatísticas enviadas ao assistente, calculadas uma vez por versão do modelo
+    return resumo_estatistico(_agregados)
+
+
+@st.cache_resource(max_entries=2)
+def grafico_medias(numero_versao, _agregados):
+    # Renderizado uma vez por versão do modelo; a figura é fechada para não acumular no pyplot
+    import matplotlib.pyplot as plt
+
+    medias = _agregados.por_area()["media"]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        medias.plot(kind="bar", ax=ax, color=['#007bff', '#28a745', '#dc3545', '#ffc107'])
+        ax.set_ylabel("Quantidade Média de Lixo (kg)", fontsize=12)
+        ax.set_xlabel("Área", fontsize=12)
+        ax.set_title("Produção Média de Lixo por Área", fontsize=14, pad=15)
+        ax.grid(True, linestyle='--', alpha=0.7)
+        imagem = io.BytesIO()
+        fig.savefig(imagem, format="png", bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return imagem.getvalue()
+
+
+@st.cache_resource
+def obter_cache_previsoes():
+    # Único por processo: sessões diferentes reaproveitam os mesmos cenários
+    return CacheLRU(CAPACIDADE_CACHE_PREVISOES)
+
+
+# A versão publicada é lida uma vez e usada na página inteira, mesmo que outra seja publicada no meio
+try:
+    with span("app.modelo"):
+        modelo_compartilhado = obter_modelo_compartilhado()
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+versao_modelo = modelo_compartilhado.atual
+artefato, tipos_area = versao_modelo.artefato, versao_modelo.tipos_area
 
 # Mostrar a acurácia
-acuracia = modelo.score(X_teste, y_teste)
-st.markdown(f"<h2 class='stSubheader'>Acurácia do modelo no teste: {acuracia:.2f}</h2>", unsafe_allow_html=True)
+acuracia = artefato.metricas["r2"]
+st.markdown(f"<h2 class='stSubheader'>R² do modelo nas coletas mais recentes: {acuracia:.2f}</h2>", unsafe_allow_html=True)
+
+
+def descrever_idade(segundos):
+    if segundos < 60:
+        return "menos de 1 min"
+    if segundos < 3600:
+        return f"{segundos // 60:.0f} min"
+    return f"{segundos // 3600:.0f} h {segundos % 3600 // 60:.0f} min"
+
+
+# Versão e idade do modelo, atualizadas sem reexecutar a página; um modelo novo é usado na próxima interação
+@st.fragment(run_every=30)
+def estado_modelo():
+    publicado = modelo_compartilhado.atual
+    origem = "carregado do artefato em disco" if versao_modelo.origem == "disco" else "treinado"
+    st.caption(f"Modelo {artefato.versao} (versão {versao_modelo.numero} do processo, {origem}), "
+               f"publicado há {descrever_idade(versao_modelo.idade)}. Dados: {versao_modelo.estatisticas_carga}.")
+    if publicado.numero != versao_modelo.numero:
+        st.info(f"Modelo {publicado.artefato.versao} disponível (versão {publicado.numero}); ele será usado na próxima interação.")
+    if modelo_compartilhado.treinando:
+        st.caption("Treinando uma nova versão em segundo plano; a atual continua respondendo.")
+    elif modelo_compartilhado.erro:
+        st.warning(f"A última atualização do modelo falhou ({modelo_compartilhado.erro}); a versão atual continua em uso.")
+    if st.button("Retreinar agora", key="retreinar_modelo", disabled=modelo_compartilhado.treinando):
+        modelo_compartilhado.solicitar_retreino()
+        st.caption("Retreino solicitado; a página continua com o modelo atual até a nova versão ficar pronta.")
+
+estado_modelo()
 
 # Gráfico histórico de lixo por área (estilizado)
 st.markdown("<h2 class='stSubheader'>Histórico de Produção de Lixo por Área</h2>", unsafe_allow_html=True)
 col1, col2 = st.columns([1, 1])
-with col1:
-    fig, ax = plt.subplots(figsize=(10, 6))
-    dados.groupby("area")["quantidade_lixo"].mean().plot(kind="bar", ax=ax, color=['#007bff', '#28a745', '#dc3545', '#ffc107'])
-    ax.set_ylabel("Quantidade Média de Lixo (kg)", fontsize=12)
-    ax.set_xlabel("Área", fontsize=12)
-    ax.set_title("Produção Média de Lixo por Área", fontsize=14, pad=15)
-    ax.grid(True, linestyle='--', alpha=0.7)
-    st.pyplot(fig)
+with col1, span("app.grafico"):
+    st.image(grafico_medias(versao_modelo.numero, versao_modelo.agregados), use_container_width=True)
 
 # Interface de chatbot completo
 st.markdown("<h2 class='stSubheader'>Chat com o Assistente Urbano</h2>", unsafe_allow_html=True)
 
-# Inicializar o estado do chat
+# Inicializar o estado do chat: o histórico é um buffer circular limitado
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.messages = deque(maxlen=LIMITE_HISTORICO_CHAT)
 if "message_counter" not in st.session_state:
     st.session_state.message_counter = 0
+if "janela_chat" not in st.session_state:
+    st.session_state.janela_chat = JANELA_CHAT
+if "contexto_conversa" not in st.session_state:
+    st.session_state.contexto_conversa = ContextoConversa(
+        "Você é um assistente inteligente para gestão de resíduos em Mossoró. Use os dados fornecidos para responder perguntas complexas sobre produção de lixo, coletas, e melhorias na infraestrutura urbana. Mantenha respostas curtas e úteis. Se não souber, diga que não tem informações suficientes."
+    )
 
-# Exibir histórico de chat
-for msg in st.session_state.messages:
-    if "key_id" in msg:
+# O histórico é desenhado depois de processar a pergunta, mas aparece acima da entrada
+historico_chat = st.container()
+
+# Enquanto o Ollama não responde, mostra o estado e reavalia a cada 5 s sem bloquear o resto da página
+@st.fragment(run_every=5)
+def status_llm():
+    estado = monitor_llm.estado
+    if estado.pronto:
+        if not chat_liberado:
+            st.rerun()  # Reexecuta a página inteira para habilitar o formulário
+        return
+    if estado.verificado_em is None:
+        st.info(f"Verificando o serviço Ollama em {OLLAMA_API_BASE}...")
+    else:
+        st.info(f"Aguardando o serviço Ollama em {OLLAMA_API_BASE} ({estado.erro}). O chat será liberado assim que ele responder.")
+
+chat_liberado = monitor_llm.pronto
+status_llm()
+
+# Entrada de usuário para o chatbot (o formulário limpa o campo, então cada pergunta é enviada uma só vez)
+with st.form("chat_form", clear_on_submit=True):
+    user_input = st.text_input("Digite sua pergunta (ex.: 'Quais áreas precisam de mais coletas?')", key="chat_input",
+                               disabled=not chat_liberado)
+    enviar = st.form_submit_button("Enviar", disabled=not chat_liberado)
+
+if enviar and user_input:
+    # Adicionar pergunta do usuário ao chat
+    st.session_state.message_counter += 1
+    st.session_state.messages.append({"role": "user", "content": user_input, "key_id": st.session_state.message_counter})
+
+# Exibir histórico de chat: só as mensagens mais recentes são desenhadas
+with historico_chat:
+    ocultas = len(st.session_state.messages) - st.session_state.janela_chat
+    if ocultas > 0 and st.button(f"Mostrar mensagens anteriores ({ocultas})", key="chat_anteriores"):
+        st.session_state.janela_chat += JANELA_CHAT
+    visiveis = list(islice(reversed(st.session_state.messages), st.session_state.janela_chat))
+    for msg in reversed(visiveis):
         key = f"msg_{msg['key_id']}"
         if msg["role"] == "user":
             message(msg["content"], is_user=True, avatar_style="adventurer", key=key)
         else:
             message(msg["content"], is_user=False, avatar_style="bottts", key=key)
+            if msg.get("do_cache"):
+                st.caption("⚡ Resposta do cache")
+
+    if enviar and user_input:
+        # Chamar o Ollama/deepscaler e mostrar a resposta enquanto ela é gerada
+        cliente_llm = obter_cliente_llm()
+        try:
+            # Prompt de tamanho limitado: conversa recente, resumo das antigas e estatísticas dos dados
+            with span("app.montar_prompt"):
+                mensagens_llm = st.session_state.contexto_conversa.montar(
+                    st.session_state.messages, resumo_dados(versao_modelo.numero, versao_modelo.agregados))
+            # Perguntas repetidas são respondidas pelo cache em disco, sem gerar de novo
+            cache_respostas = obter_cache_respostas()
+            escopo_resposta = CacheRespostas.escopo(cliente_llm.modelo, {"max_tokens": LLM_MAX_TOKENS, "temperatura": LLM_TEMPERATURA}, artefato.versao)
+            with span("app.cache_respostas"):
+                em_cache = cache_respostas.obter(user_input, escopo_resposta)
+            if em_cache is not None:
+                chat_response = em_cache.resposta
+                message(chat_response, is_user=False, avatar_style="bottts", key=f"msg_{st.session_state.message_counter + 1}")
+                st.caption("⚡ Resposta do cache" + ("" if em_cache.exata else f" (pergunta parecida: \"{em_cache.pergunta}\")"))
+            else:
+                resposta_stream = cliente_llm.conversar_stream(mensagens_llm)
+                chat_response = st.write_stream(resposta_stream).strip()
+                metricas_llm = resposta_stream.metricas
+                if metricas_llm is not None and metricas_llm.tempo_primeiro_token is not None:
+                    st.caption(f"Primeiro token em {metricas_llm.tempo_primeiro_token:.2f}s · {metricas_llm.tokens_por_segundo:.1f} tokens/s")
+                if chat_response:
+                    cache_respostas.guardar(user_input, escopo_resposta, chat_response)
 
-# Entrada de usuário para o chatbot
-user_input = st.text_input("Digite sua pergunta (ex.: 'Quais áreas precisam de mais coletas?')", key="chat_input")
+            # Adicionar resposta ao chat
+            st.session_state.message_counter += 1
+            st.session_state.messages.append({"role": "assistant", "content": chat_response, "key_id": st.session_state.message_counter, "do_cache": em_cache is not None})
 
-if user_input:
-    # Adicionar pergunta do usuário ao chat
-    st.session_state.message_counter += 1
-    st.session_state.messages.append({"role": "user", "content": user_input, "key_id": st.session_state.message_counter})
-
-    # Chamar a API do Ollama/deepscaler para processar a pergunta
-    try:
-        response = openai.ChatCompletion.create(
-            model="deepscaler",  # Use o modelo deepscaler 1.5B
-            messages=[
-                {"role": "system", "content": "Você é um assistente inteligente para gestão de resíduos em Mossoró. Use os dados fornecidos para responder perguntas complexas sobre produção de lixo, coletas, e melhorias na infraestrutura urbana. Mantenha respostas curtas e úteis. Se não souber, diga que não tem informações suficientes."},
-                *[{"role": m["role"], "content": m["content"]} for m in st.session_state.messages if "role" in m and "content" in m]
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
-
-        # Extrair a resposta do deepscaler
-        chat_response = response['choices'][0]['message']['content'].strip()
-
-        # Adicionar resposta ao chat
-        st.session_state.message_counter += 1
-        st.session_state.messages.append({"role": "assistant", "content": chat_response, "key_id": st.session_state.message_counter})
-
-    except Exception as e:
-        st.error(f"Erro ao processar a pergunta: {str(e)}. Verifique se o Ollama está rodando na porta 11435 (execute 'ollama serve --port 11435' em outro terminal) e que a porta está livre. Use 'netstat -aon | findstr :11434' para verificar e 'taskkill /F /PID <PID>' para liberar, se necessário.")
-
-    # Atualizar a exibição do chat
-    for msg in st.session_state.messages[-2:]:  # Mostrar apenas a última interação
-        if "key_id" in msg:
-            key = f"msg_{msg['key_id']}"
-            if msg["role"] == "user":
-                message(msg["content"], is_user=True, avatar_style="adventurer", key=key)
-            else:
-                message(msg["content"], is_user=False, avatar_style="bottts", key=key)
+        except Exception as e:
+            st.error(f"Erro ao processar a pergunta: {str(e)}. Verifique se o Ollama está rodando em {OLLAMA_API_BASE} (execute 'ollama serve' em outro terminal).")
 
 # Sidebar para configurações de previsões
 with st.sidebar:
     st.markdown("<h3 class='stSubheader'>Configurações de Previsões</h3>", unsafe_allow_html=True)
-    area_selecionada = st.selectbox("Escolha uma área:", dados["area"].unique(), key="area_select")
+    area_selecionada = st.selectbox("Escolha uma área:", list(tipos_area), key="area_select")
     data_inicio = st.date_input("Data de início", value=pd.to_datetime("2025-03-01").date(), key="data_inicio")
     data_fim = st.date_input("Data de fim", value=pd.to_datetime("2025-03-14").date(), key="data_fim", min_value=data_inicio)
     chuva = st.checkbox("Haverá chuva no período?", key="chuva_checkbox")
-    feriado = st.checkbox("Haverá feriado no período?", key="feriado_checkbox")
+    feriado = st.checkbox("Todo o período é feriado?", key="feriado_checkbox",
+                          help="Sem marcar, os feriados do calendário de Mossoró já entram na previsão.")
 
-# Preparar os dados para previsão
-tipo_area = dados.loc[dados["area"] == area_selecionada, "tipo_area"].iloc[0]
-tipo_area_num = le.transform([tipo_area])[0]
+cache_previsoes = obter_cache_previsoes()
 
 # Calcular o número de dias entre as datas
 num_dias = (data_fim - data_inicio).days
@@ -237,96 +295,137 @@ if num_dias <= 0:
     st.error("A data final deve ser posterior à data inicial!")
     st.stop()
 
-dias = list(range(num_dias))
 dias_semana = [pd.to_datetime(data_inicio + pd.Timedelta(days=i)).strftime("%A") for i in range(num_dias)]
+feriados_periodo = feriados_do_periodo(data_inicio, num_dias) | int(feriado)
+calendario_periodo = calendario_do_periodo(data_inicio, num_dias)
+tipo_area = tipos_area[area_selecionada]
 
-futuro = pd.DataFrame({
-    "dia_semana": [d % 7 for d in dias],  # Repetir os dias da semana para mais dias, se necessário
-    "tipo_area_num": [tipo_area_num] * num_dias,
-    "chuva": [1 if chuva else 0] * num_dias,
-    "feriado": [1 if feriado else 0] * num_dias
-})
 
-# Fazer previsões
-previsoes = modelo.predict(futuro)
+def prever_cenario(area, inicio, fim, chuva, feriado):
+    """Previsão diária de uma área, lida do cache LRU compartilhado quando o cenário já foi calculado."""
+    def calcular():
+        dias = (fim - inicio).days
+        valores = versao_modelo.prever([area], dias_da_semana(inicio, dias), chuva, feriados_do_periodo(inicio, dias) | feriado,
+                                       calendario_do_periodo(inicio, dias))[0]
+        valores.setflags(write=False)  # O mesmo array é compartilhado entre sessões
+        return valores
 
-# Mostrar previsões em formato de chat com chaves únicas
-st.session_state.messages.append({"role": "assistant", "content": f"Previsões para {area_selecionada} ({tipo_area}) de {data_inicio} a {data_fim}:", "key_id": st.session_state.message_counter + 1})
-st.session_state.message_counter += 1
+    return cache_previsoes.obter((artefato.versao, area, inicio, fim, chuva, feriado), calcular)
 
-for i, previsao in enumerate(previsoes):
-    st.session_state.message_counter += 1
-    dia = dias_semana[i]
-    mensagem = f"{dia}: {previsao:.0f} kg"
-    st.session_state.messages.append({"role": "assistant", "content": mensagem, "key_id": st.session_state.message_counter})
-    if previsao > 700:
-        st.session_state.message_counter += 1
-        st.session_state.messages.append({"role": "assistant", "content": f"Recomendação: Agendar coleta extra para {dia}!", "style": "warning", "key_id": st.session_state.message_counter})
-
-# Exibir as mensagens de previsão no chat
-for msg in st.session_state.messages:
-    if "key_id" in msg:
-        key = f"msg_{msg['key_id']}"
-        if "style" in msg and msg["style"] == "warning":
-            message(msg["content"], is_user=False, avatar_style="thumbs", key=key)
-        else:
-            message(msg["content"], is_user=False, avatar_style="bottts", key=key)
+
+cenario = (area_selecionada, data_inicio, data_fim, int(chuva), int(feriado))
+
+# Fazer previsões
+with span("app.previsao"):
+    previsoes = prever_cenario(*cenario)
+
+# Painel de previsões, separado do chat
+tabela = tabela_previsoes(dias_semana, previsoes)
+st.markdown(f"<h2 class='stSubheader'>Previsões para {area_selecionada} ({tipo_area}) de {data_inicio} a {data_fim}</h2>", unsafe_allow_html=True)
+st.dataframe(tabela, hide_index=True, use_container_width=True)
+dias_coleta_extra = [dia for dia, extra in zip(dias_semana, precisa_coleta_extra(previsoes)) if extra]
+if dias_coleta_extra:
+    st.warning(f"Recomendação: Agendar coleta extra para {', '.join(dias_coleta_extra)}!")
 
 # Botões de exportação na sidebar
 if st.sidebar.button("Exportar Previsões como CSV", key="export_button"):
-    previsoes_df = pd.DataFrame({
-        "Dia": dias_semana,
-        "Quantidade (kg)": previsoes.round(0),
-        "Coleta Extra": ["Sim" if p > 700 else "Não" for p in previsoes]
-    })
     st.sidebar.download_button(
         label="Baixar CSV",
-        data=previsoes_df.to_csv(index=False),
+        data=gerar_csv(tabela),
         file_name=f"previsoes_{area_selecionada}_{data_inicio}_{data_fim}.csv",
         mime="text/csv",
         key="download_button"
     )
 
 if st.sidebar.button("Exportar Relatório em PDF", key="export_pdf_button"):
-    pdf_buffer = io.BytesIO()
-    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
-    elements = []
-
-    # Estilo para o texto
-    styles = getSampleStyleSheet()
-    title = Paragraph(f"Relatório de Previsões - {area_selecionada} ({tipo_area})", styles['Heading1'])
-    elements.append(title)
-    elements.append(Paragraph(f"Período: {data_inicio} a {data_fim}", styles['Normal']))
-
-    # Tabela de previsões
-    data = [["Dia", "Quantidade (kg)", "Coleta Extra"]]
-    for i, previsao in enumerate(previsoes):
-        coleta_extra = "Sim" if previsao > 700 else "Não"
-        data.append([dias_semana[i], f"{previsao:.0f}", coleta_extra])
-
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    elements.append(table)
-
-    # Gerar o PDF
-    doc.build(elements)
-    pdf_buffer.seek(0)
     st.sidebar.download_button(
         label="Baixar Relatório em PDF",
-        data=pdf_buffer,
+        data=gerar_pdf(f"Relatório de Previsões - {area_selecionada} ({tipo_area})", f"{data_inicio} a {data_fim}", tabela),
         file_name=f"relatorio_{area_selecionada}_{data_inicio}_{data_fim}.pdf",
         mime="application/pdf",
         key="download_pdf_button"
-    )
\ No newline at end of file
+    )
+
+
+# Exportação em lote: PDFs de todas as áreas e a tabela combinada, gerados em segundo plano
+@st.cache_resource
+def obter_exportador():
+    return ExportadorLote()
+
+
+exportacao_lote = obter_exportador().obter(st.session_state.get("exportacao_lote", ""))
+with st.sidebar.expander("Exportação em lote (todas as áreas)"):
+    formato_lote = st.radio("Tabela combinada", ["csv", "parquet"], horizontal=True, key="formato_lote")
+    em_andamento = exportacao_lote is not None and exportacao_lote.estado == "executando"
+    if st.button("Gerar pacote do período", key="gerar_pacote", disabled=em_andamento):
+        areas_lote = list(tipos_area)
+        tipos_lote = [tipos_area[area] for area in areas_lote]
+        valores_lote = versao_modelo.prever(areas_lote, dias_da_semana(data_inicio, num_dias), int(chuva), feriados_periodo, calendario_periodo)
+        cenario_lote = ", ".join(nome for nome, ativo in (("com chuva", chuva), ("com feriado", feriado)) if ativo)
+        try:
+            exportacao_lote = obter_exportador().iniciar(areas_lote, tipos_lote, list(pd.date_range(data_inicio, periods=num_dias)),
+                                                         valores_lote, formato_lote, cenario_lote)
+            st.session_state.exportacao_lote = exportacao_lote.id
+            em_andamento = True
+        except ValueError as e:
+            st.error(str(e))
+
+    # Acompanha o progresso sem reexecutar a página; ao terminar, reexecuta uma vez para parar a consulta
+    @st.fragment(run_every=1 if em_andamento else None)
+    def progresso_exportacao():
+        if exportacao_lote is None:
+            return
+        if exportacao_lote.estado == "executando":
+            st.progress(exportacao_lote.progresso, text=f"{exportacao_lote.concluidos}/{exportacao_lote.total} arquivos")
+            return
+        if em_andamento:
+            st.rerun()
+        if exportacao_lote.estado == "falhou":
+            st.error(f"A exportação falhou: {exportacao_lote.erro}")
+            return
+        duracao = exportacao_lote.concluida_em - exportacao_lote.iniciada_em
+        st.caption(f"Pacote pronto em {duracao:.1f}s ({exportacao_lote.reaproveitados} arquivos reaproveitados do cache).")
+        with open(exportacao_lote.arquivos["relatorios"], "rb") as arquivo:
+            st.download_button("Baixar PDFs (ZIP)", arquivo.read(), file_name=f"relatorios_{data_inicio}_{data_fim}.zip",
+                               mime="application/zip", key="baixar_pacote_pdf")
+        formato = os.path.splitext(exportacao_lote.arquivos["tabela"])[1].lstrip(".")
+        with open(exportacao_lote.arquivos["tabela"], "rb") as arquivo:
+            st.download_button(f"Baixar tabela ({formato.upper()})", arquivo.read(), file_name=f"previsoes_{data_inicio}_{data_fim}.{formato}",
+                               mime="text/csv" if formato == "csv" else "application/octet-stream", key="baixar_pacote_tabela")
+
+    progresso_exportacao()
+
+# Plano de coletas extras de todas as áreas no período, com a frota informada
+with st.sidebar.expander("Plano de coletas extras (todas as áreas)"):
+    caminhoes = st.number_input("Caminhões livres", min_value=0, value=4, step=1, key="plano_caminhoes")
+    capacidade = st.number_input("Capacidade por turno (kg)", min_value=100, value=2000, step=100, key="plano_capacidade")
+    turnos_livres = st.number_input("Turnos livres por caminhão e dia", min_value=1, value=1, step=1, key="plano_turnos")
+    if st.button("Planejar", key="planejar_coletas"):
+        with span("app.planejamento"):
+            areas_plano = list(tipos_area)
+            valores_plano = versao_modelo.prever(areas_plano, dias_da_semana(data_inicio, num_dias), int(chuva), feriados_periodo, calendario_periodo)
+            plano = planejar_coletas(valores_plano, areas_plano, pd.date_range(data_inicio, periods=num_dias),
+                                     frota_uniforme(int(caminhoes), capacidade, int(turnos_livres)))
+        resumo_plano = plano.resumo
+        st.caption(f"{resumo_plano['violacoes']} área-dias acima do limite; {resumo_plano['paradas']} paradas em "
+                   f"{resumo_plano['turnos_usados']} turnos; {resumo_plano['pendente_kg']:.0f} kg sem atendimento.")
+        if not plano.agenda.empty:
+            st.download_button("Baixar agenda (CSV)", plano.agenda.to_csv(index=False, date_format="%Y-%m-%d", float_format="%.1f"),
+                               file_name=f"agenda_coletas_{data_inicio}_{data_fim}.csv", mime="text/csv", key="baixar_agenda")
+        if not plano.pendentes.empty:
+            st.dataframe(plano.pendentes.round(0), hide_index=True, use_container_width=True)
+
+# Painel de desempenho: tempo de cada etapa desde o início do processo
+if registro_metricas.ativo:
+    registro_metricas.observar("app.execucao", time.time() - _inicio_execucao)
+    if st.sidebar.checkbox("Painel de desempenho", key="painel_desempenho"):
+        resumo_etapas = pd.DataFrame(registro_metricas.resumo())
+        if not resumo_etapas.empty:
+            st.sidebar.dataframe(resumo_etapas.round(1), hide_index=True, use_container_width=True)
+
+# Contadores do cache de previsões
+estatisticas_cache = cache_previsoes.estatisticas()
+st.sidebar.caption(
+    f"Cache de previsões: {estatisticas_cache['acertos']} acertos, {estatisticas_cache['falhas']} falhas "
+    f"({estatisticas_cache['itens']}/{estatisticas_cache['capacidade']} cenários)"
+)
@@ -0,0 +1,371 @@
+"""
+Armazém de features por coleta: atributos do calendário e defasagens da quantidade por área.
+
+As defasagens (``lag_k``: a coleta da mesma área k dias antes) e as médias
+móveis (``media_w``: média das coletas da área nos w dias anteriores, sem o
+próprio dia) contam dias de calendário, não linhas: se a área não teve coleta
+k dias antes, ``lag_k`` fica NaN em vez de pegar a coleta de outro dia. O
+cálculo é vetorizado sobre as chaves (área, dia) ordenadas: cada defasagem é
+um ``searchsorted`` e cada média móvel, uma diferença de somas acumuladas.
+
+A matriz materializada é salva em Parquet com um manifesto que guarda a
+impressão digital do CSV de origem. Na carga seguinte do mesmo CSV ela é só
+lida. Se o CSV mudou apenas com dias novos no fim (as coletas até o último dia
+materializado são as mesmas), só os dias novos são calculados, com as últimas
+semanas de cada área como contexto.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from artefatos import impressao_digital_arquivo
+from calendario import COLUNAS_CALENDARIO, atributos_calendario
+from config import DIRETORIO_FEATURES, FEATURES_DEFASAGENS, FEATURES_JANELAS
+from ingestao import concatenar_chunks
+from metricas import cronometrado
+from validacao import chaves_data_area
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Sem pyarrow, o armazém é recalculado a cada carga
+    pq = None
+
+# Incrementar sempre que as colunas ou o cálculo mudarem; armazéns de outra versão são recalculados.
+VERSAO_ARMAZEM = 1
+
+COLUNAS_BASE = ["data", "area", "quantidade_lixo"]
+
+
+def colunas_defasagens(defasagens: Sequence[int], janelas: Sequence[int]) -> List[str]:
+    """
+    Nomes das colunas de defasagem e de média móvel.
+
+    Args:
+        defasagens (Sequence[int]): Dias de cada ``lag_k``.
+        janelas (Sequence[int]): Dias de cada ``media_w``.
+
+    Returns:
+        List[str]: ``lag_k`` de cada defasagem seguidos de ``media_w`` de cada janela.
+    """
+    return [f"lag_{k}" for k in defasagens] + [f"media_{w}" for w in janelas]
+
+
+def calcular_defasagens(area: np.ndarray, dia: np.ndarray, quantidade: np.ndarray, defasagens: Sequence[int],
+                        janelas: Sequence[int]) -> Dict[str, np.ndarray]:
+    """
+    Calcula as defasagens e as médias móveis de cada coleta, sem laço por área.
+
+    Args:
+        area (np.ndarray): Código inteiro (>= 0) da área de cada coleta.
+        dia (np.ndarray): Dia de cada coleta, como inteiro (dias corridos).
+        quantidade (np.ndarray): Quantidade de cada coleta.
+        defasagens (Sequence[int]): Dias de cada ``lag_k``.
+        janelas (Sequence[int]): Dias de cada ``media_w``.
+
+    Returns:
+        Dict[str, np.ndarray]: Uma coluna por nome de ``colunas_defasagens``, alinhada às coletas (NaN sem dado).
+    """
+    n = len(dia)
+    if not n:
+        return {coluna: np.empty(0) for coluna in colunas_defasagens(defasagens, janelas)}
+    # Chave única por (área, dia): as áreas ocupam faixas disjuntas, então buscar "k dias antes" nunca cai em outra área
+    relativo = dia.astype(np.int64) - dia.min()
+    extensao = int(relativo.max()) + 1
+    chave = area.astype(np.int64) * extensao + relativo
+    ordem = np.argsort(chave, kind="stable")
+    # Tudo é calculado na ordem das chaves, onde as buscas são sequenciais, e devolvido à ordem das linhas no fim
+    ordenadas = chave[ordem]
+    relativo_ordenado = relativo[ordem]
+    q = quantidade.astype(np.float64)[ordem]
+
+    colunas = {}
+    for k in defasagens:
+        alvo = ordenadas - k
+        posicao = np.minimum(np.searchsorted(ordenadas, alvo), n - 1)
+        achou = (ordenadas[posicao] == alvo) & (relativo_ordenado >= k)
+        colunas[f"lag_{k}"] = np.where(achou, q[posicao], np.nan)
+
+    soma = np.concatenate([[0.0], np.cumsum(q)])
+    fim = np.searchsorted(ordenadas, ordenadas)  # Primeira posição do próprio dia: a janela termina no dia anterior
+    for w in janelas:
+        inicio = np.searchsorted(ordenadas, ordenadas - np.minimum(relativo_ordenado, w))
+        contagem = fim - inicio
+        with np.errstate(invalid="ignore", divide="ignore"):
+            colunas[f"media_{w}"] = np.where(contagem > 0, (soma[fim] - soma[inicio]) / contagem, np.nan)
+    for nome, valores in colunas.items():
+        desordenados = np.empty(n)
+        desordenados[ordem] = valores
+        colunas[nome] = desordenados
+    return colunas
+
+
+@cronometrado("armazem_features.materializar")
+def materializar_features(dados: pd.DataFrame, defasagens: Sequence[int] = FEATURES_DEFASAGENS,
+                          janelas: Sequence[int] = FEATURES_JANELAS) -> pd.DataFrame:
+    """
+    Monta a matriz de features das coletas, na ordem das linhas recebidas.
+
+    Args:
+        dados (pd.DataFrame): Coletas com ``data``, ``area`` e ``quantidade_lixo``.
+        defasagens (Sequence[int], optional): Dias de cada ``lag_k``. Defaults to FEATURES_DEFASAGENS.
+        janelas (Sequence[int], optional): Dias de cada ``media_w``. Defaults to FEATURES_JANELAS.
+
+    Returns:
+        pd.DataFrame: ``COLUNAS_BASE``, ``COLUNAS_CALENDARIO`` e as colunas de ``colunas_defasagens``.
+    """
+    matriz = dados[COLUNAS_BASE].reset_index(drop=True)
+    calendario = atributos_calendario(matriz["data"])
+    area, _ = pd.factorize(matriz["area"])
+    dia = matriz["data"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    defasadas = calcular_defasagens(area, dia, matriz["quantidade_lixo"].to_numpy(), defasagens, janelas)
+    return pd.concat([matriz, calendario, pd.DataFrame(defasadas)], axis=1)
+
+
+def _resumo_prefixo(dados: pd.DataFrame, ultimo_dia: pd.Timestamp) -> List[int]:
+    # Número de coletas até o dia e uma soma (módulo 2⁶⁴) do hash de cada (data, área, quantidade), que não
+    # depende da ordem das linhas: se coincidir, as features até esse dia não mudaram
+    ate = dados[(dados["data"] <= ultimo_dia).to_numpy()]
+    if ate.empty:
+        return [0, 0]
+    quantidades = ate["quantidade_lixo"].to_numpy(dtype=np.float64).view(np.uint64)
+    misturadas = chaves_data_area(ate) ^ (quantidades * np.uint64(0x9E3779B97F4A7C15))
+    return [len(ate), int(misturadas.sum(dtype=np.uint64))]
+
+
+class ArmazemFeatures:
+    """
+    Features materializadas de cada coleta do histórico.
+
+    Attributes:
+        matriz (pd.DataFrame): Uma linha por coleta: ``data``, ``area``, ``quantidade_lixo``, as colunas de
+            ``COLUNAS_CALENDARIO`` (``feriado`` é o do calendário) e as defasagens e médias móveis.
+        defasagens (list): Dias das colunas ``lag_k``.
+        janelas (list): Dias das colunas ``media_w``.
+        origem (str): Como a matriz foi obtida: "disco", "incremental" (só os dias novos calculados) ou "completo".
+    """
+
+    def __init__(self, matriz: pd.DataFrame, defasagens: Sequence[int] = FEATURES_DEFASAGENS,
+                 janelas: Sequence[int] = FEATURES_JANELAS, origem: str = "completo") -> None:
+        self.matriz = matriz
+        self.defasagens = list(defasagens)
+        self.janelas = list(janelas)
+        self.origem = origem
+
+    @classmethod
+    def de_dados(cls, dados: pd.DataFrame, defasagens: Sequence[int] = FEATURES_DEFASAGENS,
+                 janelas: Sequence[int] = FEATURES_JANELAS) -> "ArmazemFeatures":
+        """
+        Materializa as features de todas as coletas.
+
+        Args:
+            dados (pd.DataFrame): Coletas com ``data``, ``area`` e ``quantidade_lixo``.
+            defasagens (Sequence[int], optional): Dias de cada ``lag_k``. Defaults to FEATURES_DEFASAGENS.
+            janelas (Sequence[int], optional): Dias de cada ``media_w``. Defaults to FEATURES_JANELAS.
+
+        Returns:
+            ArmazemFeatures: Armazém com uma linha por coleta.
+        """
+        return cls(materializar_features(dados, defasagens, janelas), defasagens, janelas)
+
+    @property
+    def matriz(self) -> pd.DataFrame:
+        """
+        Matriz de features, incluindo as coletas recebidas por ``acrescentar``.
+
+        As partes novas só são concatenadas quando a matriz é lida, para que
+        ``acrescentar`` não copie a matriz inteira a cada lote.
+        """
+        if self._partes_novas:
+            self._matriz = concatenar_chunks([self._matriz, *self._partes_novas])
+            self._partes_novas = []
+        return self._matriz
+
+    @matriz.setter
+    def matriz(self, valor: pd.DataFrame) -> None:
+        self._matriz = valor
+        self._partes_novas: List[pd.DataFrame] = []
+        self._ultimo_dia = valor["data"].max() if len(valor) else None
+        self._chaves: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def colunas(self) -> List[str]:
+        """Colunas de features da matriz (calendário, defasagens e médias móveis)."""
+        return COLUNAS_CALENDARIO + colunas_defasagens(self.defasagens, self.janelas)
+
+    @property
+    def ultimo_dia(self) -> Optional[pd.Timestamp]:
+        """Dia mais recente materializado, ou None se o armazém está vazio."""
+        return self._ultimo_dia
+
+    def acrescentar(self, novos: pd.DataFrame) -> None:
+        """
+        Materializa coletas novas sem recalcular o histórico.
+
+        Coletas a partir do último dia materializado só precisam dos últimos
+        ``max(defasagens, janelas)`` dias como contexto, e o custo é
+        proporcional a eles. Uma coleta anterior ao último dia muda as features
+        de coletas já materializadas; só nesse caso a matriz inteira é recalculada.
+
+        Args:
+            novos (pd.DataFrame): Coletas com ``data``, ``area`` e ``quantidade_lixo``.
+        """
+        if novos.empty:
+            return
+        novos = novos[COLUNAS_BASE]
+        if self._ultimo_dia is None or novos["data"].min() < self._ultimo_dia:
+            base = concatenar_chunks([self.matriz[COLUNAS_BASE], novos]) if self._ultimo_dia is not None else novos
+            self.matriz = materializar_features(base, self.defasagens, self.janelas)
+            return
+        inicio_contexto = self._ultimo_dia - pd.Timedelta(days=max(self.defasagens + self.janelas, default=0))
+        contexto = concatenar_chunks([parte.loc[(parte["data"] >= inicio_contexto).to_numpy(), COLUNAS_BASE]
+                                      for parte in (self._matriz, *self._partes_novas)])
+        calculadas = materializar_features(concatenar_chunks([contexto, novos]), self.defasagens, self.janelas)
+        self._partes_novas.append(calculadas.iloc[len(contexto):])
+        self._ultimo_dia = max(self._ultimo_dia, novos["data"].max())
+        self._chaves = None
+
+    def linhas(self, dados: pd.DataFrame, colunas: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Features das coletas de ``dados``, na ordem das linhas dele.
+
+        Args:
+            dados (pd.DataFrame): Coletas já materializadas, com ``data`` e ``area`` categórica (como em ``carregar_historico``).
+            colunas (Sequence[str], optional): Colunas desejadas. Defaults to None (``colunas``).
+
+        Returns:
+            pd.DataFrame: Uma linha por coleta, com o índice de ``dados``.
+
+        Raises:
+            ValueError: Se alguma coleta não foi materializada (ver ``acrescentar``).
+        """
+        colunas = list(colunas) if colunas is not None else self.colunas
+        matriz = self.matriz
+        if (len(dados) == len(matriz) and np.array_equal(dados["data"].to_numpy(), matriz["data"].to_numpy())
+                and dados["area"].reset_index(drop=True).equals(matriz["area"])):
+            resultado = matriz[colunas].copy()  # Mesmas coletas na mesma ordem (o caso de quem materializou ``dados``)
+        else:
+            if self._chaves is None:
+                chaves = chaves_data_area(matriz)
+                ordem = np.argsort(chaves)
+                self._chaves = (chaves[ordem], ordem)
+            ordenadas, ordem = self._chaves
+            alvo = chaves_data_area(dados)
+            posicao = np.minimum(np.searchsorted(ordenadas, alvo), max(len(ordenadas) - 1, 0))
+            faltando = int((ordenadas[posicao] != alvo).sum()) if len(ordenadas) else len(alvo)
+            if faltando:
+                raise ValueError(f"{faltando} coletas sem features materializadas; acrescente-as ao armazém antes.")
+            resultado = matriz[colunas].iloc[ordem[posicao]]
+        resultado.index = dados.index
+        return resultado
+
+    def anexar(self, dados: pd.DataFrame, colunas: Sequence[str]) -> None:
+        """
+        Copia colunas do armazém para as coletas de ``dados``, como o treino e a previsão as leem.
+
+        Args:
+            dados (pd.DataFrame): Coletas já materializadas (ver ``linhas``); alteradas no lugar.
+            colunas (Sequence[str]): Colunas a copiar.
+
+        Raises:
+            ValueError: Se alguma coleta não foi materializada (ver ``acrescentar``).
+        """
+        for coluna, valores in self.linhas(dados, colunas).items():
+            dados[coluna] = valores.to_numpy()
+
+
+def caminho_armazem(arquivo_dados: str, diretorio: str = DIRETORIO_FEATURES) -> str:
+    """
+    Caminho do armazém de features de um arquivo de dados.
+
+    Args:
+        arquivo_dados (str): CSV com os dados históricos.
+        diretorio (str, optional): Diretório dos armazéns. Defaults to DIRETORIO_FEATURES.
+
+    Returns:
+        str: Arquivo Parquet da matriz; o manifesto fica ao lado, com o sufixo ``_manifesto.json``.
+    """
+    return os.path.join(diretorio, f"{os.path.splitext(os.path.basename(arquivo_dados))[0]}.parquet")
+
+
+def _caminho_manifesto(caminho: str) -> str:
+    return f"{os.path.splitext(caminho)[0]}_manifesto.json"
+
+
+def _ler_manifesto(caminho: str) -> Optional[dict]:
+    try:
+        with open(_caminho_manifesto(caminho), encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def salvar_armazem(armazem: ArmazemFeatures, caminho: str, impressao_digital: str) -> None:
+    """
+    Salva a matriz e o manifesto de forma atômica (o manifesto por último).
+
+    Args:
+        armazem (ArmazemFeatures): Armazém a salvar.
+        caminho (str): Arquivo Parquet de destino.
+        impressao_digital (str): Impressão digital do CSV de origem.
+    """
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    armazem.matriz.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho)
+    ultimo_dia = armazem.ultimo_dia
+    manifesto = {
+        "versao_armazem": VERSAO_ARMAZEM,
+        "impressao_digital": impressao_digital,
+        "defasagens": armazem.defasagens,
+        "janelas": armazem.janelas,
+        "linhas": len(armazem.matriz),
+        "ultimo_dia": None if ultimo_dia is None else f"{ultimo_dia:%Y-%m-%d}",
+        "prefixo": _resumo_prefixo(armazem.matriz, ultimo_dia) if ultimo_dia is not None else [0, 0],
+    }
+    temporario = f"{_caminho_manifesto(caminho)}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo)
+    os.replace(temporario, _caminho_manifesto(caminho))
+
+
+@cronometrado("armazem_features.obter")
+def armazem_do_historico(arquivo_dados: str, dados: pd.DataFrame, diretorio: str = DIRETORIO_FEATURES,
+                         defasagens: Sequence[int] = FEATURES_DEFASAGENS,
+                         janelas: Sequence[int] = FEATURES_JANELAS) -> ArmazemFeatures:
+    """
+    Obtém o armazém de features do histórico, reaproveitando o que estiver salvo.
+
+    Args:
+        arquivo_dados (str): CSV de onde ``dados`` foi lido.
+        dados (pd.DataFrame): Histórico de ``arquivo_dados``, como devolvido por ``carregar_historico``.
+        diretorio (str, optional): Diretório dos armazéns. Defaults to DIRETORIO_FEATURES.
+        defasagens (Sequence[int], optional): Dias de cada ``lag_k``. Defaults to FEATURES_DEFASAGENS.
+        janelas (Sequence[int], optional): Dias de cada ``media_w``. Defaults to FEATURES_JANELAS.
+
+    Returns:
+        ArmazemFeatures: Armazém com uma linha por coleta de ``dados``; ``origem`` diz se veio do disco,
+        se só os dias novos foram calculados ou se tudo foi calculado.
+    """
+    caminho = caminho_armazem(arquivo_dados, diretorio)
+    impressao = impressao_digital_arquivo(arquivo_dados)
+    manifesto = _ler_manifesto(caminho) if pq is not None else None
+    compativel = (manifesto is not None and manifesto.get("versao_armazem") == VERSAO_ARMAZEM
+                  and manifesto.get("defasagens") == list(defasagens) and manifesto.get("janelas") == list(janelas)
+                  and os.path.exists(caminho))
+    if compativel and manifesto.get("impressao_digital") == impressao and manifesto.get("linhas") == len(dados):
+        return ArmazemFeatures(pd.read_parquet(caminho, memory_map=True), defasagens, janelas, origem="disco")
+
+    armazem = None
+    if compativel and manifesto.get("ultimo_dia") is not None:
+        ultimo_dia = pd.Timestamp(manifesto["ultimo_dia"])
+        if _resumo_prefixo(dados, ultimo_dia) == manifesto.get("prefixo"):
+            armazem = ArmazemFeatures(pd.read_parquet(caminho, memory_map=True), defasagens, janelas, origem="incremental")
+            armazem.acrescentar(dados[(dados["data"] > ultimo_dia).to_numpy()])
+    if armazem is None:
+        armazem = ArmazemFeatures.de_dados(dados, defasagens, janelas)
+    if pq is not None:
+        salvar_armazem(armazem, caminho, impressao)
+    return armazem
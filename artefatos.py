@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from modelo_linear import CodificadorCategorias, ModeloLinear
+from previsao import FEATURES
+
+# Incrementar sempre que os campos salvos mudarem; artefatos de outra versão são descartados.
+# Versão 3: métricas medidas nas coletas mais recentes (divisão temporal), não numa amostra aleatória.
+# Versão 4: treino com os feriados do calendário somados aos marcados no CSV.
+# Versão 5: véspera e dia seguinte de feriado, lidos do armazém de features, entre as features.
+VERSAO_FORMATO = 5
+
+_impressoes_calculadas: Dict[Tuple[str, int, int], str] = {}
+
+
+def assinatura_arquivo(caminho: str) -> Tuple[int, int]:
+    """
+    Retorna a assinatura barata de um arquivo: (mtime em ns, tamanho em bytes).
+
+    Args:
+        caminho (str): Caminho do arquivo.
+
+    Returns:
+        Tuple[int, int]: Data de modificação e tamanho do arquivo.
+    """
+    info = os.stat(caminho)
+    return info.st_mtime_ns, info.st_size
+
+
+def impressao_digital_arquivo(caminho: str) -> str:
+    """
+    Calcula o SHA-256 do conteúdo do arquivo.
+
+    O resultado fica memorizado pela assinatura do arquivo, então chamadas
+    repetidas no mesmo processo não releem o arquivo enquanto ele não mudar.
+
+    Args:
+        caminho (str): Caminho do arquivo.
+
+    Returns:
+        str: Hash hexadecimal do conteúdo.
+    """
+    chave = (os.path.abspath(caminho), *assinatura_arquivo(caminho))
+    if chave not in _impressoes_calculadas:
+        sha = hashlib.sha256()
+        with open(caminho, "rb") as arquivo:
+            for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+                sha.update(bloco)
+        _impressoes_calculadas[chave] = sha.hexdigest()
+    return _impressoes_calculadas[chave]
+
+
+@dataclass
+class ArtefatoModelo:
+    """
+    Modelo treinado em formato serializável.
+
+    Attributes:
+        impressao_digital (str): SHA-256 do CSV usado no treino.
+        assinatura (list): (mtime, tamanho) do CSV no momento do treino, para evitar recalcular o hash.
+        features (list): Colunas de entrada do modelo, na ordem dos coeficientes.
+        coeficientes (list): Coeficientes da regressão linear.
+        intercepto (float): Intercepto da regressão linear.
+        classes_tipo_area (list): Classes do codificador de ``tipo_area``.
+        metricas (dict): Métricas de avaliação do treino.
+        estatisticas (dict): Estatísticas suficientes do treino (ver ``regressao_incremental``), ou None.
+        criado_em (float): Momento do treino (epoch).
+        versao_formato (int): Versão do formato do artefato.
+    """
+
+    impressao_digital: str
+    assinatura: List[int]
+    features: List[str]
+    coeficientes: List[float]
+    intercepto: float
+    classes_tipo_area: List[str]
+    metricas: Dict[str, float]
+    estatisticas: Optional[Dict[str, Dict[str, list]]] = None
+    criado_em: float = field(default_factory=time.time)
+    versao_formato: int = VERSAO_FORMATO
+
+    @property
+    def versao(self) -> str:
+        """Identificador curto do modelo, derivado dos dados de treino."""
+        return self.impressao_digital[:12]
+
+    @classmethod
+    def de_modelo(cls, modelo, le, arquivo_dados: str, metricas: Dict[str, float],
+                  estatisticas: Optional[Dict[str, Dict[str, list]]] = None) -> "ArtefatoModelo":
+        """
+        Cria o artefato a partir de um modelo e encoder já treinados.
+
+        Args:
+            modelo (ModeloLinear): Modelo treinado com as colunas de ``FEATURES``.
+            le (CodificadorCategorias): Encoder de ``tipo_area`` usado no treino.
+            arquivo_dados (str): CSV usado no treino.
+            metricas (Dict[str, float]): Métricas de avaliação.
+            estatisticas (Dict, optional): Estatísticas suficientes do treino. Defaults to None.
+
+        Returns:
+            ArtefatoModelo: Artefato pronto para ser salvo.
+        """
+        return cls(
+            impressao_digital=impressao_digital_arquivo(arquivo_dados),
+            assinatura=list(assinatura_arquivo(arquivo_dados)),
+            features=list(FEATURES),
+            coeficientes=[float(c) for c in modelo.coef_],
+            intercepto=float(modelo.intercept_),
+            classes_tipo_area=[str(c) for c in le.classes_],
+            metricas={nome: float(valor) for nome, valor in metricas.items()},
+            estatisticas=estatisticas,
+        )
+
+    def modelo(self) -> ModeloLinear:
+        """
+        Reconstrói o modelo de regressão linear sem treinar e sem importar o scikit-learn.
+
+        Returns:
+            ModeloLinear: Modelo pronto para ``predict`` e ``prever_lote``.
+        """
+        return ModeloLinear(self.coeficientes, self.intercepto, self.features)
+
+    def codificador(self) -> CodificadorCategorias:
+        """
+        Reconstrói o codificador de ``tipo_area``.
+
+        Returns:
+            CodificadorCategorias: Encoder com as classes do treino.
+        """
+        return CodificadorCategorias(self.classes_tipo_area)
+
+
+def caminho_artefato(arquivo_dados: str, diretorio: str) -> str:
+    """
+    Caminho do artefato associado a um arquivo de dados.
+
+    Args:
+        arquivo_dados (str): CSV com os dados históricos.
+        diretorio (str): Diretório dos artefatos.
+
+    Returns:
+        str: Caminho do arquivo JSON do artefato.
+    """
+    nome = os.path.splitext(os.path.basename(arquivo_dados))[0]
+    return os.path.join(diretorio, f"{nome}.modelo.json")
+
+
+def salvar_artefato(artefato: ArtefatoModelo, caminho: str) -> None:
+    """
+    Salva o artefato em JSON de forma atômica.
+
+    Args:
+        artefato (ArtefatoModelo): Artefato a salvar.
+        caminho (str): Caminho de destino.
+    """
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(asdict(artefato), arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def carregar_artefato(caminho: str, arquivo_dados: str) -> Optional[ArtefatoModelo]:
+    """
+    Carrega o artefato se ele corresponder aos dados atuais.
+
+    A comparação usa primeiro a assinatura (mtime, tamanho) do CSV; o hash do
+    conteúdo só é calculado quando a assinatura mudou.
+
+    Args:
+        caminho (str): Caminho do artefato.
+        arquivo_dados (str): CSV com os dados históricos.
+
+    Returns:
+        Optional[ArtefatoModelo]: O artefato, ou None se não existir, estiver em outro formato ou se os dados mudaram.
+    """
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            conteudo = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    if conteudo.get("versao_formato") != VERSAO_FORMATO or conteudo.get("features") != FEATURES:
+        return None
+    try:
+        artefato = ArtefatoModelo(**conteudo)
+    except TypeError:
+        return None
+
+    assinatura = list(assinatura_arquivo(arquivo_dados))
+    if artefato.assinatura == assinatura:
+        return artefato
+    if artefato.impressao_digital != impressao_digital_arquivo(arquivo_dados):
+        return None
+    # Mesmo conteúdo com outra assinatura (ex.: arquivo copiado): atualiza para a próxima carga.
+    artefato.assinatura = assinatura
+    salvar_artefato(artefato, caminho)
+    return artefato
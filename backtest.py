@@ -0,0 +1,284 @@
+"""
+Backtest com origem móvel: reajusta o modelo em vários cortes e mede o erro nos dias seguintes.
+
+Para cada corte, o modelo é ajustado só com as coletas anteriores a ele (janela
+expansiva, ou as últimas ``janela`` dias numa janela deslizante) e prevê os
+``horizonte`` dias a partir do corte, usando a chuva e o feriado observados. O
+erro é resumido por área e por horizonte (MAE e MAPE), junto com o acerto da
+regra de coleta extra (previsão acima de ``LIMITE_COLETA_EXTRA``).
+
+Os reajustes não revisitam as linhas: as estatísticas suficientes (BᵀB e Bᵀy,
+com B = [1, FEATURES_AREA]) de cada área são somadas por trecho entre cortes
+uma única vez, e a soma acumulada dá as estatísticas de qualquer janela. Cada
+corte custa um sistema 6×6 por área, resolvido em lote para todas. A avaliação,
+que percorre as linhas de cada janela de teste, roda num pool de processos,
+com cada processo recebendo um grupo de cortes consecutivos.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    BACKTEST_HORIZONTE,
+    BACKTEST_JANELA,
+    BACKTEST_PASSO,
+    BACKTEST_TREINO_MINIMO,
+    LIMITE_COLETA_EXTRA,
+    MIN_AMOSTRAS_AREA,
+)
+from metricas import cronometrado
+from previsao import FEATURES
+from regressao_incremental import FEATURES_BASE, EstatisticasSuficientes
+
+# Abaixo disso o custo de iniciar processos e serializar as linhas supera o ganho do paralelismo
+_MIN_LINHAS_PARALELO = 1_000_000
+_DIMENSAO = 1 + len(FEATURES_BASE)
+_TRIANGULO = np.triu_indices(_DIMENSAO)
+
+
+def divisao_temporal(datas: pd.Series, fracao_teste: float = 0.2) -> np.ndarray:
+    """
+    Separa as coletas mais recentes para teste, sem misturar passado e futuro.
+
+    Args:
+        datas (pd.Series): Data de cada coleta.
+        fracao_teste (float, optional): Fração aproximada das linhas no teste. Defaults to 0.2.
+
+    Returns:
+        np.ndarray: Máscara das linhas de treino; o teste são as demais, todas de datas posteriores.
+    """
+    corte = datas.quantile(1 - fracao_teste, interpolation="higher")
+    treino = (datas < corte).to_numpy()
+    if not treino.any() or treino.all():  # Uma só data: não há como separar no tempo
+        treino = np.ones(len(datas), dtype=bool)
+        treino[-max(1, int(len(datas) * fracao_teste)):] = False
+    return treino
+
+
+@dataclass
+class ResultadoBacktest:
+    """
+    Erros de um backtest.
+
+    Attributes:
+        por_area_horizonte (pd.DataFrame): area, horizonte (1 = dia do corte), avaliacoes, mae e mape (%).
+        por_area (pd.DataFrame): Indexado por área: avaliacoes, mae, mape e o acerto, a precisão e a
+            revocação da regra de coleta extra.
+        geral (dict): As mesmas métricas de ``por_area`` sobre todas as avaliações.
+        cortes (list): Datas de corte avaliadas.
+        modo (str): "global" ou "area".
+        janela (int): Dias de treino da janela deslizante, ou None para janela expansiva.
+        horizonte (int): Dias previstos após cada corte.
+        segundos (float): Duração total.
+    """
+
+    por_area_horizonte: pd.DataFrame = field(repr=False)
+    por_area: pd.DataFrame = field(repr=False)
+    geral: Dict[str, float]
+    cortes: List[datetime] = field(repr=False)
+    modo: str
+    janela: Optional[int]
+    horizonte: int
+    segundos: float
+
+
+def _estatisticas_por_trecho(area: np.ndarray, trecho: np.ndarray, X: np.ndarray, y: np.ndarray,
+                             n_areas: int, n_trechos: int) -> Tuple[np.ndarray, np.ndarray]:
+    # BᵀB e Bᵀy de cada (área, trecho), com uma soma por bincount para cada termo distinto de BᵀB
+    B = np.column_stack([np.ones(len(y)), X])
+    indice = area * n_trechos + trecho
+    tamanho = n_areas * n_trechos
+    G = np.zeros((tamanho, _DIMENSAO, _DIMENSAO))
+    for i, j in zip(*_TRIANGULO):
+        G[:, i, j] = G[:, j, i] = np.bincount(indice, B[:, i] * B[:, j], minlength=tamanho)
+    h = np.stack([np.bincount(indice, B[:, i] * y, minlength=tamanho) for i in range(_DIMENSAO)], axis=1)
+    return G.reshape(n_areas, n_trechos, _DIMENSAO, _DIMENSAO), h.reshape(n_areas, n_trechos, _DIMENSAO)
+
+
+def _resolver_em_lote(G: np.ndarray, h: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Mínimos quadrados centrados e de norma mínima, como o LinearRegression, para uma pilha de sistemas
+    n = G[..., 0, 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias, media_y = G[..., 0, 1:] / n[..., None], h[..., 0] / n
+    medias, media_y = np.nan_to_num(medias), np.nan_to_num(media_y)
+    Sxx = G[..., 1:, 1:] - n[..., None, None] * medias[..., :, None] * medias[..., None, :]
+    Sxy = h[..., 1:] - n[..., None] * medias * media_y[..., None]
+    coeficientes = (np.linalg.pinv(Sxx, hermitian=True) @ Sxy[..., None])[..., 0]
+    return media_y - (medias * coeficientes).sum(axis=-1), coeficientes, n
+
+
+def _avaliar_cortes(cortes: np.ndarray, interceptos: np.ndarray, coeficientes: np.ndarray, dia: np.ndarray,
+                    area: np.ndarray, X: np.ndarray, y: np.ndarray, n_areas: int, horizonte: int,
+                    limite: float) -> Tuple[np.ndarray, np.ndarray]:
+    # Executado nos processos do pool para um grupo de cortes consecutivos; as linhas estão ordenadas por dia
+    erros = np.zeros((4, n_areas * horizonte))  # avaliações, soma do erro absoluto, soma do erro percentual, linhas com y > 0
+    confusao = np.zeros((4, n_areas))  # verdadeiros positivos, falsos positivos, falsos negativos, verdadeiros negativos
+    for k, corte in enumerate(cortes):
+        inicio, fim = np.searchsorted(dia, [corte, corte + horizonte])
+        a, x, real = area[inicio:fim], X[inicio:fim], y[inicio:fim]
+        previsto = interceptos[k, a] + (coeficientes[k, a] * x).sum(axis=1)
+        celula = a * horizonte + (dia[inicio:fim] - corte)
+        absoluto = np.abs(previsto - real)
+        positivo = real > 0
+        erros[0] += np.bincount(celula, minlength=erros.shape[1])
+        erros[1] += np.bincount(celula, absoluto, minlength=erros.shape[1])
+        erros[2] += np.bincount(celula[positivo], absoluto[positivo] / real[positivo], minlength=erros.shape[1])
+        erros[3] += np.bincount(celula[positivo], minlength=erros.shape[1])
+        previsto_extra, real_extra = previsto > limite, real > limite
+        for i, mascara in enumerate((previsto_extra & real_extra, previsto_extra & ~real_extra,
+                                     ~previsto_extra & real_extra, ~previsto_extra & ~real_extra)):
+            confusao[i] += np.bincount(a[mascara], minlength=n_areas)
+    return erros, confusao
+
+
+def _metricas_regra(confusao: np.ndarray) -> Dict[str, np.ndarray]:
+    vp, fp, fn, vn = confusao
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "acerto_coleta_extra": (vp + vn) / (vp + fp + fn + vn),
+            "precisao_coleta_extra": vp / (vp + fp),
+            "revocacao_coleta_extra": vp / (vp + fn),
+        }
+
+
+@cronometrado("backtest.executar")
+def executar_backtest(dados: pd.DataFrame, modo: str = "global", horizonte: int = BACKTEST_HORIZONTE,
+                      passo: int = BACKTEST_PASSO, janela: Optional[int] = BACKTEST_JANELA,
+                      treino_minimo: int = BACKTEST_TREINO_MINIMO, min_amostras: int = MIN_AMOSTRAS_AREA,
+                      limite: float = LIMITE_COLETA_EXTRA, processos: Optional[int] = None) -> ResultadoBacktest:
+    """
+    Avalia o modelo em cortes a cada ``passo`` dias, do fim do treino mínimo até o fim do histórico.
+
+    No modo "global", cada corte ajusta o modelo do ``LixoPrevisor`` (tipo de
+    área como feature numérica); no modo "area", cada área com pelo menos
+    ``min_amostras`` linhas na janela tem o próprio modelo, e as demais usam o
+    global, como o ``RegistroModelos``. O MAPE ignora os dias com coleta zero.
+
+    Args:
+        dados (pd.DataFrame): Histórico com ``data``, ``area``, ``tipo_area``, ``quantidade_lixo``, ``chuva``, ``feriado``
+            e as colunas de ``FEATURES_CALENDARIO`` (ver ``ArmazemFeatures.anexar``).
+        modo (str, optional): "global" ou "area". Defaults to "global".
+        horizonte (int, optional): Dias previstos após cada corte. Defaults to BACKTEST_HORIZONTE.
+        passo (int, optional): Dias entre cortes. Defaults to BACKTEST_PASSO.
+        janela (int, optional): Dias de treino antes de cada corte; None usa todo o histórico anterior. Defaults to BACKTEST_JANELA.
+        treino_minimo (int, optional): Dias de histórico antes do primeiro corte. Defaults to BACKTEST_TREINO_MINIMO.
+        min_amostras (int, optional): Linhas mínimas para uma área ter modelo próprio no modo "area". Defaults to MIN_AMOSTRAS_AREA.
+        limite (float, optional): Limite da regra de coleta extra. Defaults to LIMITE_COLETA_EXTRA.
+        processos (int, optional): Processos da avaliação; None usa todos os núcleos e 1 avalia no processo atual. Defaults to None.
+
+    Returns:
+        ResultadoBacktest: Erros por área e horizonte e o acerto da regra de coleta extra.
+    """
+    if modo not in ("global", "area"):
+        raise ValueError(f"Modo de previsão desconhecido: {modo!r} (use 'global' ou 'area')")
+    if min(horizonte, passo, treino_minimo, janela or 1) < 1:
+        raise ValueError("horizonte, passo, janela e treino mínimo devem ser positivos")
+    inicio = time.perf_counter()
+
+    # Matriz de features montada uma vez, com as linhas em ordem de dia; todos os cortes a reaproveitam
+    ordem = np.argsort(dados["data"].to_numpy(), kind="stable")
+    datas = dados["data"].to_numpy()[ordem].astype("datetime64[D]")
+    primeiro_dia = datas[0]
+    dia = (datas - primeiro_dia).astype(np.int64)
+    area, areas = pd.factorize(dados["area"].to_numpy()[ordem])
+    X = np.column_stack([
+        dados["data"].dt.dayofweek.to_numpy(dtype=np.float64)[ordem] if f == "dia_semana" else dados[f].to_numpy(dtype=np.float64)[ordem]
+        for f in FEATURES_BASE
+    ])
+    y = dados["quantidade_lixo"].to_numpy(dtype=np.float64)[ordem]
+    n_areas = len(areas)
+
+    cortes = np.arange(treino_minimo, dia[-1] + 1, passo)
+    if not len(cortes):
+        raise ValueError(f"O histórico tem {dia[-1] + 1} dias, menos que o treino mínimo de {treino_minimo}")
+
+    # Trechos entre fronteiras (cortes e inícios de janela): a soma acumulada até a fronteira j
+    # são as estatísticas das linhas anteriores a ela
+    fronteiras = np.unique(np.concatenate([cortes, cortes - janela if janela else []]).astype(np.int64))
+    trecho = np.searchsorted(fronteiras, dia, side="right")
+    G, h = _estatisticas_por_trecho(area, trecho, X, y, n_areas, len(fronteiras) + 1)
+    G, h = np.cumsum(G, axis=1), np.cumsum(h, axis=1)
+    fim = np.searchsorted(fronteiras, cortes)
+    G_janela, h_janela = G[:, fim], h[:, fim]  # (áreas, cortes, ...)
+    if janela:
+        comeco = np.searchsorted(fronteiras, cortes - janela)
+        G_janela, h_janela = G_janela - G[:, comeco], h_janela - h[:, comeco]
+
+    # Modelo global de cada corte: as estatísticas por tipo de área combinadas como no LixoPrevisor
+    tipo_por_area = pd.Series(dados["tipo_area"].astype(str).to_numpy()[ordem]).groupby(area).first().to_numpy()
+    classes = sorted(set(tipo_por_area))
+    codigos = {tipo: i for i, tipo in enumerate(classes)}
+    codigo_por_area = np.array([codigos[tipo] for tipo in tipo_por_area], dtype=np.float64)
+    posicoes_base = [FEATURES.index(f) for f in FEATURES_BASE]
+    interceptos = np.zeros((len(cortes), n_areas))
+    coeficientes = np.zeros((len(cortes), n_areas, len(FEATURES_BASE)))
+    for k in range(len(cortes)):
+        estatisticas = EstatisticasSuficientes()
+        for tipo in classes:
+            do_tipo = tipo_por_area == tipo
+            estatisticas.por_tipo[tipo] = (G_janela[do_tipo, k].sum(axis=0), h_janela[do_tipo, k].sum(axis=0))
+        coef_global, intercepto_global = estatisticas.resolver(codigos)
+        interceptos[k] = intercepto_global + coef_global[FEATURES.index("tipo_area_num")] * codigo_por_area
+        coeficientes[k] = coef_global[posicoes_base]
+    if modo == "area":
+        interceptos_area, coeficientes_area, n = _resolver_em_lote(G_janela, h_janela)
+        proprio = (n >= min_amostras).T  # (cortes, áreas)
+        interceptos = np.where(proprio, interceptos_area.T, interceptos)
+        coeficientes = np.where(proprio[..., None], coeficientes_area.transpose(1, 0, 2), coeficientes)
+
+    # Avaliação: grupos de cortes consecutivos, cada um com só as linhas das suas janelas de teste
+    processos = processos or os.cpu_count() or 1
+    inicio_teste, fim_teste = np.searchsorted(dia, cortes), np.searchsorted(dia, cortes + horizonte)
+    linhas_avaliadas = int((fim_teste - inicio_teste).sum())
+    n_grupos = min(len(cortes), processos * 4) if processos > 1 and linhas_avaliadas >= _MIN_LINHAS_PARALELO else 1
+    grupos = np.array_split(np.arange(len(cortes)), n_grupos)
+    argumentos = []
+    for grupo in grupos:
+        a, b = inicio_teste[grupo[0]], fim_teste[grupo[-1]]
+        argumentos.append((cortes[grupo], interceptos[grupo], coeficientes[grupo], dia[a:b], area[a:b], X[a:b], y[a:b],
+                           n_areas, horizonte, limite))
+    if n_grupos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            parciais = list(executor.map(_avaliar_cortes, *zip(*argumentos)))
+    else:
+        parciais = [_avaliar_cortes(*argumentos[0])]
+    erros = sum(p[0] for p in parciais).reshape(4, n_areas, horizonte)
+    confusao = sum(p[1] for p in parciais)
+
+    avaliacoes, soma_absoluto, soma_percentual, positivos = erros
+    with np.errstate(invalid="ignore", divide="ignore"):
+        por_area_horizonte = pd.DataFrame({
+            "area": np.repeat(np.asarray(areas, dtype=object), horizonte),
+            "horizonte": np.tile(np.arange(1, horizonte + 1), n_areas),
+            "avaliacoes": avaliacoes.ravel().astype(np.int64),
+            "mae": (soma_absoluto / avaliacoes).ravel(),
+            "mape": (100 * soma_percentual / positivos).ravel(),
+        })
+        por_area = pd.DataFrame({
+            "avaliacoes": avaliacoes.sum(axis=1).astype(np.int64),
+            "mae": soma_absoluto.sum(axis=1) / avaliacoes.sum(axis=1),
+            "mape": 100 * soma_percentual.sum(axis=1) / positivos.sum(axis=1),
+            **_metricas_regra(confusao),
+        }, index=pd.Index(areas, name="area"))
+        geral = {
+            "avaliacoes": int(avaliacoes.sum()),
+            "mae": float(soma_absoluto.sum() / avaliacoes.sum()),
+            "mape": float(100 * soma_percentual.sum() / positivos.sum()),
+            **{nome: float(valor) for nome, valor in _metricas_regra(confusao.sum(axis=1)).items()},
+        }
+    return ResultadoBacktest(
+        por_area_horizonte=por_area_horizonte[por_area_horizonte["avaliacoes"] > 0].reset_index(drop=True),
+        por_area=por_area,
+        geral=geral,
+        cortes=list(pd.to_datetime(primeiro_dia + cortes.astype("timedelta64[D]"))),
+        modo=modo,
+        janela=janela,
+        horizonte=horizonte,
+        segundos=time.perf_counter() - inicio,
+    )
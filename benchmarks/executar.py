@@ -0,0 +1,308 @@
+"""
+Benchmarks de carga, treino, previsão, exportação e início a frio, comparados com um baseline.
+
+    python -m benchmarks.executar                                  # 10³ a 10⁵ linhas
+    python -m benchmarks.executar --linhas 1000 100000 10000000 --areas 200
+    python -m benchmarks.executar --atualizar-baseline              # grava o baseline atual
+
+Cada caso é executado uma vez para aquecer caches e imports, depois uma vez com
+tracemalloc para medir o pico de memória e, por fim, ``--repeticoes`` vezes
+para registrar o menor tempo.
+Os resultados são salvos em JSON e, se um caso ficar mais lento ou usar mais
+memória que o baseline além da tolerância, o comando termina com código 1.
+O baseline depende da máquina: regrave-o ao trocar de ambiente.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from armazem_features import ArmazemFeatures
+from backtest import executar_backtest
+from benchmarks.gerar_dados import DIAS_MAXIMOS, areas_necessarias, gerar_historico
+from cenarios import avaliar_cenarios
+from config import DIRETORIO_CACHE_DADOS, DIRETORIO_MODELOS
+from ingestao import concatenar_chunks, ler_csv_em_chunks
+from planejamento import frota_uniforme, planejar_coletas
+from previsor import LixoPrevisor
+from relatorios import gerar_csv, gerar_pdf, tabela_previsoes
+
+DIRETORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_PROJETO = os.path.dirname(DIRETORIO_BENCHMARKS)
+BASELINE_PADRAO = os.path.join(DIRETORIO_BENCHMARKS, "baseline.json")
+
+# Diferenças absolutas abaixo destes pisos são ruído, mesmo que a razão seja grande
+PISO_SEGUNDOS = 0.005
+PISO_MB = 1.0
+
+
+@dataclass
+class Caso:
+    """
+    Um caso de benchmark.
+
+    Attributes:
+        nome (str): Identificador do caso.
+        executar (Callable): Função medida.
+        preparar (Callable): Função executada antes de cada repetição, fora da medição, ou None.
+    """
+
+    nome: str
+    executar: Callable[[], object]
+    preparar: Optional[Callable[[], None]] = None
+
+
+def medir(caso: Caso, repeticoes: int) -> Dict[str, float]:
+    """
+    Mede o menor tempo e o pico de memória de um caso.
+
+    Args:
+        caso (Caso): Caso a medir.
+        repeticoes (int): Execuções cronometradas.
+
+    Returns:
+        Dict[str, float]: ``segundos`` (menor tempo) e ``pico_mb`` (pico de memória alocada pelo Python e pelo NumPy).
+    """
+    tempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Aquecimento fora das medições: os imports tardios (scikit-learn, reportlab...) e as fontes
+        # do PDF não entram nem no tempo nem no pico de memória
+        if caso.preparar:
+            caso.preparar()
+        caso.executar()
+        if caso.preparar:
+            caso.preparar()
+        tracemalloc.start()
+        try:
+            caso.executar()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        for _ in range(repeticoes):
+            if caso.preparar:
+                caso.preparar()
+            inicio = time.perf_counter()
+            caso.executar()
+            tempos.append(time.perf_counter() - inicio)
+    return {"segundos": min(tempos), "pico_mb": pico / 2 ** 20}
+
+
+def casos_por_tamanho(arquivo: str) -> List[Caso]:
+    """
+    Casos que dependem do tamanho do histórico.
+
+    Args:
+        arquivo (str): CSV sintético; o diretório atual deve ser descartável (caches e modelos são criados nele).
+
+    Returns:
+        List[Caso]: Casos de leitura, construção e previsão.
+    """
+    def limpar_caches():
+        shutil.rmtree(DIRETORIO_CACHE_DADOS, ignore_errors=True)
+        shutil.rmtree(DIRETORIO_MODELOS, ignore_errors=True)
+
+    previsor = {}
+
+    def construir():
+        previsor["atual"] = LixoPrevisor(arquivo)
+
+    def previsor_pronto() -> LixoPrevisor:
+        if "atual" not in previsor:
+            construir()
+        return previsor["atual"]
+
+    def cli_prever():
+        # Processo novo a cada repetição: mede o início a frio do comando, com os caches de dados e modelo já no disco
+        subprocess.run([sys.executable, os.path.join(DIRETORIO_PROJETO, "cli.py"), "prever", "--dados", arquivo,
+                        "--formato", "csv"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    # Mil cenários de 30 dias com probabilidade de chuva e feriados por dia (só o resumo, sem arquivo de saída)
+    aleatorio = np.random.default_rng(0)
+    cenarios = pd.DataFrame({
+        "cenario": np.repeat(np.arange(1000), 30),
+        "data": np.tile(pd.date_range("2025-01-01", periods=30), 1000),
+        "chuva": aleatorio.random(30_000).round(2),
+        "feriado": (aleatorio.random(30_000) < 0.05).astype(int),
+    })
+
+    return [
+        Caso("leitura_csv", lambda: concatenar_chunks(list(ler_csv_em_chunks(arquivo)))),
+        Caso("construcao_previsor_frio", construir, preparar=limpar_caches),
+        Caso("construcao_previsor_quente", construir),
+        Caso("prever_proxima_semana", lambda: previsor_pronto().prever_proxima_semana()),
+        Caso("prever_dias_especificos_3650", lambda: previsor_pronto().prever_dias_especificos(datetime(2025, 1, 1), 3650)),
+        Caso("cli_prever", cli_prever),
+        Caso("cenarios_1000x30", lambda: avaliar_cenarios(previsor_pronto(), cenarios)),
+        # Cortes semanais desde o 7º dia, para que até o menor histórico (20 dias com 50 áreas) tenha cortes
+        Caso("backtest_area", lambda: executar_backtest(previsor_pronto().dados, "area", horizonte=7, passo=7, treino_minimo=7)),
+        Caso("armazem_features_completo", lambda: ArmazemFeatures.de_dados(previsor_pronto().dados)),
+    ]
+
+
+def casos_inicializacao() -> List[Caso]:
+    """
+    Início a frio de cada ponto de entrada, num processo Python novo por execução.
+
+    Returns:
+        List[Caso]: Import dos módulos usados como biblioteca e ``cli.py --help`` (o pico de memória
+        registrado é o do processo que mede, não o do processo filho).
+    """
+    def processo(*argumentos: str) -> Callable[[], None]:
+        return lambda: subprocess.run([sys.executable, *argumentos], cwd=DIRETORIO_PROJETO, check=True,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    return [
+        Caso("inicio_cli_ajuda", processo("cli.py", "--help")),
+        Caso("inicio_import_previsor", processo("-c", "import previsor")),
+        Caso("inicio_import_servico", processo("-c", "import servico_previsao")),
+        Caso("inicio_import_exportacao", processo("-c", "import exportacao_lote")),
+    ]
+
+
+def casos_relatorios() -> List[Caso]:
+    """
+    Casos de exportação e planejamento, que não dependem do tamanho do histórico.
+
+    Returns:
+        List[Caso]: Geração de CSV e PDF para um ano de previsões e plano de coletas extras.
+    """
+    datas = pd.date_range("2025-01-01", periods=365)
+    tabela = tabela_previsoes(datas.strftime("%A").tolist(), np.linspace(300, 900, len(datas)))
+    # Plano de coletas extras de 5000 áreas em 8 semanas, com cerca de 20% de área-dias acima do limite
+    previsoes = np.random.default_rng(0).normal(600, 120, (5000, 56))
+    areas = [f"Área {i}" for i in range(len(previsoes))]
+    frota = frota_uniforme(40, 3000, turnos=2)
+    return [
+        Caso("relatorio_csv_365", lambda: gerar_csv(tabela)),
+        Caso("relatorio_pdf_365", lambda: gerar_pdf("Relatório de Previsões - Benchmark", "2025", tabela)),
+        Caso("planejamento_5000x56", lambda: planejar_coletas(previsoes, areas, pd.date_range("2025-01-01", periods=56), frota)),
+    ]
+
+
+def executar(tamanhos: List[int], areas: int, repeticoes: int) -> Dict:
+    """
+    Executa todos os casos num diretório temporário.
+
+    Args:
+        tamanhos (List[int]): Números de linhas dos históricos sintéticos.
+        areas (int): Número de áreas dos históricos. Tamanhos que passariam de
+            ``DIAS_MAXIMOS`` dias com tantas áreas usam as áreas necessárias
+            (10⁷ linhas pedem ao menos 274), registradas em ``parametros``.
+        repeticoes (int): Execuções cronometradas por caso.
+
+    Returns:
+        Dict: Ambiente e resultados de cada caso, indexados por ``nome@linhas``.
+    """
+    resultados = {}
+    areas_usadas = {}
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="benchmarks_") as temporario:
+        os.chdir(temporario)
+        try:
+            for caso in casos_inicializacao() + casos_relatorios():
+                resultados[caso.nome] = medir(caso, repeticoes)
+                print(f"{caso.nome:<45} {resultados[caso.nome]['segundos']:9.4f} s {resultados[caso.nome]['pico_mb']:9.1f} MB")
+            for linhas in tamanhos:
+                areas_usadas[linhas] = areas_necessarias(linhas, areas)
+                if areas_usadas[linhas] != areas:
+                    print(f"{linhas} linhas em {areas} áreas passariam de {DIAS_MAXIMOS} dias; usando {areas_usadas[linhas]} áreas")
+                arquivo = gerar_historico(os.path.join(temporario, f"historico_{linhas}.csv"), linhas, areas_usadas[linhas])
+                for caso in casos_por_tamanho(arquivo):
+                    chave = f"{caso.nome}@{linhas}"
+                    resultados[chave] = medir(caso, repeticoes)
+                    print(f"{chave:<45} {resultados[chave]['segundos']:9.4f} s {resultados[chave]['pico_mb']:9.1f} MB")
+                os.remove(arquivo)
+        finally:
+            os.chdir(diretorio_original)
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scikit-learn": sklearn.__version__,
+            "plataforma": platform.platform(),
+            "nucleos": os.cpu_count(),
+        },
+        "parametros": {"areas": areas, "areas_por_tamanho": areas_usadas, "repeticoes": repeticoes},
+        "resultados": resultados,
+    }
+
+
+def comparar(atual: Dict, baseline: Dict, tolerancia_tempo: float, tolerancia_memoria: float) -> List[str]:
+    """
+    Compara os resultados com o baseline.
+
+    Args:
+        atual (Dict): Resultados de ``executar``.
+        baseline (Dict): Resultados salvos como referência.
+        tolerancia_tempo (float): Piora relativa de tempo tolerada (0.3 = 30%).
+        tolerancia_memoria (float): Piora relativa do pico de memória tolerada.
+
+    Returns:
+        List[str]: Descrição de cada regressão encontrada.
+    """
+    regressoes = []
+    for chave, medida in atual["resultados"].items():
+        referencia = baseline["resultados"].get(chave)
+        if referencia is None:
+            continue
+        segundos, segundos_ref = medida["segundos"], referencia["segundos"]
+        if segundos > segundos_ref * (1 + tolerancia_tempo) and segundos - segundos_ref > PISO_SEGUNDOS:
+            regressoes.append(f"{chave}: {segundos:.4f} s contra {segundos_ref:.4f} s no baseline ({segundos / segundos_ref:.2f}x)")
+        pico, pico_ref = medida["pico_mb"], referencia["pico_mb"]
+        if pico > pico_ref * (1 + tolerancia_memoria) and pico - pico_ref > PISO_MB:
+            regressoes.append(f"{chave}: pico de {pico:.1f} MB contra {pico_ref:.1f} MB no baseline ({pico / pico_ref:.2f}x)")
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de carga, treino, previsão e exportação.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="tamanhos dos históricos (10³ a 10⁷)")
+    parser.add_argument("--areas", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", default="resultados_benchmarks.json")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO)
+    parser.add_argument("--tolerancia-tempo", type=float, default=0.3)
+    parser.add_argument("--tolerancia-memoria", type=float, default=0.2)
+    parser.add_argument("--atualizar-baseline", action="store_true", help="grava os resultados como novo baseline")
+    args = parser.parse_args()
+
+    resultado = executar(args.linhas, args.areas, args.repeticoes)
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f"Resultados salvos em {args.saida}")
+
+    if args.atualizar_baseline:
+        shutil.copyfile(args.saida, args.baseline)
+        print(f"Baseline atualizado em {args.baseline}")
+        sys.exit(0)
+    if not os.path.exists(args.baseline):
+        print(f"Nenhum baseline em {args.baseline}; use --atualizar-baseline para criar um.")
+        sys.exit(0)
+    with open(args.baseline, encoding="utf-8") as arquivo:
+        baseline = json.load(arquivo)
+    if baseline.get("parametros") != resultado["parametros"]:
+        print(f"Aviso: baseline gerado com outros parâmetros ({baseline.get('parametros')})")
+    regressoes = comparar(resultado, baseline, args.tolerancia_tempo, args.tolerancia_memoria)
+    if regressoes:
+        print(f"\nREGRESSÃO DE DESEMPENHO em {len(regressoes)} caso(s):", file=sys.stderr)
+        for regressao in regressoes:
+            print(f"  - {regressao}", file=sys.stderr)
+        sys.exit(1)
+    print("Nenhuma regressão em relação ao baseline.")
@@ -0,0 +1,97 @@
+"""
+Gera históricos sintéticos de coleta no formato do lixo_mossoro.csv.
+
+    python -m benchmarks.gerar_dados --linhas 1000000 --areas 200 --saida /tmp/historico.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+TIPOS_AREA = ["comercial", "residencial", "industrial"]
+_LINHAS_POR_BLOCO = 1_000_000
+# De 01/01/2000 a 31/12/2099: bem antes do limite de datas do pandas (2262)
+DIAS_MAXIMOS = 36_525
+
+
+def areas_necessarias(linhas: int, areas: int) -> int:
+    """
+    Menor número de áreas, a partir de ``areas``, que acomoda ``linhas`` registros em até ``DIAS_MAXIMOS`` dias.
+
+    Args:
+        linhas (int): Número de registros.
+        areas (int): Número de áreas desejado.
+
+    Returns:
+        int: ``areas`` ou, se o período passaria de ``DIAS_MAXIMOS`` dias, o suficiente para não passar.
+    """
+    return max(areas, -(-linhas // DIAS_MAXIMOS))
+
+
+def gerar_historico(caminho: str, linhas: int, areas: int = 50, semente: int = 0) -> str:
+    """
+    Escreve um histórico sintético determinístico: um registro por área e dia, a partir de 01/01/2000.
+
+    A quantidade depende do tipo de área, do dia da semana, de chuva e de
+    feriado, mais ruído, para que o modelo tenha algo a aprender. O arquivo é
+    escrito em blocos, então 10⁷ linhas não precisam caber na memória de uma vez.
+
+    Args:
+        caminho (str): Arquivo CSV de saída.
+        linhas (int): Número de registros.
+        areas (int, optional): Número de áreas. Defaults to 50.
+        semente (int, optional): Semente do gerador aleatório. Defaults to 0.
+
+    Returns:
+        str: O próprio ``caminho``.
+
+    Raises:
+        ValueError: Se ``linhas`` ou ``areas`` não forem positivos, ou se o
+            período passar de ``DIAS_MAXIMOS`` dias (use ``areas_necessarias``).
+    """
+    if linhas <= 0 or areas <= 0:
+        raise ValueError(f"linhas e areas devem ser positivos (recebidos {linhas} e {areas})")
+    n_dias = -(-linhas // areas)
+    if n_dias > DIAS_MAXIMOS:
+        raise ValueError(f"{linhas} linhas em {areas} áreas exigem {n_dias} dias, acima do máximo de {DIAS_MAXIMOS}; "
+                         f"use pelo menos {areas_necessarias(linhas, areas)} áreas")
+    rng = np.random.default_rng(semente)
+    nomes = np.array([f"Area {i:05d}" for i in range(areas)], dtype=object)
+    tipos_por_area = np.array(TIPOS_AREA, dtype=object)[np.arange(areas) % len(TIPOS_AREA)]
+    base_por_area = rng.uniform(200, 800, areas)
+    datas = pd.date_range("2000-01-01", periods=n_dias, freq="D")
+    datas_texto = np.asarray(datas.strftime("%d/%m/%Y"), dtype=object)
+    dia_semana = datas.dayofweek.to_numpy()
+
+    with open(caminho, "w", encoding="utf-8", newline="") as arquivo:
+        arquivo.write("data,area,quantidade_lixo,tipo_area,chuva,feriado\n")
+        for inicio in range(0, linhas, _LINHAS_POR_BLOCO):
+            indice = np.arange(inicio, min(inicio + _LINHAS_POR_BLOCO, linhas))
+            dia, area = indice // areas, indice % areas
+            chuva = (rng.random(len(indice)) < 0.2).astype(np.int8)
+            feriado = (rng.random(len(indice)) < 0.03).astype(np.int8)
+            quantidade = (base_por_area[area] + 40 * (dia_semana[dia] >= 5) + 120 * chuva - 80 * feriado
+                          + rng.normal(0, 50, len(indice))).clip(0).round(1)
+            pd.DataFrame({
+                "data": datas_texto[dia],
+                "area": nomes[area],
+                "quantidade_lixo": quantidade,
+                "tipo_area": tipos_por_area[area],
+                "chuva": chuva,
+                "feriado": feriado,
+            }).to_csv(arquivo, header=False, index=False)
+    return caminho
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um histórico sintético de coletas.")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--areas", type=int, default=50)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", required=True)
+    args = parser.parse_args()
+    try:
+        gerar_historico(args.saida, args.linhas, args.areas, args.semente)
+    except ValueError as erro:
+        parser.error(str(erro))
+    print(f"{args.linhas} linhas escritas em {args.saida}")
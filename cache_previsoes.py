@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, TypeVar
+
+V = TypeVar("V")
+
+
+class CacheLRU:
+    """
+    Cache limitado com descarte do item menos usado recentemente (LRU).
+
+    Seguro para uso por várias threads, como as sessões do Streamlit. O valor é
+    calculado fora do lock, então dois pedidos simultâneos da mesma chave ainda
+    podem calcular em dobro, mas nunca bloqueiam leituras de outras chaves.
+
+    Attributes:
+        capacidade (int): Número máximo de itens guardados.
+        acertos (int): Leituras atendidas pelo cache.
+        falhas (int): Leituras que precisaram calcular o valor.
+        descartes (int): Itens removidos por falta de espaço.
+    """
+
+    def __init__(self, capacidade: int = 256) -> None:
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self._itens: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def obter(self, chave: Hashable, calcular: Callable[[], V]) -> V:
+        """
+        Retorna o valor da chave, calculando e guardando se ainda não estiver no cache.
+
+        Args:
+            chave (Hashable): Chave do item.
+            calcular (Callable[[], V]): Função chamada para obter o valor numa falha.
+
+        Returns:
+            V: Valor em cache ou recém-calculado.
+        """
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.falhas += 1
+        valor = calcular()
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+                self.descartes += 1
+        return valor
+
+    def limpar(self) -> None:
+        """Remove todos os itens, mantendo os contadores."""
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self) -> Dict[str, float]:
+        """
+        Contadores do cache.
+
+        Returns:
+            Dict[str, float]: Itens, capacidade, acertos, falhas, descartes e taxa de acerto.
+        """
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "capacidade": self.capacidade,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "descartes": self.descartes,
+                "taxa_acerto": self.acertos / total if total else 0.0,
+            }
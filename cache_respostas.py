@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterator, Optional, Set, Tuple
+
+from config import (
+    ARQUIVO_CACHE_RESPOSTAS,
+    CACHE_RESPOSTAS_MAX_ITENS,
+    CACHE_RESPOSTAS_SIMILARIDADE,
+    CACHE_RESPOSTAS_TTL,
+)
+
+
+def normalizar_pergunta(pergunta: str) -> str:
+    """
+    Normaliza a pergunta para comparação: minúsculas, sem acentos, sem pontuação e espaços simples.
+
+    Args:
+        pergunta (str): Pergunta digitada pelo usuário.
+
+    Returns:
+        str: Pergunta normalizada.
+    """
+    sem_acentos = unicodedata.normalize("NFKD", pergunta.lower()).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", sem_acentos).split())
+
+
+# Palavras que invertem o sentido da pergunta (já sem acentos)
+NEGACOES = frozenset({"nao", "nem", "nunca", "jamais", "sem", "nenhum", "nenhuma", "exceto"})
+
+
+def termos_decisivos(pergunta_normalizada: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    Números e negações da pergunta, que mudam a resposta mesmo quando o resto do texto é igual.
+
+    Args:
+        pergunta_normalizada (str): Pergunta já normalizada.
+
+    Returns:
+        Tuple[FrozenSet[str], FrozenSet[str]]: Tokens com dígitos e palavras de negação.
+    """
+    tokens = pergunta_normalizada.split()
+    return (frozenset(t for t in tokens if any(c.isdigit() for c in t)),
+            frozenset(t for t in tokens if t in NEGACOES))
+
+
+def trigramas(texto: str) -> Set[str]:
+    """
+    Trigramas de caracteres do texto, usados como assinatura barata para achar perguntas parecidas.
+
+    Args:
+        texto (str): Texto já normalizado.
+
+    Returns:
+        Set[str]: Conjunto de trigramas.
+    """
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def similaridade(a: str, b: str) -> float:
+    """
+    Similaridade de Jaccard entre os trigramas de dois textos normalizados.
+
+    Args:
+        a (str): Primeiro texto.
+        b (str): Segundo texto.
+
+    Returns:
+        float: Valor entre 0 e 1.
+    """
+    ta, tb = trigramas(a), trigramas(b)
+    return len(ta & tb) / len(ta | tb) if ta or tb else 1.0
+
+
+@dataclass
+class RespostaEmCache:
+    """
+    Resposta encontrada no cache.
+
+    Attributes:
+        resposta (str): Texto da resposta.
+        pergunta (str): Pergunta normalizada que gerou a resposta.
+        similaridade (float): 1.0 para acerto exato; menor para a pergunta mais parecida.
+        idade (float): Segundos desde que a resposta foi gerada.
+    """
+
+    resposta: str
+    pergunta: str
+    similaridade: float
+    idade: float
+
+    @property
+    def exata(self) -> bool:
+        """True quando a pergunta normalizada é idêntica à do cache."""
+        return self.similaridade >= 1.0
+
+
+class CacheRespostas:
+    """
+    Cache em disco (SQLite) das respostas do assistente.
+
+    A chave combina a pergunta normalizada com o escopo da geração: nome do
+    modelo, parâmetros de amostragem e versão dos dados/modelo. Respostas
+    expiram após ``ttl`` segundos e, acima de ``max_itens``, as menos acessadas
+    recentemente são descartadas. Opcionalmente, uma pergunta sem acerto exato
+    reaproveita a resposta da pergunta mais parecida do mesmo escopo, desde
+    que as duas tenham os mesmos números e as mesmas negações ("2023" e
+    "2024", ou "precisam" e "não precisam", têm respostas diferentes).
+
+    Attributes:
+        caminho (str): Arquivo SQLite do cache.
+        ttl (float): Validade das respostas, em segundos.
+        max_itens (int): Número máximo de respostas guardadas.
+        similaridade_minima (float): Similaridade mínima para aproveitar uma pergunta parecida; None desativa a busca aproximada.
+    """
+
+    def __init__(self, caminho: str = ARQUIVO_CACHE_RESPOSTAS, ttl: float = CACHE_RESPOSTAS_TTL,
+                 max_itens: int = CACHE_RESPOSTAS_MAX_ITENS,
+                 similaridade_minima: Optional[float] = CACHE_RESPOSTAS_SIMILARIDADE) -> None:
+        self.caminho = caminho
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.similaridade_minima = similaridade_minima
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("""
+                CREATE TABLE IF NOT EXISTS respostas (
+                    chave TEXT PRIMARY KEY,
+                    escopo TEXT NOT NULL,
+                    pergunta TEXT NOT NULL,
+                    resposta TEXT NOT NULL,
+                    criado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL
+                )
+            """)
+            conexao.execute("CREATE INDEX IF NOT EXISTS idx_respostas_escopo ON respostas (escopo, acessado_em)")
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        # Uma conexão por operação: o cache é usado por várias threads do Streamlit
+        conexao = sqlite3.connect(self.caminho, timeout=5)
+        try:
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+
+    @staticmethod
+    def escopo(modelo: str, parametros: Dict[str, float], versao: str) -> str:
+        """
+        Identificador do contexto de geração das respostas.
+
+        Args:
+            modelo (str): Nome do modelo do LLM.
+            parametros (Dict[str, float]): Parâmetros de amostragem (temperatura, max_tokens...).
+            versao (str): Versão dos dados/modelo de previsão.
+
+        Returns:
+            str: Hash do escopo.
+        """
+        conteudo = json.dumps({"modelo": modelo, "parametros": parametros, "versao": versao}, sort_keys=True)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def obter(self, pergunta: str, escopo: str) -> Optional[RespostaEmCache]:
+        """
+        Procura a resposta de uma pergunta no escopo informado.
+
+        Args:
+            pergunta (str): Pergunta do usuário.
+            escopo (str): Escopo retornado por ``escopo``.
+
+        Returns:
+            Optional[RespostaEmCache]: A resposta exata ou a mais parecida acima do limiar, ou None.
+        """
+        normalizada = normalizar_pergunta(pergunta)
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM respostas WHERE criado_em < ?", (agora - self.ttl,))
+            linha = conexao.execute(
+                "SELECT chave, pergunta, resposta, criado_em FROM respostas WHERE chave = ?",
+                (self._chave(normalizada, escopo),),
+            ).fetchone()
+            similar = 1.0
+            if linha is None and self.similaridade_minima is not None:
+                candidatas = conexao.execute(
+                    "SELECT chave, pergunta, resposta, criado_em FROM respostas WHERE escopo = ? "
+                    "ORDER BY acessado_em DESC LIMIT ?",
+                    (escopo, self.max_itens),
+                ).fetchall()
+                decisivos = termos_decisivos(normalizada)
+                melhores = [(similaridade(normalizada, c[1]), c) for c in candidatas
+                            if termos_decisivos(c[1]) == decisivos]
+                similar, linha = max(melhores, default=(0.0, None), key=lambda par: par[0])
+                if similar < self.similaridade_minima:
+                    linha = None
+            if linha is None:
+                return None
+            conexao.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, linha[0]))
+        return RespostaEmCache(linha[2], linha[1], similar, agora - linha[3])
+
+    def guardar(self, pergunta: str, escopo: str, resposta: str) -> None:
+        """
+        Guarda uma resposta e descarta as excedentes.
+
+        Args:
+            pergunta (str): Pergunta do usuário.
+            escopo (str): Escopo retornado por ``escopo``.
+            resposta (str): Resposta gerada pelo LLM.
+        """
+        normalizada = normalizar_pergunta(pergunta)
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?)",
+                (self._chave(normalizada, escopo), escopo, normalizada, resposta, agora, agora),
+            )
+            conexao.execute(
+                "DELETE FROM respostas WHERE chave IN ("
+                "SELECT chave FROM respostas ORDER BY acessado_em DESC LIMIT -1 OFFSET ?)",
+                (self.max_itens,),
+            )
+
+    @staticmethod
+    def _chave(pergunta_normalizada: str, escopo: str) -> str:
+        return hashlib.sha256(f"{escopo}\n{pergunta_normalizada}".encode("utf-8")).hexdigest()
@@ -0,0 +1,181 @@
+"""
+Calendário de Mossoró: feriados nacionais, do Rio Grande do Norte e municipais, e atributos de cada dia.
+
+Os feriados móveis seguem o domingo de Páscoa. Carnaval e Corpus Christi são
+pontos facultativos nacionais, mas entram como feriado porque mudam a rotina
+da coleta na cidade. A tabela de cada ano é montada uma vez por processo; as
+consultas por período ou por coleta só indexam as tabelas já prontas.
+"""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from previsao import FEATURES_CALENDARIO
+
+# (mês, dia, nome, primeiro ano em vigor ou None)
+FERIADOS_FIXOS = [
+    (1, 1, "Confraternização Universal", None),
+    (4, 21, "Tiradentes", None),
+    (5, 1, "Dia do Trabalho", None),
+    (9, 7, "Independência do Brasil", None),
+    (9, 30, "Libertação dos Escravos de Mossoró", None),
+    (10, 3, "Mártires de Cunhaú e Uruaçu", None),
+    (10, 12, "Nossa Senhora Aparecida", None),
+    (11, 2, "Finados", None),
+    (11, 15, "Proclamação da República", None),
+    (11, 20, "Dia Nacional de Zumbi e da Consciência Negra", 2024),
+    (12, 13, "Santa Luzia, padroeira de Mossoró", None),
+    (12, 25, "Natal", None),
+]
+# Dias em relação ao domingo de Páscoa
+FERIADOS_MOVEIS = [(-48, "Carnaval"), (-47, "Carnaval"), (-2, "Sexta-feira da Paixão"), (60, "Corpus Christi")]
+
+COLUNAS_CALENDARIO = ["dia_semana", "dia_mes", "mes", "dia_ano", "semana_ano", "feriado", "vespera_feriado", "pos_feriado"]
+
+
+def pascoa(ano: int) -> date:
+    """
+    Domingo de Páscoa do calendário gregoriano (algoritmo de Meeus/Jones/Butcher).
+
+    Args:
+        ano (int): Ano.
+
+    Returns:
+        date: Data da Páscoa.
+    """
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    ajuste = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * ajuste) // 451
+    mes, dia = divmod(h + ajuste - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados(ano: int) -> Dict[date, str]:
+    """
+    Feriados de Mossoró no ano.
+
+    Args:
+        ano (int): Ano.
+
+    Returns:
+        Dict[date, str]: Nome de cada feriado, indexado pela data.
+    """
+    datas = {date(ano, mes, dia): nome for mes, dia, nome, desde in FERIADOS_FIXOS if desde is None or ano >= desde}
+    domingo = pascoa(ano)
+    for deslocamento, nome in FERIADOS_MOVEIS:
+        datas.setdefault(domingo + timedelta(days=deslocamento), nome)
+    return dict(sorted(datas.items()))
+
+
+@lru_cache(maxsize=None)
+def _tabela_ano(ano: int) -> pd.DataFrame:
+    # As vésperas e os dias seguintes olham para os anos vizinhos (31/12 é véspera de 01/01)
+    dias = pd.date_range(f"{ano}-01-01", f"{ano}-12-31", freq="D")
+    nomes = {**feriados(ano - 1), **feriados(ano), **feriados(ano + 1)}
+    datas_feriado = pd.DatetimeIndex(list(nomes))
+    feriado = dias.isin(datas_feriado)
+    tabela = pd.DataFrame({
+        "dia_semana": dias.dayofweek,
+        "dia_mes": dias.day,
+        "mes": dias.month,
+        "dia_ano": dias.dayofyear,
+        "semana_ano": dias.isocalendar().week.to_numpy(),
+        "feriado": feriado,
+        "vespera_feriado": (dias + pd.Timedelta(days=1)).isin(datas_feriado),
+        "pos_feriado": (dias - pd.Timedelta(days=1)).isin(datas_feriado),
+    }, index=dias.rename("data")).astype("int8")
+    tabela["nome_feriado"] = [nomes.get(dia.date(), "") for dia in dias]
+    return tabela
+
+
+def tabela_calendario(inicio: Union[date, datetime], fim: Union[date, datetime]) -> pd.DataFrame:
+    """
+    Atributos de cada dia do período, inclusive o último.
+
+    Args:
+        inicio (date): Primeiro dia.
+        fim (date): Último dia.
+
+    Returns:
+        pd.DataFrame: Indexado por data, com as colunas de ``COLUNAS_CALENDARIO`` e ``nome_feriado``.
+    """
+    inicio, fim = pd.Timestamp(inicio).normalize(), pd.Timestamp(fim).normalize()
+    if fim < inicio:
+        return _tabela_ano(inicio.year).iloc[:0].copy()
+    tabela = pd.concat([_tabela_ano(ano) for ano in range(inicio.year, fim.year + 1)])
+    return tabela.loc[inicio:fim].copy()
+
+
+def feriados_do_periodo(data_inicio: Union[date, datetime], dias: int) -> np.ndarray:
+    """
+    Marca os feriados de um período, no formato do parâmetro ``feriado`` das previsões.
+
+    Args:
+        data_inicio (date): Primeiro dia do período.
+        dias (int): Número de dias.
+
+    Returns:
+        np.ndarray: 1 nos feriados e 0 nos demais dias (int8).
+    """
+    fim = pd.Timestamp(data_inicio) + pd.Timedelta(days=dias - 1)
+    return tabela_calendario(data_inicio, fim)["feriado"].to_numpy()
+
+
+def calendario_do_periodo(data_inicio: Union[date, datetime], dias: int) -> Dict[str, np.ndarray]:
+    """
+    Features de calendário de um período, no formato do parâmetro ``calendario`` das previsões.
+
+    Args:
+        data_inicio (date): Primeiro dia do período.
+        dias (int): Número de dias.
+
+    Returns:
+        Dict[str, np.ndarray]: Valor de cada dia (int8) para cada coluna de ``FEATURES_CALENDARIO``.
+    """
+    fim = pd.Timestamp(data_inicio) + pd.Timedelta(days=dias - 1)
+    tabela = tabela_calendario(data_inicio, fim)
+    return {coluna: tabela[coluna].to_numpy() for coluna in FEATURES_CALENDARIO}
+
+
+def atributos_calendario(datas: Union[pd.Series, Sequence], colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Atributos do calendário de cada data, na ordem recebida (uma linha por data, com repetições).
+
+    Args:
+        datas (pd.Series ou sequência): Datas, por exemplo a coluna ``data`` do histórico.
+        colunas (List[str], optional): Colunas da tabela do calendário. Defaults to None (``COLUNAS_CALENDARIO``).
+
+    Returns:
+        pd.DataFrame: Atributos alinhados às datas, com o mesmo índice quando ``datas`` é uma Series.
+    """
+    colunas = colunas or COLUNAS_CALENDARIO
+    indice = datas.index if isinstance(datas, pd.Series) else None
+    dias = np.asarray(pd.to_datetime(np.asarray(datas)), dtype="datetime64[D]")
+    if not len(dias):
+        return pd.DataFrame({coluna: np.zeros(0, dtype=np.int8) for coluna in colunas}, index=indice)
+    primeiro, ultimo = dias.min(), dias.max()
+    tabela = tabela_calendario(primeiro, ultimo)
+    posicoes = (dias - primeiro).astype(np.int64)
+    return pd.DataFrame({coluna: tabela[coluna].to_numpy()[posicoes] for coluna in colunas}, index=indice)
+
+
+def aplicar_calendario(dados: pd.DataFrame) -> None:
+    """
+    Preenche ``dia_semana`` pelo calendário e marca em ``feriado`` os feriados que o histórico não marcou.
+
+    O ``feriado`` do CSV continua valendo (um dia sem coleta por outro motivo
+    pode vir marcado); o calendário só acrescenta os feriados esquecidos.
+
+    Args:
+        dados (pd.DataFrame): Coletas com ``data`` e ``feriado``; alteradas no lugar.
+    """
+    calendario = atributos_calendario(dados["data"], ["dia_semana", "feriado"])
+    dados["dia_semana"] = calendario["dia_semana"].to_numpy()
+    dados["feriado"] = np.maximum(dados["feriado"].to_numpy(), calendario["feriado"].to_numpy()).astype(dados["feriado"].dtype)
@@ -0,0 +1,114 @@
+"""
+Gerador de carga para o serviço de previsões (servico_previsao.py).
+
+Dispara requisições de vários clientes simultâneos durante um tempo fixo e
+mede a vazão e as latências p50/p99:
+
+    python carga_servico.py --url http://127.0.0.1:8765 --clientes 16 --duracao 10 --consultas 8
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+import numpy as np
+import requests
+
+
+def gerar_consultas(areas: List[str], quantidade: int, rng: random.Random, cenarios: int = 50) -> List[Dict]:
+    """
+    Sorteia consultas de um conjunto limitado de cenários, como faria um planejador de rotas.
+
+    Args:
+        areas (List[str]): Áreas conhecidas pelo serviço.
+        quantidade (int): Consultas por requisição.
+        rng (random.Random): Gerador de números aleatórios.
+        cenarios (int, optional): Datas de início distintas sorteadas. Defaults to 50.
+
+    Returns:
+        List[Dict]: Corpo do campo ``consultas``.
+    """
+    hoje = date.today()
+    return [{
+        "inicio": (hoje + timedelta(days=rng.randrange(cenarios))).isoformat(),
+        "dias": rng.choice([1, 7, 14, 30]),
+        "chuva": rng.randint(0, 1),
+        "feriado": rng.randint(0, 1),
+        "areas": rng.sample(areas, min(len(areas), rng.randint(1, 5))) if areas else None,
+    } for _ in range(quantidade)]
+
+
+def _cliente(url: str, areas: List[str], consultas: int, fim: float, semente: int,
+             latencias: List[float], status: Dict[int, int], lock: threading.Lock) -> None:
+    rng = random.Random(semente)
+    sessao = requests.Session()
+    while time.perf_counter() < fim:
+        corpo = {"consultas": gerar_consultas(areas, consultas, rng)}
+        inicio = time.perf_counter()
+        try:
+            codigo = sessao.post(f"{url}/previsoes", json=corpo, timeout=30).status_code
+        except requests.RequestException:
+            codigo = 0
+        duracao = time.perf_counter() - inicio
+        with lock:
+            status[codigo] = status.get(codigo, 0) + 1
+            if codigo == 200:
+                latencias.append(duracao)
+        if codigo == 503:
+            time.sleep(0.05)
+
+
+def executar_carga(url: str, clientes: int = 16, duracao: float = 10.0, consultas: int = 8) -> Dict[str, float]:
+    """
+    Executa a carga e resume os resultados.
+
+    Args:
+        url (str): URL base do serviço.
+        clientes (int, optional): Clientes simultâneos. Defaults to 16.
+        duracao (float, optional): Segundos de carga. Defaults to 10.0.
+        consultas (int, optional): Consultas por requisição. Defaults to 8.
+
+    Returns:
+        Dict[str, float]: Requisições/s, consultas/s, latências p50/p99 (ms) e contagem por status HTTP.
+    """
+    requests.get(f"{url}/saude", timeout=5).raise_for_status()
+    # A lista de áreas vem de uma previsão de um dia, sem filtro
+    resposta = requests.post(f"{url}/previsoes", json={"consultas": [{"inicio": date.today().isoformat(), "dias": 1}]}, timeout=30)
+    areas = resposta.json()["resultados"][0]["areas"]
+
+    latencias: List[float] = []
+    status: Dict[int, int] = {}
+    lock = threading.Lock()
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    threads = [threading.Thread(target=_cliente, args=(url, areas, consultas, fim, i, latencias, status, lock))
+               for i in range(clientes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    decorrido = time.perf_counter() - inicio
+
+    ms = np.asarray(latencias) * 1000
+    return {
+        "requisicoes_por_segundo": len(latencias) / decorrido,
+        "consultas_por_segundo": len(latencias) * consultas / decorrido,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else float("nan"),
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else float("nan"),
+        "status": status,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerador de carga para o serviço de previsões.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--duracao", type=float, default=10.0, help="segundos")
+    parser.add_argument("--consultas", type=int, default=8, help="consultas por requisição")
+    args = parser.parse_args()
+    resultado = executar_carga(args.url, args.clientes, args.duracao, args.consultas)
+    print(f"{resultado['requisicoes_por_segundo']:.0f} req/s ({resultado['consultas_por_segundo']:.0f} consultas/s)")
+    print(f"Latência: p50 {resultado['p50_ms']:.1f} ms, p99 {resultado['p99_ms']:.1f} ms")
+    print(f"Respostas por status: {resultado['status']}")
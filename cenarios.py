@@ -0,0 +1,265 @@
+"""
+Motor de cenários: avalia milhares de cenários "e se" com chuva e feriado por dia.
+
+A entrada tem uma linha por dia de cada cenário (CSV, Parquet ou DataFrame):
+
+    cenario,data,chuva,feriado
+    seco,2025-03-03,0,0
+    seco,2025-03-04,0,1
+    chuvoso,2025-03-03,1,0
+
+``chuva`` e ``feriado`` são opcionais e aceitam frações, como a probabilidade
+de chuva da previsão do tempo: o modelo é linear, então chuva = 0,6 dá a média
+ponderada das previsões com e sem chuva. Sem a coluna, ``chuva`` é 0; já o
+``feriado`` ausente (coluna inteira ou célula vazia) vem do calendário pela
+data, como na previsão, e um valor explícito prevalece sobre o calendário
+(``feriado`` = 0 num feriado simula um dia útil). A véspera e o dia seguinte de
+feriado não entram no cenário: vêm sempre do calendário pela data.
+
+Os parâmetros de cada área são extraídos uma vez do ``LixoPrevisor`` e cada
+bloco de linhas vira um único produto de matrizes (linhas × features) ·
+(features × áreas). A saída detalhada é escrita em blocos no CSV ou Parquet;
+a memória fica limitada pelo tamanho do bloco, não pelo número de cenários.
+"""
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from calendario import atributos_calendario
+from config import CENARIOS_CELULAS_POR_BLOCO
+from metricas import cronometrado
+from planejamento import precisa_coleta_extra
+from previsao import FEATURES_CALENDARIO
+from registro_modelos import FEATURES_AREA
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:  # Sem pyarrow, cenários só são lidos e escritos em CSV (pelo pandas)
+    pa = None
+    pacsv = None
+    pq = None
+
+COLUNAS_CENARIOS = ["cenario", "data"]
+COVARIAVEIS = ["chuva", "feriado"]  # Opcionais: chuva 0 e feriado do calendário quando ausentes
+
+
+@dataclass
+class ResumoCenarios:
+    """
+    Resultado da avaliação de um lote de cenários.
+
+    Attributes:
+        cenarios (int): Cenários distintos avaliados.
+        linhas (int): Dias de cenário avaliados (linhas da entrada).
+        previsoes (int): Previsões calculadas (linhas × áreas).
+        segundos (float): Duração total, incluindo leitura e escrita.
+        por_cenario (pd.DataFrame): Por cenário: dias, total_kg e coletas_extra (área-dias acima do limite de coleta extra).
+        saida (str): Arquivo com as previsões detalhadas, ou None.
+    """
+
+    cenarios: int
+    linhas: int
+    previsoes: int
+    segundos: float
+    por_cenario: pd.DataFrame = field(repr=False)
+    saida: Optional[str] = None
+
+    @property
+    def cenarios_por_segundo(self) -> float:
+        """Vazão da avaliação."""
+        return self.cenarios / self.segundos if self.segundos else float("inf")
+
+
+def _formato(caminho: str) -> str:
+    return "parquet" if caminho.lower().endswith(".parquet") else "csv"
+
+
+def ler_cenarios(origem: Union[str, pd.DataFrame], linhas_por_bloco: int) -> Iterator[pd.DataFrame]:
+    """
+    Lê os cenários em blocos, sem carregar o arquivo inteiro.
+
+    Args:
+        origem (str ou pd.DataFrame): Arquivo .csv/.parquet ou DataFrame já montado.
+        linhas_por_bloco (int): Linhas por bloco.
+
+    Yields:
+        pd.DataFrame: Blocos validados por ``preparar_cenarios``.
+    """
+    if isinstance(origem, pd.DataFrame):
+        for inicio in range(0, len(origem), linhas_por_bloco):
+            yield preparar_cenarios(origem.iloc[inicio:inicio + linhas_por_bloco])
+    elif _formato(origem) == "parquet":
+        if pq is None:
+            raise ValueError("Ler cenários em Parquet requer o pacote pyarrow.")
+        for lote in pq.ParquetFile(origem).iter_batches(batch_size=linhas_por_bloco):
+            yield preparar_cenarios(lote.to_pandas())
+    else:
+        for bloco in pd.read_csv(origem, chunksize=linhas_por_bloco, dtype={"cenario": str}):
+            yield preparar_cenarios(bloco)
+
+
+def preparar_cenarios(bloco: pd.DataFrame) -> pd.DataFrame:
+    """
+    Valida um bloco de cenários e normaliza os tipos.
+
+    Args:
+        bloco (pd.DataFrame): Linhas com ``cenario``, ``data`` (AAAA-MM-DD) e, opcionalmente, ``chuva`` e ``feriado``.
+
+    Returns:
+        pd.DataFrame: Colunas cenario (str), data (datetime), chuva e feriado (float entre 0 e 1),
+        com os feriados ausentes preenchidos pelo calendário.
+    """
+    faltando = [coluna for coluna in COLUNAS_CENARIOS if coluna not in bloco.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes nos cenários: {', '.join(faltando)}")
+    try:
+        datas = pd.to_datetime(bloco["data"], format="ISO8601")
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Data inválida nos cenários (use AAAA-MM-DD): {e}")
+    preparado = pd.DataFrame({"cenario": bloco["cenario"].astype(str).to_numpy(), "data": datas.to_numpy()})
+    for coluna in COVARIAVEIS:
+        if coluna == "feriado":
+            valores = bloco[coluna].astype(float).to_numpy(copy=True) if coluna in bloco.columns else np.full(len(bloco), np.nan)
+            ausentes = np.isnan(valores)
+            if ausentes.any():
+                valores[ausentes] = atributos_calendario(datas[ausentes], ["feriado"])["feriado"].to_numpy()
+        else:
+            valores = bloco[coluna].astype(float).to_numpy() if coluna in bloco.columns else np.zeros(len(bloco))
+        if np.isnan(valores).any() or (valores < 0).any() or (valores > 1).any():
+            raise ValueError(f"Valores de {coluna} nos cenários devem estar entre 0 e 1")
+        preparado[coluna] = valores
+    return preparado
+
+
+class _EscritorPrevisoes:
+    # Escreve os blocos de previsões num temporário e só o move para o destino no fim. Com pyarrow, os
+    # blocos são montados direto como tabelas Arrow (bem mais rápido que DataFrame + to_csv em dezenas
+    # de milhões de linhas); sem ele, o CSV é escrito pelo pandas.
+    COLUNAS = ["cenario", "data", "area", "quantidade_kg", "coleta_extra"]
+
+    def __init__(self, caminho: str, areas: np.ndarray) -> None:
+        self.caminho = caminho
+        self.formato = _formato(caminho)
+        if self.formato == "parquet" and pq is None:
+            raise ValueError("Escrever cenários em Parquet requer o pacote pyarrow.")
+        self.areas = np.asarray(areas, dtype=object).astype(str)
+        self.temporario = f"{caminho}.{os.getpid()}.tmp"
+        self.arquivo = open(self.temporario, "wb")
+        self.escritor = None
+        if self.formato == "csv":
+            self.arquivo.write((",".join(self.COLUNAS) + "\n").encode())
+
+    def _tabela_arrow(self, bloco: pd.DataFrame, quantidades: np.ndarray):
+        n_linhas, n_areas = len(bloco), len(self.areas)
+        cenarios = pa.DictionaryArray.from_arrays(np.repeat(np.arange(n_linhas, dtype=np.int32), n_areas),
+                                                  pa.array(bloco["cenario"].to_numpy(), pa.string()))
+        areas = pa.DictionaryArray.from_arrays(np.tile(np.arange(n_areas, dtype=np.int32), n_linhas),
+                                               pa.array(self.areas, pa.string()))
+        if self.formato == "csv":  # O escritor de CSV não aceita colunas de dicionário
+            cenarios, areas = cenarios.cast(pa.string()), areas.cast(pa.string())
+        return pa.table({
+            "cenario": cenarios,
+            "data": pa.array(np.repeat(bloco["data"].to_numpy().astype("datetime64[D]"), n_areas)),
+            "area": areas,
+            "quantidade_kg": pa.array(quantidades.round(1)),
+            "coleta_extra": pa.array(precisa_coleta_extra(quantidades)),
+        })
+
+    def escrever(self, bloco: pd.DataFrame, valores: np.ndarray) -> None:
+        quantidades = valores.ravel()
+        if pa is None:
+            n_areas = len(self.areas)
+            pd.DataFrame({
+                "cenario": np.repeat(bloco["cenario"].to_numpy(), n_areas),
+                "data": np.repeat(bloco["data"].to_numpy(), n_areas),
+                "area": np.tile(self.areas, len(bloco)),
+                "quantidade_kg": quantidades.round(1),
+                "coleta_extra": precisa_coleta_extra(quantidades),
+            }).to_csv(self.arquivo, header=False, index=False, date_format="%Y-%m-%d")
+            return
+        tabela = self._tabela_arrow(bloco, quantidades)
+        if self.formato == "parquet":
+            if self.escritor is None:
+                self.escritor = pq.ParquetWriter(self.arquivo, tabela.schema)
+            self.escritor.write_table(tabela)
+        else:
+            pacsv.write_csv(tabela, self.arquivo, pacsv.WriteOptions(include_header=False, quoting_style="none"))
+
+    def concluir(self) -> None:
+        if self.escritor is not None:
+            self.escritor.close()
+        self.arquivo.close()
+        os.replace(self.temporario, self.caminho)
+
+    def descartar(self) -> None:
+        self.arquivo.close()
+        if os.path.exists(self.temporario):
+            os.remove(self.temporario)
+
+
+@cronometrado("cenarios.avaliar")
+def avaliar_cenarios(previsor, origem: Union[str, pd.DataFrame], saida: Optional[str] = None,
+                     celulas_por_bloco: int = CENARIOS_CELULAS_POR_BLOCO) -> ResumoCenarios:
+    """
+    Avalia todos os cenários para todas as áreas do previsor.
+
+    Args:
+        previsor (LixoPrevisor): Previsor carregado, em qualquer modo.
+        origem (str ou pd.DataFrame): Cenários (ver o formato no início do módulo).
+        saida (str, optional): Arquivo .csv ou .parquet para as previsões detalhadas
+            (cenario, data, area, quantidade_kg, coleta_extra); None calcula só o resumo. Defaults to None.
+        celulas_por_bloco (int, optional): Previsões (linhas × áreas) calculadas por vez. Defaults to CENARIOS_CELULAS_POR_BLOCO.
+
+    Returns:
+        ResumoCenarios: Totais por cenário e vazão da avaliação.
+    """
+    inicio = time.perf_counter()
+    interceptos, coeficientes = previsor.parametros_por_area()
+    # Pesos (1 + features) × áreas: cada linha de cenário vezes W dá a previsão de todas as áreas
+    W = np.vstack([interceptos, coeficientes.T])
+    linhas_por_bloco = max(1, celulas_por_bloco // max(len(interceptos), 1))
+
+    escritor = _EscritorPrevisoes(saida, previsor.areas) if saida else None
+    parciais: List[pd.DataFrame] = []
+    linhas = 0
+    try:
+        for bloco in ler_cenarios(origem, linhas_por_bloco):
+            colunas = {"dia_semana": bloco["data"].dt.dayofweek.to_numpy(dtype=float),
+                       "chuva": bloco["chuva"].to_numpy(), "feriado": bloco["feriado"].to_numpy()}
+            colunas.update({f: valores.to_numpy() for f, valores in atributos_calendario(bloco["data"], FEATURES_CALENDARIO).items()})
+            X = np.column_stack([np.ones(len(bloco)), *(colunas[f] for f in FEATURES_AREA)])
+            valores = X @ W
+            if escritor is not None:
+                escritor.escrever(bloco, valores)
+            parciais.append(pd.DataFrame({
+                "cenario": bloco["cenario"].to_numpy(),
+                "dias": 1,
+                "total_kg": valores.sum(axis=1),
+                "coletas_extra": precisa_coleta_extra(valores).sum(axis=1),
+            }).groupby("cenario", sort=False).sum())
+            linhas += len(bloco)
+        if escritor is not None:
+            escritor.concluir()
+    except BaseException:
+        if escritor is not None:
+            escritor.descartar()
+        raise
+
+    if parciais:
+        por_cenario = pd.concat(parciais).groupby(level="cenario", sort=False).sum()
+    else:
+        por_cenario = pd.DataFrame(columns=["dias", "total_kg", "coletas_extra"]).rename_axis("cenario")
+    return ResumoCenarios(
+        cenarios=len(por_cenario),
+        linhas=linhas,
+        previsoes=linhas * len(interceptos),
+        segundos=time.perf_counter() - inicio,
+        por_cenario=por_cenario,
+        saida=saida,
+    )
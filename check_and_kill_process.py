@@ -1,19 +1,93 @@
+import os
+import re
+import signal
 import subprocess
+import sys
 
-def kill_process_on_port(port):
-    result = subprocess.run(['netstat', '-aon'], capture_output=True, text=True)
+
+def _find_pid_linux(port):
+    # /proc/net/tcp lists sockets as "local_address rem_address st ... inode", addresses in hex
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    local_port = int(fields[1].rsplit(":", 1)[1], 16)
+                    if local_port == port and fields[3] == "0A":  # 0A = LISTEN
+                        inodes.add(fields[9])
+        except OSError:
+            continue
+    if not inodes:
+        return None
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            for fd in os.listdir(f"/proc/{pid}/fd"):
+                target = os.readlink(f"/proc/{pid}/fd/{fd}")
+                if target.startswith("socket:[") and target[8:-1] in inodes:
+                    return int(pid)
+        except OSError:
+            continue  # Process exited or belongs to another user
+    return None
+
+
+def _find_pid_windows(port):
+    result = subprocess.run(['netstat', '-aon', '-p', 'TCP'], capture_output=True, text=True)
     for line in result.stdout.splitlines():
-        if f":{port}" in line:
-            parts = line.split()
-            if len(parts) >= 5:
-                pid = parts[-1]
-                print(f"Encontrado processo {pid} usando a porta {port}. Encerrando...")
-                subprocess.run(['taskkill', '/F', '/PID', pid])
-                return pid
+        parts = line.split()
+        if len(parts) >= 5 and parts[3] == "LISTENING" and re.search(rf":{port}$", parts[1]):
+            return int(parts[-1])
     return None
 
+
+def _find_pid_lsof(port):
+    try:
+        result = subprocess.run(['lsof', '-t', f'-iTCP:{port}', '-sTCP:LISTEN'], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    pids = result.stdout.split()
+    return int(pids[0]) if pids else None
+
+
+def find_pid_on_port(port):
+    """Return the PID of the process listening on the TCP port, or None."""
+    if sys.platform.startswith("linux"):
+        return _find_pid_linux(port)
+    if sys.platform == "win32":
+        return _find_pid_windows(port)
+    return _find_pid_lsof(port)
+
+
+def process_name(pid):
+    """Return the executable name of the process, or None if it cannot be determined."""
+    try:
+        if sys.platform.startswith("linux"):
+            with open(f"/proc/{pid}/comm") as f:
+                return f.read().strip()
+        if sys.platform == "win32":
+            result = subprocess.run(['tasklist', '/FI', f'PID eq {pid}', '/FO', 'CSV', '/NH'], capture_output=True, text=True)
+            return result.stdout.split(",")[0].strip('"') or None
+        result = subprocess.run(['ps', '-p', str(pid), '-o', 'comm='], capture_output=True, text=True)
+        return os.path.basename(result.stdout.strip()) or None
+    except OSError:
+        return None
+
+
+def kill_process_on_port(port):
+    pid = find_pid_on_port(port)
+    if pid is None:
+        return None
+    print(f"Encontrado processo {pid} usando a porta {port}. Encerrando...")
+    if sys.platform == "win32":
+        subprocess.run(['taskkill', '/F', '/PID', str(pid)])
+    else:
+        os.kill(pid, signal.SIGTERM)
+    return pid
+
+
 if __name__ == '__main__':
-    port = 11434
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 11434
     pid = kill_process_on_port(port)
     if pid:
         print(f"Processo {pid} encerrado na porta {port}.")
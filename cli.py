@@ -0,0 +1,314 @@
+"""
+Comandos de linha do previsor de coleta de lixo, sem a interface do Streamlit.
+
+    python cli.py treinar --dados lixo_mossoro.csv [--refazer]
+    python cli.py prever --inicio 2025-03-03 --dias 7 [--chuva] [--feriado] [--area Centro] [--formato csv]
+    python cli.py exportar --inicio 2025-03-03 --dias 30 [--formato parquet]
+    python cli.py planejar --inicio 2025-03-03 --dias 28 [--frota frota.csv | --caminhoes 4 --capacidade 2000]
+    python cli.py cenarios cenarios.csv [--saida previsoes.parquet] [--resumo por_cenario.csv]
+    python cli.py backtest [--modo area] [--horizonte 14] [--passo 7] [--janela 365] [--saida erros.csv]
+    python cli.py features [--saida features.parquet]
+
+Sem ``--feriado``, as previsões usam os feriados do calendário de Mossoró (ver ``calendario``).
+
+Com ``pip install .``, os mesmos comandos ficam disponíveis como ``cerebro-urbano``.
+
+Os nomes em inglês (``train``, ``forecast``, ``export``, ``plan``, ``scenarios``) também são aceitos.
+Cada comando importa só o que usa: ``--help`` não carrega pandas, e o
+scikit-learn só entra quando um modelo é treinado.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+from datetime import date, datetime
+from typing import List, Optional
+
+from config import (
+    BACKTEST_HORIZONTE,
+    BACKTEST_JANELA,
+    BACKTEST_PASSO,
+    BACKTEST_TREINO_MINIMO,
+    DIRETORIO_EXPORTACOES,
+    DIRETORIO_MODELOS,
+    MODO_PREVISAO,
+)
+
+
+def _data(texto: str) -> datetime:
+    try:
+        return datetime.fromisoformat(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida: {texto!r} (use AAAA-MM-DD)")
+
+
+def _positivo(texto: str) -> int:
+    valor = int(texto)
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"deve ser positivo: {texto}")
+    return valor
+
+
+def _feriado(args: argparse.Namespace) -> Optional[int]:
+    # --feriado marca todos os dias; sem ele, None deixa o previsor usar o calendário
+    return 1 if args.feriado else None
+
+
+def _carregar_previsor(args: argparse.Namespace):
+    from previsor import LixoPrevisor
+
+    # As mensagens da carga vão para stderr, para não misturar com a saída CSV/JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        return LixoPrevisor(args.dados, args.modelos, modo=args.modo)
+
+
+def comando_treinar(args: argparse.Namespace) -> int:
+    """Treina (ou reaproveita) o modelo e mostra as métricas do artefato."""
+    if args.refazer:
+        from artefatos import caminho_artefato
+
+        caminho = caminho_artefato(args.dados, args.modelos)
+        if os.path.exists(caminho):
+            os.remove(caminho)
+    previsor = _carregar_previsor(args)
+    metricas = previsor.artefato.metricas
+    print(f"Modelo {previsor.artefato.versao} ({len(previsor.areas)} áreas): "
+          f"MSE {metricas['mse']:.2f}, R² {metricas['r2']:.2f}")
+    return 0
+
+
+def comando_prever(args: argparse.Namespace) -> int:
+    """Prevê o período informado e escreve a tabela (áreas × dias) na saída padrão."""
+    previsor = _carregar_previsor(args)
+    previsoes = previsor.prever_dias_especificos(args.inicio, args.dias, int(args.chuva), _feriado(args))
+    tabela = previsoes.para_dataframe().round(1)
+    tabela.columns = [f"{data:%Y-%m-%d}" for data in tabela.columns]
+    if args.area:
+        desconhecidas = sorted(set(args.area) - set(tabela.index))
+        if desconhecidas:
+            print(f"Áreas desconhecidas: {', '.join(desconhecidas)}", file=sys.stderr)
+            return 2
+        tabela = tabela.loc[args.area]
+    if args.formato == "csv":
+        tabela.to_csv(sys.stdout, index_label="area")
+    elif args.formato == "json":
+        print(tabela.to_json(orient="index", force_ascii=False))
+    else:
+        print(tabela.to_string())
+    return 0
+
+
+def comando_exportar(args: argparse.Namespace) -> int:
+    """Exporta os PDFs por área e a tabela combinada, aguardando a exportação em lote terminar."""
+    from exportacao_lote import ExportadorLote
+
+    previsor = _carregar_previsor(args)
+    previsoes = previsor.prever_dias_especificos(args.inicio, args.dias, int(args.chuva), _feriado(args))
+    cenario = ", ".join(nome for nome, ativo in (("com chuva", args.chuva), ("com feriado", args.feriado)) if ativo)
+    exportador = ExportadorLote(args.diretorio, args.trabalhadores)
+    try:
+        exportacao = exportador.iniciar(previsoes.areas, previsor.tipo_area_por_area, previsoes.datas,
+                                        previsoes.valores, args.formato, cenario)
+        while exportacao.estado == "executando":
+            print(f"\rExportando: {exportacao.concluidos}/{exportacao.total}", end="", file=sys.stderr, flush=True)
+            time.sleep(0.2)
+        print(file=sys.stderr)
+    finally:
+        exportador.encerrar()
+    if exportacao.estado == "falhou":
+        print(f"Falha na exportação: {exportacao.erro}", file=sys.stderr)
+        return 1
+    print(f"{exportacao.total} arquivos ({exportacao.reaproveitados} reaproveitados do cache) "
+          f"em {exportacao.concluida_em - exportacao.iniciada_em:.1f} s")
+    for nome, caminho in exportacao.arquivos.items():
+        print(f"{nome}: {caminho}")
+    return 0
+
+
+def comando_cenarios(args: argparse.Namespace) -> int:
+    """Avalia um arquivo de cenários com chuva e feriado por dia e mostra a vazão e os cenários mais pesados."""
+    from cenarios import avaliar_cenarios
+
+    previsor = _carregar_previsor(args)
+    resumo = avaliar_cenarios(previsor, args.cenarios, args.saida)
+    print(f"{resumo.cenarios} cenários ({resumo.linhas} dias de cenário, {resumo.previsoes} previsões) "
+          f"em {resumo.segundos:.2f} s: {resumo.cenarios_por_segundo:,.0f} cenários/s")
+    if args.resumo:
+        resumo.por_cenario.to_csv(args.resumo)
+        print(f"Resumo por cenário: {args.resumo}")
+    if resumo.saida:
+        print(f"Previsões detalhadas: {resumo.saida}")
+    mais_pesados = resumo.por_cenario.sort_values("total_kg", ascending=False).head(args.mostrar)
+    if not mais_pesados.empty:
+        print(mais_pesados.round(0).to_string())
+    return 0
+
+
+def comando_planejar(args: argparse.Namespace) -> int:
+    """Monta o plano de coletas extras do período para todas as áreas, com a frota informada."""
+    import pandas as pd
+
+    from planejamento import frota_uniforme, planejar_coletas
+
+    frota = pd.read_csv(args.frota) if args.frota else frota_uniforme(args.caminhoes, args.capacidade, args.turnos)
+    previsor = _carregar_previsor(args)
+    previsoes = previsor.prever_dias_especificos(args.inicio, args.dias, int(args.chuva), _feriado(args))
+    inicio = time.perf_counter()
+    plano = planejar_coletas(previsoes.valores, previsoes.areas, previsoes.datas, frota)
+    duracao = time.perf_counter() - inicio
+    resumo = plano.resumo
+    print(f"{resumo['violacoes']} área-dias acima do limite ({resumo['excedente_kg']:.0f} kg excedentes): "
+          f"{resumo['paradas']} paradas em {resumo['turnos_usados']} turnos, {resumo['pendente_kg']:.0f} kg pendentes "
+          f"(plano calculado em {duracao * 1000:.1f} ms)")
+    if args.saida:
+        plano.agenda.to_csv(args.saida, index=False, date_format="%Y-%m-%d", float_format="%.1f")
+        print(f"Agenda: {args.saida}")
+    if args.pendentes and not plano.pendentes.empty:
+        plano.pendentes.to_csv(args.pendentes, index=False, date_format="%Y-%m-%d", float_format="%.1f")
+        print(f"Pendentes: {args.pendentes}")
+    return 0
+
+
+def comando_backtest(args: argparse.Namespace) -> int:
+    """Reajusta o modelo em cortes sucessivos do histórico e mostra o erro fora da amostra."""
+    from armazem_features import armazem_do_historico
+    from backtest import executar_backtest
+    from calendario import aplicar_calendario
+    from ingestao import carregar_historico
+    from previsao import FEATURES_CALENDARIO
+
+    with contextlib.redirect_stdout(sys.stderr):
+        dados, _ = carregar_historico(args.dados)
+    aplicar_calendario(dados)  # As mesmas features do treino do LixoPrevisor
+    armazem_do_historico(args.dados, dados).anexar(dados, FEATURES_CALENDARIO)
+    try:
+        resultado = executar_backtest(dados, args.modo, args.horizonte, args.passo, args.janela, args.treino_minimo,
+                                      processos=args.processos)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    geral = resultado.geral
+    janela = f"janela de {resultado.janela} dias" if resultado.janela else "janela expansiva"
+    print(f"{len(resultado.cortes)} cortes ({janela}, modo {resultado.modo}), {geral['avaliacoes']} previsões "
+          f"em {resultado.segundos:.2f} s")
+    print(f"MAE {geral['mae']:.1f} kg, MAPE {geral['mape']:.1f}%; coleta extra: acerto {geral['acerto_coleta_extra']:.1%}, "
+          f"precisão {geral['precisao_coleta_extra']:.1%}, revocação {geral['revocacao_coleta_extra']:.1%}")
+    if args.saida:
+        resultado.por_area_horizonte.to_csv(args.saida, index=False, float_format="%.2f")
+        print(f"Erros por área e horizonte: {args.saida}")
+    piores = resultado.por_area.sort_values("mae", ascending=False).head(args.mostrar)
+    if not piores.empty:
+        print(piores.round(2).to_string())
+    return 0
+
+
+def comando_features(args: argparse.Namespace) -> int:
+    """Materializa (ou reaproveita) o armazém de features do histórico e, opcionalmente, o exporta."""
+    from armazem_features import armazem_do_historico
+    from ingestao import carregar_historico
+
+    with contextlib.redirect_stdout(sys.stderr):
+        dados, _ = carregar_historico(args.dados)
+    inicio = time.perf_counter()
+    armazem = armazem_do_historico(args.dados, dados)
+    duracao = time.perf_counter() - inicio
+    if armazem.ultimo_dia is None:
+        print("Histórico vazio: nenhuma feature materializada", file=sys.stderr)
+        return 2
+    origens = {"disco": "lido do disco", "incremental": "só os dias novos calculados", "completo": "calculado do zero"}
+    print(f"{len(armazem.matriz)} coletas × {len(armazem.colunas)} features ({origens[armazem.origem]}) "
+          f"em {duracao:.2f} s; último dia: {armazem.ultimo_dia:%Y-%m-%d}")
+    if args.saida:
+        if args.saida.lower().endswith(".parquet"):
+            armazem.matriz.to_parquet(args.saida, index=False)
+        else:
+            armazem.matriz.to_csv(args.saida, index=False, date_format="%Y-%m-%d", float_format="%.1f")
+        print(f"Features: {args.saida}")
+    return 0
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    """
+    Monta o parser com os subcomandos ``treinar``, ``prever``, ``exportar``, ``planejar``, ``cenarios``, ``backtest`` e ``features``.
+
+    Returns:
+        argparse.ArgumentParser: Parser pronto para ``parse_args``.
+    """
+    parser = argparse.ArgumentParser(prog="cerebro-urbano", description="Previsão de coleta de lixo em Mossoró.")
+    comum = argparse.ArgumentParser(add_help=False)
+    comum.add_argument("--dados", default="lixo_mossoro.csv", help="CSV do histórico de coletas")
+    comum.add_argument("--modelos", default=DIRETORIO_MODELOS, help="diretório dos artefatos de modelo")
+    comum.add_argument("--modo", choices=["global", "area"], default=MODO_PREVISAO, help="um modelo global ou um modelo por área")
+    periodo = argparse.ArgumentParser(add_help=False)
+    periodo.add_argument("--inicio", type=_data, default=datetime.combine(date.today(), datetime.min.time()), help="primeiro dia (AAAA-MM-DD); padrão: hoje")
+    periodo.add_argument("--dias", type=_positivo, default=7)
+    periodo.add_argument("--chuva", action="store_true")
+    periodo.add_argument("--feriado", action="store_true", help="trata todos os dias como feriado; padrão: feriados do calendário")
+
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    treinar = subcomandos.add_parser("treinar", aliases=["train"], parents=[comum], help="treina ou reaproveita o modelo")
+    treinar.add_argument("--refazer", action="store_true", help="descarta o artefato salvo e treina de novo")
+    treinar.set_defaults(executar=comando_treinar)
+
+    prever = subcomandos.add_parser("prever", aliases=["forecast"], parents=[comum, periodo], help="prevê um período")
+    prever.add_argument("--area", action="append", help="limita a saída a esta área (pode repetir)")
+    prever.add_argument("--formato", choices=["tabela", "csv", "json"], default="tabela")
+    prever.set_defaults(executar=comando_prever)
+
+    exportar = subcomandos.add_parser("exportar", aliases=["export"], parents=[comum, periodo], help="exporta PDFs por área e a tabela combinada")
+    exportar.add_argument("--formato", choices=["csv", "parquet"], default="csv", help="formato da tabela combinada")
+    exportar.add_argument("--diretorio", default=DIRETORIO_EXPORTACOES)
+    exportar.add_argument("--trabalhadores", type=int, default=None, help="processos que renderizam os PDFs")
+    exportar.set_defaults(executar=comando_exportar)
+
+    planejar = subcomandos.add_parser("planejar", aliases=["plan"], parents=[comum, periodo],
+                                      help="planeja as coletas extras com a frota disponível")
+    planejar.add_argument("--frota", help="CSV com caminhao, capacidade_kg e, opcionalmente, turnos e data")
+    planejar.add_argument("--caminhoes", type=int, default=4, help="sem --frota: número de caminhões iguais")
+    planejar.add_argument("--capacidade", type=float, default=2000.0, help="sem --frota: kg por caminhão e turno")
+    planejar.add_argument("--turnos", type=int, default=1, help="sem --frota: turnos livres por caminhão e dia")
+    planejar.add_argument("--saida", help="arquivo CSV para a agenda")
+    planejar.add_argument("--pendentes", help="arquivo CSV para as área-dias não atendidas")
+    planejar.set_defaults(executar=comando_planejar)
+
+    cenarios = subcomandos.add_parser("cenarios", aliases=["scenarios"], parents=[comum],
+                                      help="avalia cenários com chuva e feriado por dia")
+    cenarios.add_argument("cenarios", help="CSV ou Parquet com cenario, data (AAAA-MM-DD) e, opcionalmente, chuva e feriado")
+    cenarios.add_argument("--saida", help="arquivo .csv ou .parquet para as previsões detalhadas")
+    cenarios.add_argument("--resumo", help="arquivo CSV para os totais por cenário")
+    cenarios.add_argument("--mostrar", type=int, default=5, help="cenários de maior total exibidos")
+    cenarios.set_defaults(executar=comando_cenarios)
+
+    backtest = subcomandos.add_parser("backtest", parents=[comum], help="mede o erro reajustando o modelo em cortes sucessivos")
+    backtest.add_argument("--horizonte", type=_positivo, default=BACKTEST_HORIZONTE, help="dias previstos após cada corte")
+    backtest.add_argument("--passo", type=_positivo, default=BACKTEST_PASSO, help="dias entre cortes")
+    backtest.add_argument("--janela", type=_positivo, default=BACKTEST_JANELA, help="dias de treino antes de cada corte; padrão: todo o histórico anterior")
+    backtest.add_argument("--treino-minimo", type=_positivo, default=BACKTEST_TREINO_MINIMO, help="dias de histórico antes do primeiro corte")
+    backtest.add_argument("--processos", type=_positivo, default=None, help="processos da avaliação; padrão: todos os núcleos")
+    backtest.add_argument("--saida", help="arquivo CSV para os erros por área e horizonte")
+    backtest.add_argument("--mostrar", type=int, default=5, help="áreas de maior erro exibidas")
+    backtest.set_defaults(executar=comando_backtest)
+
+    features = subcomandos.add_parser("features", parents=[comum], help="materializa as features de calendário e defasagens")
+    features.add_argument("--saida", help="arquivo .csv ou .parquet para a matriz de features")
+    features.set_defaults(executar=comando_features)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Ponto de entrada do comando ``cerebro-urbano``.
+
+    Args:
+        argv (List[str], optional): Argumentos sem o nome do programa; None usa ``sys.argv``. Defaults to None.
+
+    Returns:
+        int: Código de saída.
+    """
+    args = criar_parser().parse_args(argv)
+    return args.executar(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    LLM_MAX_TOKENS,
+    LLM_TAMANHO_POOL,
+    LLM_TEMPERATURA,
+    LLM_TENTATIVAS,
+    LLM_TIMEOUT_CONEXAO,
+    LLM_TIMEOUT_LEITURA,
+    OLLAMA_API_BASE,
+    OLLAMA_API_KEY,
+    OLLAMA_MODELO,
+)
+from metricas import registro
+
+
+@dataclass
+class MetricasResposta:
+    """
+    Medidas de uma resposta do LLM.
+
+    Attributes:
+        tempo_primeiro_token (float): Segundos até o primeiro token, ou None se nenhum token chegou.
+        duracao (float): Segundos totais da requisição.
+        tokens (int): Tokens gerados (informados pelo servidor ou contados pelos chunks recebidos).
+    """
+
+    tempo_primeiro_token: Optional[float]
+    duracao: float
+    tokens: int
+
+    @property
+    def tokens_por_segundo(self) -> float:
+        """Taxa de geração depois do primeiro token."""
+        geracao = self.duracao - (self.tempo_primeiro_token or 0.0)
+        return self.tokens / geracao if geracao > 0 else 0.0
+
+
+class RespostaStream:
+    """
+    Resposta em stream de uma única requisição.
+
+    Attributes:
+        metricas (MetricasResposta): Medidas desta requisição; None até a iteração terminar.
+    """
+
+    def __init__(self) -> None:
+        self.metricas: Optional[MetricasResposta] = None
+        self._pedacos: Iterator[str] = iter(())
+
+    def __iter__(self) -> Iterator[str]:
+        return self._pedacos
+
+
+class ClienteLLM:
+    """
+    Cliente reutilizável para a API de chat compatível com OpenAI do Ollama.
+
+    Mantém um pool de conexões keep-alive, com timeouts e novas tentativas
+    configuráveis, e registra o tempo até o primeiro token e os tokens por
+    segundo de cada requisição.
+
+    Attributes:
+        base_url (str): URL base da API (ex.: http://localhost:11435/v1).
+        modelo (str): Nome do modelo no Ollama.
+        timeout (tuple): Timeouts (conexão, leitura) em segundos.
+        metricas (deque): Métricas das últimas requisições, da mais antiga para a mais recente.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_API_BASE, chave: str = OLLAMA_API_KEY, modelo: str = OLLAMA_MODELO,
+                 timeout_conexao: float = LLM_TIMEOUT_CONEXAO, timeout_leitura: float = LLM_TIMEOUT_LEITURA,
+                 tentativas: int = LLM_TENTATIVAS, tamanho_pool: int = LLM_TAMANHO_POOL) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.modelo = modelo
+        self.timeout = (timeout_conexao, timeout_leitura)
+        self.metricas: deque = deque(maxlen=100)
+        self._sessao = requests.Session()
+        self._sessao.headers["Authorization"] = f"Bearer {chave}"
+        retry = Retry(
+            total=tentativas,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+        )
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=tamanho_pool, max_retries=retry)
+        self._sessao.mount("http://", adaptador)
+        self._sessao.mount("https://", adaptador)
+
+    def _corpo(self, mensagens: List[Dict[str, str]], max_tokens: int, temperatura: float, stream: bool) -> dict:
+        corpo = {
+            "model": self.modelo,
+            "messages": mensagens,
+            "max_tokens": max_tokens,
+            "temperature": temperatura,
+            "stream": stream,
+        }
+        if stream:
+            corpo["stream_options"] = {"include_usage": True}
+        return corpo
+
+    def conversar(self, mensagens: List[Dict[str, str]], max_tokens: int = LLM_MAX_TOKENS,
+                  temperatura: float = LLM_TEMPERATURA) -> str:
+        """
+        Envia o chat e espera a resposta completa.
+
+        Args:
+            mensagens (List[Dict[str, str]]): Mensagens no formato {"role", "content"}.
+            max_tokens (int, optional): Limite de tokens gerados. Defaults to LLM_MAX_TOKENS.
+            temperatura (float, optional): Temperatura de amostragem. Defaults to LLM_TEMPERATURA.
+
+        Returns:
+            str: Texto da resposta.
+        """
+        inicio = time.perf_counter()
+        resposta = self._sessao.post(f"{self.base_url}/chat/completions",
+                                     json=self._corpo(mensagens, max_tokens, temperatura, stream=False),
+                                     timeout=self.timeout)
+        resposta.raise_for_status()
+        conteudo = resposta.json()
+        duracao = time.perf_counter() - inicio
+        tokens = conteudo.get("usage", {}).get("completion_tokens", 0)
+        self._registrar(MetricasResposta(duracao, duracao, tokens))
+        return conteudo["choices"][0]["message"]["content"].strip()
+
+    def conversar_stream(self, mensagens: List[Dict[str, str]], max_tokens: int = LLM_MAX_TOKENS,
+                         temperatura: float = LLM_TEMPERATURA) -> RespostaStream:
+        """
+        Envia o chat e devolve os pedaços de texto à medida que são gerados.
+
+        As métricas ficam na própria resposta (``RespostaStream.metricas``)
+        quando a iteração termina (ou é fechada antes do fim), e não só no
+        histórico compartilhado ``metricas`` do cliente.
+
+        Args:
+            mensagens (List[Dict[str, str]]): Mensagens no formato {"role", "content"}.
+            max_tokens (int, optional): Limite de tokens gerados. Defaults to LLM_MAX_TOKENS.
+            temperatura (float, optional): Temperatura de amostragem. Defaults to LLM_TEMPERATURA.
+
+        Returns:
+            RespostaStream: Iterável com os pedaços de texto da resposta.
+        """
+        resultado = RespostaStream()
+        resultado._pedacos = self._gerar_stream(mensagens, max_tokens, temperatura, resultado)
+        return resultado
+
+    def _gerar_stream(self, mensagens: List[Dict[str, str]], max_tokens: int, temperatura: float,
+                      resultado: RespostaStream) -> Iterator[str]:
+        inicio = time.perf_counter()
+        primeiro_token = None
+        chunks = 0
+        tokens_informados = None
+        resposta = self._sessao.post(f"{self.base_url}/chat/completions",
+                                     json=self._corpo(mensagens, max_tokens, temperatura, stream=True),
+                                     timeout=self.timeout, stream=True)
+        try:
+            resposta.raise_for_status()
+            # Server-sent events são sempre UTF-8, mas o Ollama não informa o charset
+            # e o requests cairia no ISO-8859-1 ("Betânia" viraria "BetÃ¢nia")
+            resposta.encoding = "utf-8"
+            for linha in resposta.iter_lines(decode_unicode=True):
+                if not linha or not linha.startswith("data:"):
+                    continue
+                dados = linha[len("data:"):].strip()
+                if dados == "[DONE]":
+                    break
+                evento = json.loads(dados)
+                if evento.get("usage"):
+                    tokens_informados = evento["usage"].get("completion_tokens")
+                for escolha in evento.get("choices", []):
+                    texto = escolha.get("delta", {}).get("content")
+                    if texto:
+                        if primeiro_token is None:
+                            primeiro_token = time.perf_counter() - inicio
+                        chunks += 1
+                        yield texto
+        finally:
+            resposta.close()
+            tokens = tokens_informados if tokens_informados is not None else chunks
+            resultado.metricas = MetricasResposta(primeiro_token, time.perf_counter() - inicio, tokens)
+            self._registrar(resultado.metricas)
+
+    def _registrar(self, metricas: MetricasResposta) -> None:
+        self.metricas.append(metricas)
+        if registro.ativo:
+            registro.observar("llm.resposta", metricas.duracao, tokens=metricas.tokens, modelo=self.modelo)
+            if metricas.tempo_primeiro_token is not None:
+                registro.observar("llm.primeiro_token", metricas.tempo_primeiro_token, modelo=self.modelo)
+
+    def fechar(self) -> None:
+        """Fecha as conexões do pool."""
+        self._sessao.close()
@@ -1,3 +1,91 @@
 # config.py
 OLLAMA_API_BASE = "http://localhost:11435/v1"
-OLLAMA_API_KEY = "ollama"  # Não precisa de chave para Ollama local
\ No newline at end of file
+OLLAMA_API_KEY = "ollama"  # Não precisa de chave para Ollama local
+
+# Diretório onde os modelos treinados são salvos entre execuções
+DIRETORIO_MODELOS = "modelos"
+
+# Cache colunar (Parquet particionado por mês) do histórico de coletas
+DIRETORIO_CACHE_DADOS = "cache_dados"
+TAMANHO_CHUNK_CSV = 500_000  # Linhas lidas do CSV por vez
+
+# Validação do histórico (validacao.py): linhas rejeitadas vão para a quarentena com os motivos
+DIRETORIO_QUARENTENA = "quarentena"
+QUANTIDADE_MAXIMA_KG = 50_000  # Coletas diárias de uma área acima disso são tratadas como erro de digitação
+
+# Cenários de previsão guardados no cache LRU do dashboard (compartilhado entre sessões)
+CAPACIDADE_CACHE_PREVISOES = 512
+
+# Histórico do chat: mensagens guardadas por sessão e quantas são desenhadas por vez
+LIMITE_HISTORICO_CHAT = 200
+JANELA_CHAT = 20
+
+# Cliente do LLM (API compatível com OpenAI servida pelo Ollama)
+OLLAMA_MODELO = "deepscaler"
+LLM_TIMEOUT_CONEXAO = 3.05  # Segundos para abrir a conexão
+LLM_TIMEOUT_LEITURA = 60.0  # Segundos sem receber nenhum byte da resposta
+LLM_TENTATIVAS = 2  # Novas tentativas em falhas de conexão e respostas 502/503/504
+LLM_TAMANHO_POOL = 4  # Conexões keep-alive mantidas abertas
+LLM_MAX_TOKENS = 150
+LLM_TEMPERATURA = 0.7
+LLM_ORCAMENTO_CONTEXTO = 1500  # Tokens estimados do prompt inteiro (instruções, dados e conversa)
+LLM_ORCAMENTO_RESUMO = 200  # Tokens estimados do resumo das mensagens antigas
+
+# Cache em disco das respostas do assistente
+ARQUIVO_CACHE_RESPOSTAS = "cache_dados/respostas.sqlite3"
+CACHE_RESPOSTAS_TTL = 7 * 24 * 3600  # Segundos
+CACHE_RESPOSTAS_MAX_ITENS = 1000
+CACHE_RESPOSTAS_SIMILARIDADE = None  # Similaridade mínima para reaproveitar uma pergunta parecida (ex.: 0.85); None usa só acerto exato
+
+# Monitor em segundo plano do serviço do LLM
+MONITOR_LLM_INTERVALO = 15.0  # Segundos entre verificações enquanto o serviço responde
+MONITOR_LLM_BACKOFF_MAXIMO = 30.0  # Espera máxima entre verificações enquanto o serviço falha
+MONITOR_LLM_TIMEOUT = 2.0
+MONITOR_LLM_FALHAS_REINICIO = 3  # Verificações seguidas sem resposta antes de reiniciar um Ollama que ocupa a porta
+MONITOR_LLM_ESPERA_PORTA = 10.0  # Segundos esperando o Ollama encerrado liberar a porta antes de iniciar outro
+OLLAMA_AUTO_INICIAR = True  # Tentar iniciar "ollama serve" na porta de OLLAMA_API_BASE se nada estiver escutando
+
+# Serviço HTTP de previsões em lote (servico_previsao.py)
+SERVICO_PORTA = 8765
+SERVICO_TRABALHADORES = 4  # Threads que executam as previsões
+SERVICO_FILA_MAXIMA = 64  # Cenários aguardando execução antes de recusar pedidos com 503
+SERVICO_MAX_CONSULTAS = 256  # Consultas aceitas por requisição
+SERVICO_MAX_DIAS = 366  # Dias aceitos por consulta
+SERVICO_MAX_CORPO = 8 * 1024 * 1024  # Bytes aceitos no corpo de uma requisição; acima disso, 413
+
+# Modo de previsão: "global" (um modelo, áreas do mesmo tipo iguais) ou "area" (um modelo por área)
+MODO_PREVISAO = "global"
+MIN_AMOSTRAS_AREA = 30  # Áreas com menos linhas usam o modelo global
+PROCESSOS_TREINO = None  # Processos do treino por área; None usa todos os núcleos
+
+# Medição do tempo de cada etapa (metricas.py)
+METRICAS_ATIVAS = False
+METRICAS_PORTA = 9108  # Endpoint /metrics (Prometheus) iniciado pelo app quando as métricas estão ativas; None desativa
+ARQUIVO_LOG_METRICAS = None  # Arquivo de logs JSON das etapas (ex.: "cache_dados/metricas.jsonl"); None desativa
+
+# Exportação em lote (PDF por área e tabela combinada), com cache pelo conteúdo dos arquivos
+DIRETORIO_EXPORTACOES = "exportacoes"
+EXPORTACAO_TRABALHADORES = None  # Processos que renderizam os PDFs; None usa todos os núcleos
+EXPORTACAO_RETENCAO = 3600  # Segundos que uma exportação terminada continua consultável pelo id
+EXPORTACAO_MAXIMO_TERMINADAS = 100  # Exportações terminadas guardadas em memória; as mais antigas saem antes
+
+# Motor de cenários (cenarios.py)
+CENARIOS_CELULAS_POR_BLOCO = 2_000_000  # Previsões (dias de cenário × áreas) calculadas e escritas por vez
+
+# Planejamento de coletas extras (planejamento.py)
+LIMITE_COLETA_EXTRA = 700  # kg por dia acima dos quais a área precisa de coleta extra
+
+# Modelo do dashboard compartilhado pelas sessões (modelo_compartilhado.py)
+MODELO_VERIFICACAO_INTERVALO = 30.0  # Segundos entre verificações de mudança no CSV
+MODELO_RETREINO_INTERVALO = None  # Segundos entre retreinos forçados, mesmo sem mudança nos dados; None desativa
+
+# Backtest com origem móvel (backtest.py)
+BACKTEST_HORIZONTE = 14  # Dias previstos após cada corte
+BACKTEST_PASSO = 7  # Dias entre cortes
+BACKTEST_JANELA = None  # Dias de treino antes de cada corte (janela deslizante); None usa todo o histórico anterior
+BACKTEST_TREINO_MINIMO = 90  # Dias de histórico antes do primeiro corte
+
+# Armazém de features (armazem_features.py): defasagens e médias móveis por área, salvas por versão dos dados
+DIRETORIO_FEATURES = "cache_dados/features"
+FEATURES_DEFASAGENS = [1, 7, 14]  # Coleta da mesma área k dias antes (colunas lag_k)
+FEATURES_JANELAS = [7, 28]  # Média das coletas da área nos w dias anteriores (colunas media_w)
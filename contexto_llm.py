@@ -0,0 +1,142 @@
+import math
+import re
+from typing import Dict, List, Sequence
+
+import pandas as pd
+
+from agregados import Agregados
+from config import LIMITE_COLETA_EXTRA, LLM_ORCAMENTO_CONTEXTO, LLM_ORCAMENTO_RESUMO
+
+
+def estimar_tokens(texto: str) -> int:
+    """
+    Estimativa barata de tokens: cerca de 4 caracteres por token, mais o custo fixo da mensagem.
+
+    Args:
+        texto (str): Conteúdo da mensagem.
+
+    Returns:
+        int: Tokens estimados.
+    """
+    return math.ceil(len(texto) / 4) + 4
+
+
+def _primeira_frase(texto: str, limite: int) -> str:
+    frase = re.split(r"(?<=[.!?])\s", texto.strip(), maxsplit=1)[0]
+    return frase if len(frase) <= limite else frase[: limite - 1].rstrip() + "…"
+
+
+def resumo_estatistico(agregados: Agregados, max_areas: int = 10, dias_tendencia: int = 28) -> str:
+    """
+    Resumo compacto do histórico para dar ao assistente números reais.
+
+    Traz a média diária por área (as ``max_areas`` maiores), a tendência de cada
+    uma (últimos ``dias_tendencia`` dias contra os anteriores), os dias da semana
+    de maior produção e os maiores registros. É calculado a partir dos agregados
+    diários, sem passar pelo histórico bruto, e o tamanho não cresce com o histórico.
+
+    Args:
+        agregados (Agregados): Agregados do histórico (ver ``agregados``).
+        max_areas (int, optional): Áreas listadas. Defaults to 10.
+        dias_tendencia (int, optional): Tamanho da janela da tendência. Defaults to 28.
+
+    Returns:
+        str: Texto de poucas linhas com as estatísticas.
+    """
+    diario = agregados.tabela("dia")
+    if diario.empty:
+        return "Sem dados históricos."
+    inicio, fim = diario["inicio"].min(), diario["inicio"].max()
+    linhas = [f"Histórico de {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}, {agregados.registros} registros, {diario['area'].nunique()} áreas."]
+
+    def media_por_area(tabela: pd.DataFrame) -> pd.Series:
+        somas = tabela.groupby("area")[["soma", "contagem"]].sum()
+        return somas["soma"] / somas["contagem"]
+
+    medias = agregados.por_area()["media"].sort_values(ascending=False).head(max_areas)
+    recente = diario["inicio"] > fim - pd.Timedelta(days=dias_tendencia)
+    anterior = ~recente & (diario["inicio"] > fim - pd.Timedelta(days=2 * dias_tendencia))
+    tendencia = ((media_por_area(diario[recente]) / media_por_area(diario[anterior]) - 1) * 100).reindex(medias.index)
+    dias_extra = (diario["maximo"] > LIMITE_COLETA_EXTRA).groupby(diario["area"]).sum().reindex(medias.index)
+    linhas.append(f"Média diária por área (kg; tendência dos últimos {dias_tendencia} dias; dias acima de {LIMITE_COLETA_EXTRA} kg):")
+    for area, media in medias.items():
+        variacao = tendencia.get(area)
+        texto_tendencia = f"{variacao:+.0f}%" if pd.notna(variacao) else "sem dados"
+        linhas.append(f"- {area}: {media:.0f} kg ({texto_tendencia}; {int(dias_extra.get(area, 0))} dias)")
+
+    nomes_dias = ["segunda", "terça", "quarta", "quinta", "sexta", "sábado", "domingo"]
+    por_dia = diario.groupby(diario["inicio"].dt.dayofweek)[["soma", "contagem"]].sum()
+    por_dia = (por_dia["soma"] / por_dia["contagem"]).sort_values(ascending=False)
+    linhas.append("Dias da semana com mais lixo: " + ", ".join(f"{nomes_dias[d]} ({v:.0f} kg)" for d, v in por_dia.head(3).items()))
+    maiores = diario.nlargest(3, "maximo")
+    linhas.append("Maiores registros: " + "; ".join(
+        f"{linha.area} em {linha.inicio:%d/%m/%Y} ({linha.maximo:.0f} kg)" for linha in maiores.itertuples()))
+    return "\n".join(linhas)
+
+
+class ContextoConversa:
+    """
+    Monta o prompt do assistente dentro de um orçamento de tokens.
+
+    Mantém as mensagens mais recentes que cabem no orçamento e condensa as mais
+    antigas num resumo acumulado, que também tem tamanho limitado. O resumo é
+    atualizado de forma incremental: cada mensagem é condensada uma única vez,
+    mesmo que depois saia do histórico da sessão.
+
+    Attributes:
+        prompt_sistema (str): Instruções fixas do assistente.
+        orcamento_tokens (int): Tokens estimados máximos do prompt inteiro.
+        orcamento_resumo (int): Tokens estimados máximos do resumo da conversa.
+        resumo (list): Linhas do resumo das mensagens antigas, da mais antiga para a mais recente.
+        ultima_resumida (int): ``key_id`` da última mensagem incorporada ao resumo.
+    """
+
+    def __init__(self, prompt_sistema: str, orcamento_tokens: int = LLM_ORCAMENTO_CONTEXTO,
+                 orcamento_resumo: int = LLM_ORCAMENTO_RESUMO) -> None:
+        self.prompt_sistema = prompt_sistema
+        self.orcamento_tokens = orcamento_tokens
+        self.orcamento_resumo = orcamento_resumo
+        self.resumo: List[str] = []
+        self.ultima_resumida = 0
+
+    def _resumir(self, mensagens: Sequence[Dict]) -> None:
+        for msg in mensagens:
+            if msg["key_id"] <= self.ultima_resumida:
+                continue
+            autor = "Usuário perguntou" if msg["role"] == "user" else "Assistente respondeu"
+            self.resumo.append(f"{autor}: {_primeira_frase(msg['content'], 120)}")
+            self.ultima_resumida = msg["key_id"]
+        while self.resumo and estimar_tokens("\n".join(self.resumo)) > self.orcamento_resumo:
+            self.resumo.pop(0)
+
+    def montar(self, mensagens: Sequence[Dict], resumo_dados: str = "") -> List[Dict[str, str]]:
+        """
+        Monta a lista de mensagens a enviar ao LLM.
+
+        Args:
+            mensagens (Sequence[Dict]): Histórico do chat (``role``, ``content`` e ``key_id`` crescente), do mais antigo ao mais recente.
+            resumo_dados (str, optional): Resumo estatístico dos dados a incluir nas instruções. Defaults to "".
+
+        Returns:
+            List[Dict[str, str]]: Mensagem de sistema seguida das mensagens recentes que couberam.
+        """
+        mensagens = list(mensagens)
+        sistema = self.prompt_sistema
+        if resumo_dados:
+            sistema += f"\n\nDados atuais de coleta em Mossoró:\n{resumo_dados}"
+        disponivel = self.orcamento_tokens - estimar_tokens(sistema) - self.orcamento_resumo
+
+        # A mensagem mais recente (a pergunta atual) entra sempre
+        recentes: List[Dict] = []
+        for msg in reversed(mensagens):
+            custo = estimar_tokens(msg["content"])
+            if recentes and custo > disponivel:
+                break
+            recentes.append(msg)
+            disponivel -= custo
+        recentes.reverse()
+
+        self._resumir(mensagens[: len(mensagens) - len(recentes)])
+        if self.resumo:
+            sistema += "\n\nResumo da conversa anterior:\n" + "\n".join(self.resumo)
+        return [{"role": "system", "content": sistema}, *[{"role": m["role"], "content": m["content"]} for m in recentes]]
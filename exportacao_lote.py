@@ -0,0 +1,324 @@
+"""
+Exportação em lote: um PDF por área e uma tabela combinada de todas as áreas.
+
+O trabalho roda em segundo plano. Os PDFs são renderizados num pool de
+processos e a tabela combinada (CSV ou Parquet) é escrita em blocos direto no
+disco. Cada arquivo é guardado num cache endereçado pelo conteúdo (SHA-256 do
+que vai no arquivo), então um relatório que não mudou é reaproveitado em vez de
+ser gerado de novo.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DIRETORIO_EXPORTACOES,
+    EXPORTACAO_MAXIMO_TERMINADAS,
+    EXPORTACAO_RETENCAO,
+    EXPORTACAO_TRABALHADORES,
+    LIMITE_COLETA_EXTRA,
+)
+from metricas import span
+from planejamento import precisa_coleta_extra
+from relatorios import gerar_pdf, tabela_previsoes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Sem pyarrow, só a exportação em CSV fica disponível
+    pa = None
+    pq = None
+
+# Incrementar quando o layout dos arquivos mudar, para não reaproveitar relatórios antigos do cache
+VERSAO_RELATORIO = 1
+
+NOMES_DIAS = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+AREAS_POR_BLOCO = 256  # Áreas escritas por vez na tabela combinada
+
+
+@dataclass
+class ExportacaoLote:
+    """
+    Progresso e resultado de uma exportação em lote.
+
+    Attributes:
+        id (str): Identificador da exportação.
+        total (int): Arquivos a produzir (um PDF por área, mais a tabela combinada).
+        concluidos (int): Arquivos prontos até agora.
+        reaproveitados (int): Arquivos que vieram do cache.
+        estado (str): "executando", "concluida" ou "falhou".
+        erro (str): Mensagem de erro quando ``estado`` é "falhou".
+        arquivos (dict): Caminhos dos arquivos finais ("tabela" e "relatorios").
+        iniciada_em (float): Momento de início (epoch).
+        concluida_em (float): Momento de término (epoch), ou None.
+    """
+
+    id: str
+    total: int
+    concluidos: int = 0
+    reaproveitados: int = 0
+    estado: str = "executando"
+    erro: Optional[str] = None
+    arquivos: Dict[str, str] = field(default_factory=dict)
+    iniciada_em: float = field(default_factory=time.time)
+    concluida_em: Optional[float] = None
+
+    @property
+    def progresso(self) -> float:
+        """Fração concluída, entre 0 e 1."""
+        return self.concluidos / self.total if self.total else 1.0
+
+
+def rotulos_dias(datas: Sequence[datetime]) -> List[str]:
+    """
+    Rótulo de cada dia nos relatórios: data e dia da semana.
+
+    Args:
+        datas (Sequence[datetime]): Datas do período.
+
+    Returns:
+        List[str]: Rótulos como "03/03/2025 (Segunda)".
+    """
+    return [f"{data:%d/%m/%Y} ({NOMES_DIAS[data.weekday()]})" for data in datas]
+
+
+def _hash_conteudo(*partes) -> str:
+    # O limite de coleta extra muda o conteúdo dos relatórios, então também entra no hash
+    sha = hashlib.sha256(f"{VERSAO_RELATORIO}:{LIMITE_COLETA_EXTRA}".encode())
+    for parte in partes:
+        sha.update(parte if isinstance(parte, bytes) else json.dumps(parte, ensure_ascii=False, default=str).encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def _temporario(caminho: str) -> str:
+    # Único por chamada: duas exportações do mesmo conteúdo, em threads do mesmo processo, não disputam o arquivo
+    return f"{caminho}.{uuid.uuid4().hex}.tmp"
+
+
+def _escrever_pdf(caminho: str, titulo: str, periodo: str, dias: List[str], valores: np.ndarray) -> str:
+    # Executado nos processos do pool; grava num temporário para nunca deixar um PDF pela metade no cache
+    temporario = _temporario(caminho)
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(gerar_pdf(titulo, periodo, tabela_previsoes(dias, valores)))
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def escrever_tabela(caminho: str, areas: Sequence[str], tipos: Sequence[str], datas: Sequence[datetime],
+                    valores: np.ndarray, formato: str = "csv") -> str:
+    """
+    Escreve as previsões de todas as áreas em formato longo, um bloco de áreas por vez.
+
+    O arquivo nunca é montado inteiro na memória: cada bloco de ``AREAS_POR_BLOCO``
+    áreas vira um pedaço do CSV ou um row group do Parquet.
+
+    Args:
+        caminho (str): Arquivo de saída.
+        areas (Sequence[str]): Áreas, na ordem das linhas de ``valores``.
+        tipos (Sequence[str]): Tipo de cada área.
+        datas (Sequence[datetime]): Datas, na ordem das colunas de ``valores``.
+        valores (np.ndarray): Previsões com forma (n_areas, n_dias).
+        formato (str, optional): "csv" ou "parquet". Defaults to "csv".
+
+    Returns:
+        str: O próprio ``caminho``.
+    """
+    if formato == "parquet" and pq is None:
+        raise ValueError("Exportar em Parquet requer o pacote pyarrow.")
+    datas = pd.DatetimeIndex(datas)
+    n_dias = len(datas)
+    temporario = _temporario(caminho)
+    escritor = None
+    with open(temporario, "wb") as arquivo:
+        for inicio in range(0, len(areas), AREAS_POR_BLOCO):
+            bloco = slice(inicio, min(inicio + AREAS_POR_BLOCO, len(areas)))
+            quantidades = valores[bloco].ravel()
+            n_areas_bloco = bloco.stop - bloco.start
+            parte = pd.DataFrame({
+                "area": np.repeat(np.asarray(areas[bloco], dtype=object), n_dias),
+                "tipo_area": np.repeat(np.asarray(tipos[bloco], dtype=object), n_dias),
+                "data": np.tile(datas, n_areas_bloco),
+                "quantidade_kg": quantidades.round(1),
+                "coleta_extra": precisa_coleta_extra(quantidades),
+            })
+            if formato == "parquet":
+                tabela = pa.Table.from_pandas(parte, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(arquivo, tabela.schema)
+                escritor.write_table(tabela)
+            else:
+                parte.to_csv(arquivo, header=inicio == 0, index=False, date_format="%Y-%m-%d")
+        if escritor is not None:
+            escritor.close()
+    os.replace(temporario, caminho)
+    return caminho
+
+
+class ExportadorLote:
+    """
+    Executa exportações em lote em segundo plano, com cache endereçado pelo conteúdo.
+
+    O pool de processos é criado quando uma exportação precisa renderizar PDFs
+    e encerrado quando a última exportação em andamento termina, para não
+    manter processos ociosos durante toda a vida do processo. Se um PDF falhar,
+    os que ainda não começaram são cancelados.
+
+    As exportações terminadas ficam consultáveis por ``retencao`` segundos, e
+    no máximo ``maximo_terminadas`` delas; as excedentes são esquecidas (os
+    arquivos no disco continuam) quando uma nova exportação é iniciada.
+
+    Attributes:
+        diretorio (str): Diretório das exportações; o cache fica em ``<diretorio>/cache``.
+        trabalhadores (int): Processos que renderizam os PDFs.
+        retencao (float): Segundos que uma exportação terminada continua consultável.
+        maximo_terminadas (int): Exportações terminadas guardadas em memória.
+    """
+
+    def __init__(self, diretorio: str = DIRETORIO_EXPORTACOES, trabalhadores: Optional[int] = EXPORTACAO_TRABALHADORES,
+                 retencao: float = EXPORTACAO_RETENCAO, maximo_terminadas: int = EXPORTACAO_MAXIMO_TERMINADAS) -> None:
+        self.diretorio = diretorio
+        self.trabalhadores = trabalhadores or os.cpu_count() or 1
+        self.retencao = retencao
+        self.maximo_terminadas = maximo_terminadas
+        self.diretorio_cache = os.path.join(diretorio, "cache")
+        os.makedirs(self.diretorio_cache, exist_ok=True)
+        self._exportacoes: Dict[str, ExportacaoLote] = {}
+        self._pool: Optional[Executor] = None
+        self._em_andamento = 0
+        self._lock = threading.Lock()
+
+    def _obter_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.trabalhadores)
+            return self._pool
+
+    def _liberar_pool(self) -> None:
+        with self._lock:
+            self._em_andamento -= 1
+            if self._em_andamento == 0 and self._pool is not None:
+                # Os PDFs desta exportação já terminaram ou foram cancelados; nenhuma outra usa o pool
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _descartar_terminadas(self) -> None:
+        # Chamado com o lock: esquece as terminadas há mais de ``retencao`` e as mais antigas além do máximo
+        terminadas = sorted((e.concluida_em, e.id) for e in self._exportacoes.values() if e.concluida_em is not None)
+        limite = time.time() - self.retencao
+        excedentes = max(len(terminadas) - self.maximo_terminadas, 0)
+        for i, (concluida_em, id_exportacao) in enumerate(terminadas):
+            if i < excedentes or concluida_em < limite:
+                del self._exportacoes[id_exportacao]
+
+    def obter(self, id_exportacao: str) -> Optional[ExportacaoLote]:
+        """
+        Consulta uma exportação.
+
+        Args:
+            id_exportacao (str): Identificador retornado por ``iniciar``.
+
+        Returns:
+            Optional[ExportacaoLote]: A exportação, ou None se o identificador for desconhecido ou já tiver sido esquecido.
+        """
+        return self._exportacoes.get(id_exportacao)
+
+    def iniciar(self, areas: Sequence[str], tipos: Sequence[str], datas: Sequence[datetime], valores: np.ndarray,
+                formato: str = "csv", titulo_cenario: str = "") -> ExportacaoLote:
+        """
+        Inicia a exportação de todas as áreas e retorna imediatamente.
+
+        Args:
+            areas (Sequence[str]): Áreas, na ordem das linhas de ``valores``.
+            tipos (Sequence[str]): Tipo de cada área.
+            datas (Sequence[datetime]): Datas do período, na ordem das colunas de ``valores``.
+            valores (np.ndarray): Previsões com forma (n_areas, n_dias).
+            formato (str, optional): Formato da tabela combinada, "csv" ou "parquet". Defaults to "csv".
+            titulo_cenario (str, optional): Texto acrescentado ao período nos PDFs (ex.: "com chuva"). Defaults to "".
+
+        Returns:
+            ExportacaoLote: Exportação em andamento; acompanhe por ``progresso`` e ``estado``.
+        """
+        if formato not in ("csv", "parquet"):
+            raise ValueError(f"Formato desconhecido: {formato!r} (use 'csv' ou 'parquet')")
+        if formato == "parquet" and pq is None:
+            raise ValueError("Exportar em Parquet requer o pacote pyarrow.")
+        exportacao = ExportacaoLote(id=uuid.uuid4().hex[:12], total=len(areas) + 1)
+        with self._lock:
+            self._descartar_terminadas()
+            self._exportacoes[exportacao.id] = exportacao
+            self._em_andamento += 1
+        argumentos = (exportacao, list(areas), list(tipos), list(datas), np.asarray(valores), formato, titulo_cenario)
+        threading.Thread(target=self._executar, args=argumentos, name=f"exportacao-{exportacao.id}", daemon=True).start()
+        return exportacao
+
+    def _executar(self, exportacao: ExportacaoLote, areas: List[str], tipos: List[str], datas: List[datetime],
+                  valores: np.ndarray, formato: str, titulo_cenario: str) -> None:
+        futuros = []
+        try:
+            with span("exportacao.lote", areas=len(areas), dias=len(datas)):
+                dias = rotulos_dias(datas)
+                periodo = f"{datas[0]:%d/%m/%Y} a {datas[-1]:%d/%m/%Y}" if datas else ""
+                if titulo_cenario:
+                    periodo += f" ({titulo_cenario})"
+
+                # PDFs por área: os que já estão no cache não vão para o pool
+                pdfs = []
+                for area, tipo, linha in zip(areas, tipos, valores):
+                    titulo = f"Relatório de Previsões - {area} ({tipo})"
+                    caminho = os.path.join(self.diretorio_cache, f"{_hash_conteudo(titulo, periodo, dias, linha.tobytes())}.pdf")
+                    pdfs.append((area, caminho))
+                    if os.path.exists(caminho):
+                        exportacao.reaproveitados += 1
+                        exportacao.concluidos += 1
+                    else:
+                        futuros.append(self._obter_pool().submit(_escrever_pdf, caminho, titulo, periodo, dias, linha))
+
+                # A tabela combinada é escrita nesta thread enquanto o pool renderiza os PDFs
+                hash_tabela = _hash_conteudo(formato, areas, tipos, [str(d) for d in datas], valores.tobytes())
+                caminho_tabela = os.path.join(self.diretorio_cache, f"{hash_tabela}.{formato}")
+                if os.path.exists(caminho_tabela):
+                    exportacao.reaproveitados += 1
+                else:
+                    escrever_tabela(caminho_tabela, areas, tipos, datas, valores, formato)
+                exportacao.concluidos += 1
+
+                for futuro in as_completed(futuros):
+                    futuro.result()
+                    exportacao.concluidos += 1
+
+                destino = os.path.join(self.diretorio, exportacao.id)
+                os.makedirs(destino, exist_ok=True)
+                caminho_zip = os.path.join(destino, "relatorios.zip")
+                with zipfile.ZipFile(caminho_zip, "w", compression=zipfile.ZIP_STORED) as pacote:
+                    for area, caminho in pdfs:
+                        nome = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(area))
+                        pacote.write(caminho, f"relatorio_{nome}.pdf")
+                exportacao.arquivos = {"tabela": caminho_tabela, "relatorios": caminho_zip}
+                exportacao.estado = "concluida"
+        except Exception as e:
+            for futuro in futuros:
+                futuro.cancel()  # Os PDFs que ainda não começaram não são mais necessários
+            exportacao.erro = str(e)
+            exportacao.estado = "falhou"
+        finally:
+            exportacao.concluida_em = time.time()
+            self._liberar_pool()
+
+    def encerrar(self) -> None:
+        """Encerra o pool de processos agora, esperando os PDFs em renderização."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
@@ -0,0 +1,317 @@
+import json
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from artefatos import assinatura_arquivo, impressao_digital_arquivo
+from config import DIRETORIO_CACHE_DADOS, DIRETORIO_QUARENTENA, TAMANHO_CHUNK_CSV
+from metricas import cronometrado, registro
+from validacao import COLUNAS_OBRIGATORIAS, ValidadorHistorico, contar_motivos, validar_linhas
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Sem pyarrow, o histórico é lido do CSV em chunks a cada carga
+    pa = None
+    pq = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Incrementar sempre que o layout ou o conteúdo do cache mudar; caches de outra versão são refeitos.
+# Versão 2: só linhas aprovadas pela validação (ver validacao.py).
+VERSAO_CACHE = 2
+
+COLUNA_PARTICAO = "ano_mes"
+
+
+@dataclass
+class EstatisticasCarga:
+    """
+    Resumo de uma carga do histórico.
+
+    Attributes:
+        linhas (int): Número de linhas carregadas.
+        segundos (float): Tempo total da carga.
+        origem (str): "parquet" quando lido do cache, "csv" quando o CSV foi processado.
+        pico_rss_mb (float): Pico de memória residente do processo até o fim da carga, ou None se indisponível.
+        rejeitadas (int): Linhas do CSV recusadas pela validação.
+        quarentena (str): Arquivo com as linhas recusadas e os motivos, ou None.
+    """
+
+    linhas: int
+    segundos: float
+    origem: str
+    pico_rss_mb: Optional[float]
+    rejeitadas: int = 0
+    quarentena: Optional[str] = None
+
+    def __str__(self) -> str:
+        texto = f"{self.linhas} registros carregados de {self.origem} em {self.segundos:.2f}s"
+        if self.pico_rss_mb is not None:
+            texto += f" (pico de RSS: {self.pico_rss_mb:.0f} MB)"
+        if self.rejeitadas:
+            texto += f"; {self.rejeitadas} linhas rejeitadas" + (f" (ver {self.quarentena})" if self.quarentena else "")
+        return texto
+
+
+def pico_rss_mb() -> Optional[float]:
+    """
+    Pico de memória residente do processo, em MB.
+
+    Returns:
+        Optional[float]: Pico de RSS, ou None em plataformas sem o módulo ``resource``.
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+@cronometrado("ingestao.preparar_chunk")
+def preparar_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Valida um lote inteiro e converte para os tipos compactos, recusando o lote se alguma linha for inválida.
+
+    É o caminho de ``LixoPrevisor.atualizar``, onde quem envia o lote pode
+    corrigi-lo; o CSV do histórico passa por ``ValidadorHistorico``, que põe as
+    linhas inválidas em quarentena em vez de interromper a carga.
+
+    Args:
+        chunk (pd.DataFrame): Linhas com as colunas do CSV.
+
+    Returns:
+        pd.DataFrame: Chunk com as colunas de ``COLUNAS_OBRIGATORIAS`` e ``COLUNAS_OPCIONAIS`` tipadas.
+
+    Raises:
+        ValueError: Se faltar uma coluna obrigatória ou alguma linha for inválida (todas as regras são conferidas).
+    """
+    tipado, motivos = validar_linhas(chunk)
+    invalidas = np.flatnonzero(motivos)
+    if len(invalidas):
+        contagem = "; ".join(f"{texto}: {quantidade}" for texto, quantidade in contar_motivos(motivos).items())
+        exemplos = ", ".join(str(indice) for indice in chunk.index[invalidas[:5]])
+        raise ValueError(f"{len(invalidas)} linhas inválidas ({contagem}). Índices das primeiras: {exemplos}.")
+    return tipado
+
+
+def ler_csv_em_chunks(arquivo_dados: str, tamanho_chunk: int = TAMANHO_CHUNK_CSV,
+                      validador: Optional[ValidadorHistorico] = None):
+    """
+    Lê o CSV do histórico em chunks validados e já com os tipos compactos.
+
+    Args:
+        arquivo_dados (str): CSV com cabeçalho (data, area, quantidade_lixo, tipo_area[, chuva, feriado]).
+        tamanho_chunk (int, optional): Linhas por chunk. Defaults to TAMANHO_CHUNK_CSV.
+        validador (ValidadorHistorico, optional): Recebe as linhas rejeitadas; None só as descarta. Defaults to None.
+
+    Yields:
+        pd.DataFrame: Linhas aceitas, com ``area``/``tipo_area`` categóricas, ``data`` convertida e numéricos compactos.
+    """
+    validador = validador or ValidadorHistorico()
+    with pd.read_csv(arquivo_dados, dtype={"data": str, "area": str, "tipo_area": str}, chunksize=tamanho_chunk) as leitor:
+        for chunk in leitor:
+            yield validador.validar(chunk)
+
+
+def concatenar_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatena chunks mantendo as colunas categóricas como categóricas.
+
+    ``pd.concat`` converte para ``object`` colunas categóricas com categorias
+    diferentes, por isso as categorias são unificadas antes.
+
+    Args:
+        chunks (List[pd.DataFrame]): Chunks com as mesmas colunas.
+
+    Returns:
+        pd.DataFrame: DataFrame único com índice contínuo.
+    """
+    if not chunks:
+        return preparar_chunk(pd.DataFrame(columns=COLUNAS_OBRIGATORIAS))
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    categoricas = [col for col, tipo in chunks[0].dtypes.items() if isinstance(tipo, pd.CategoricalDtype)]
+    unificadas = {col: union_categoricals([chunk[col] for chunk in chunks]) for col in categoricas}
+    dados = pd.concat([chunk.drop(columns=categoricas) for chunk in chunks], ignore_index=True)
+    for col in categoricas:
+        dados[col] = unificadas[col]
+    return dados[chunks[0].columns]
+
+
+def diretorio_cache(arquivo_dados: str, diretorio: str = DIRETORIO_CACHE_DADOS) -> str:
+    """
+    Diretório do cache Parquet de um arquivo de dados.
+
+    Args:
+        arquivo_dados (str): CSV com os dados históricos.
+        diretorio (str, optional): Diretório raiz dos caches. Defaults to DIRETORIO_CACHE_DADOS.
+
+    Returns:
+        str: Caminho do dataset Parquet do arquivo.
+    """
+    return os.path.join(diretorio, os.path.splitext(os.path.basename(arquivo_dados))[0])
+
+
+def caminho_quarentena(arquivo_dados: str, diretorio: str = DIRETORIO_QUARENTENA) -> str:
+    """
+    Arquivo de quarentena de um arquivo de dados.
+
+    Args:
+        arquivo_dados (str): CSV com os dados históricos.
+        diretorio (str, optional): Diretório das quarentenas. Defaults to DIRETORIO_QUARENTENA.
+
+    Returns:
+        str: CSV com as linhas rejeitadas na última carga do arquivo.
+    """
+    return os.path.join(diretorio, f"{os.path.splitext(os.path.basename(arquivo_dados))[0]}_rejeitadas.csv")
+
+
+def _ler_manifesto(raiz: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(raiz, "_manifesto.json"), encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_valido(arquivo_dados: str, raiz: str) -> bool:
+    """
+    Verifica se o cache Parquet corresponde ao conteúdo atual do CSV.
+
+    Args:
+        arquivo_dados (str): CSV com os dados históricos.
+        raiz (str): Diretório do cache do arquivo.
+
+    Returns:
+        bool: True se o cache pode ser lido no lugar do CSV.
+    """
+    manifesto = _ler_manifesto(raiz)
+    if manifesto is None or manifesto.get("versao_cache") != VERSAO_CACHE:
+        return False
+    if manifesto.get("assinatura") == list(assinatura_arquivo(arquivo_dados)):
+        return True
+    return manifesto.get("impressao_digital") == impressao_digital_arquivo(arquivo_dados)
+
+
+def construir_cache(arquivo_dados: str, raiz: str, validador: ValidadorHistorico,
+                    tamanho_chunk: int = TAMANHO_CHUNK_CSV) -> pd.DataFrame:
+    """
+    Lê e valida o CSV em chunks e grava o cache Parquet particionado por mês.
+
+    O cache é montado num diretório temporário e só substitui o anterior quando
+    está completo, então uma carga interrompida nunca deixa um cache parcial.
+    O número de linhas rejeitadas fica no manifesto, para as cargas seguintes.
+
+    Args:
+        arquivo_dados (str): CSV com os dados históricos.
+        raiz (str): Diretório do cache do arquivo.
+        validador (ValidadorHistorico): Recebe as linhas rejeitadas; ``concluir`` é chamado pelo chamador.
+        tamanho_chunk (int, optional): Linhas por chunk. Defaults to TAMANHO_CHUNK_CSV.
+
+    Returns:
+        pd.DataFrame: Linhas aceitas do histórico, já com os tipos compactos.
+    """
+    temporario = f"{raiz}.{os.getpid()}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+    chunks = []
+    for i, chunk in enumerate(ler_csv_em_chunks(arquivo_dados, tamanho_chunk, validador)):
+        chunks.append(chunk)
+        particionado = chunk.assign(**{COLUNA_PARTICAO: chunk["data"].dt.strftime("%Y-%m")})
+        pq.write_to_dataset(
+            pa.Table.from_pandas(particionado, preserve_index=False),
+            temporario,
+            partition_cols=[COLUNA_PARTICAO],
+            basename_template=f"parte-{i:05d}-{{i}}.parquet",
+        )
+    dados = concatenar_chunks(chunks)
+    with open(os.path.join(temporario, "_manifesto.json"), "w", encoding="utf-8") as arquivo:
+        json.dump({
+            "versao_cache": VERSAO_CACHE,
+            "impressao_digital": impressao_digital_arquivo(arquivo_dados),
+            "assinatura": list(assinatura_arquivo(arquivo_dados)),
+            "linhas": len(dados),
+            "rejeitadas": validador.rejeitadas,
+            "quarentena": validador.quarentena,
+        }, arquivo)
+    antigo = f"{raiz}.{os.getpid()}.old"
+    if os.path.exists(raiz):
+        os.replace(raiz, antigo)
+    os.replace(temporario, raiz)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return dados
+
+
+def ler_cache(raiz: str, colunas: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Lê o cache Parquet com memory-map, opcionalmente só algumas colunas.
+
+    Args:
+        raiz (str): Diretório do cache do arquivo.
+        colunas (Sequence[str], optional): Colunas a ler. Defaults to None (todas).
+
+    Returns:
+        pd.DataFrame: Histórico lido do cache.
+    """
+    dados = pd.read_parquet(raiz, columns=list(colunas) if colunas is not None else None, memory_map=True)
+    return dados.drop(columns=[COLUNA_PARTICAO], errors="ignore")
+
+
+def carregar_historico(arquivo_dados: str, colunas: Optional[Sequence[str]] = None,
+                       diretorio: str = DIRETORIO_CACHE_DADOS,
+                       diretorio_quarentena: str = DIRETORIO_QUARENTENA) -> Tuple[pd.DataFrame, EstatisticasCarga]:
+    """
+    Carrega o histórico de coletas passando pelo cache Parquet.
+
+    Na primeira carga (ou quando o CSV mudou) o CSV é lido e validado em
+    chunks, as linhas inválidas vão para a quarentena e o cache é reconstruído;
+    nas seguintes, só o Parquet é lido. Sem pyarrow instalado, o CSV é sempre
+    lido e validado em chunks.
+
+    Args:
+        arquivo_dados (str): CSV com os dados históricos.
+        colunas (Sequence[str], optional): Colunas desejadas. Defaults to None (todas).
+        diretorio (str, optional): Diretório raiz dos caches. Defaults to DIRETORIO_CACHE_DADOS.
+        diretorio_quarentena (str, optional): Diretório das quarentenas. Defaults to DIRETORIO_QUARENTENA.
+
+    Returns:
+        Tuple[pd.DataFrame, EstatisticasCarga]: As linhas aceitas do histórico e as estatísticas da carga.
+    """
+    inicio = time.perf_counter()
+    raiz = diretorio_cache(arquivo_dados, diretorio)
+    if pq is not None and cache_valido(arquivo_dados, raiz):
+        manifesto = _ler_manifesto(raiz)
+        dados, origem = ler_cache(raiz, colunas), "parquet"
+        rejeitadas, quarentena = manifesto.get("rejeitadas", 0), manifesto.get("quarentena")
+    else:
+        validador = ValidadorHistorico(caminho_quarentena(arquivo_dados, diretorio_quarentena))
+        try:
+            if pq is None:
+                dados = concatenar_chunks(list(ler_csv_em_chunks(arquivo_dados, validador=validador)))
+            else:
+                dados = construir_cache(arquivo_dados, raiz, validador)
+        except BaseException:
+            validador.descartar()
+            raise
+        validador.concluir()
+        origem, rejeitadas, quarentena = "csv", validador.rejeitadas, validador.quarentena
+        if rejeitadas:
+            print(validador.resumo())
+    if colunas is not None:
+        dados = dados[list(colunas)]
+    estatisticas = EstatisticasCarga(len(dados), time.perf_counter() - inicio, origem, pico_rss_mb(),
+                                     rejeitadas, quarentena if rejeitadas else None)
+    if registro.ativo:
+        registro.observar(f"ingestao.carregar_{origem}", estatisticas.segundos, linhas=len(dados))
+    return dados, estatisticas
@@ -0,0 +1,265 @@
+"""
+Medição leve do tempo de cada etapa do app e do LixoPrevisor.
+
+Uso:
+
+    with span("grafico"):
+        ...
+
+    @cronometrado("previsor.prever_matriz")
+    def prever_matriz(...): ...
+
+As durações são agregadas em histogramas por etapa, registradas como logs JSON
+(logger ``metricas``) e exportadas no formato de texto do Prometheus. Com a
+coleta desativada (``METRICAS_ATIVAS = False``), ``span`` devolve um contexto
+vazio compartilhado e ``cronometrado`` só testa uma flag antes de chamar a
+função original.
+"""
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+
+from config import ARQUIVO_LOG_METRICAS, METRICAS_ATIVAS
+
+# Limites superiores dos buckets (segundos), de 0,1 ms a um minuto
+LIMITES_PADRAO = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger("metricas")
+_CONTEXTO_VAZIO = nullcontext()
+
+
+class Histograma:
+    """
+    Histograma cumulativo de durações, no modelo do Prometheus.
+
+    Attributes:
+        limites (tuple): Limites superiores dos buckets, em segundos.
+        contagens (list): Observações por bucket (não cumulativas); a última posição é o bucket +Inf.
+        soma (float): Soma das durações observadas.
+        n (int): Número de observações.
+        maximo (float): Maior duração observada.
+    """
+
+    def __init__(self, limites: Tuple[float, ...] = LIMITES_PADRAO) -> None:
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self.n = 0
+        self.maximo = 0.0
+
+    def observar(self, segundos: float) -> None:
+        """
+        Registra uma duração.
+
+        Args:
+            segundos (float): Duração observada.
+        """
+        self.contagens[bisect.bisect_left(self.limites, segundos)] += 1
+        self.soma += segundos
+        self.n += 1
+        self.maximo = max(self.maximo, segundos)
+
+    def quantil(self, q: float) -> float:
+        """
+        Estima um quantil por interpolação linear dentro do bucket, como ``histogram_quantile``.
+
+        Args:
+            q (float): Quantil entre 0 e 1.
+
+        Returns:
+            float: Duração estimada, em segundos (0.0 sem observações).
+        """
+        if self.n == 0:
+            return 0.0
+        alvo, acumulado = q * self.n, 0
+        for i, contagem in enumerate(self.contagens):
+            if acumulado + contagem >= alvo and contagem:
+                inferior = self.limites[i - 1] if i > 0 else 0.0
+                superior = self.limites[i] if i < len(self.limites) else self.maximo
+                return min(self.maximo, inferior + (superior - inferior) * (alvo - acumulado) / contagem)
+            acumulado += contagem
+        return self.maximo
+
+
+class RegistroMetricas:
+    """
+    Histogramas de duração por etapa, seguros para várias threads.
+
+    Attributes:
+        ativo (bool): Se False, ``span`` e ``cronometrado`` não medem nada.
+        histogramas (dict): Histograma de cada etapa.
+    """
+
+    def __init__(self, ativo: bool = METRICAS_ATIVAS) -> None:
+        self.ativo = ativo
+        self.histogramas: Dict[str, Histograma] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, etapa: str, segundos: float, **rotulos) -> None:
+        """
+        Registra a duração de uma etapa e emite o log JSON correspondente.
+
+        Args:
+            etapa (str): Nome da etapa.
+            segundos (float): Duração.
+            **rotulos: Informações extras incluídas só no log (ex.: ``origem="parquet"``).
+        """
+        with self._lock:
+            histograma = self.histogramas.get(etapa)
+            if histograma is None:
+                histograma = self.histogramas[etapa] = Histograma()
+            histograma.observar(segundos)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"evento": "span", "etapa": etapa, "segundos": round(segundos, 6),
+                                    "momento": time.time(), **rotulos}, ensure_ascii=False, default=str))
+
+    def resumo(self) -> List[Dict[str, float]]:
+        """
+        Resumo de cada etapa para exibição, ordenado pelo tempo total.
+
+        Returns:
+            List[Dict[str, float]]: Etapa, chamadas, total, média, p50, p95 e máximo (em ms).
+        """
+        with self._lock:
+            linhas = [{
+                "etapa": etapa,
+                "chamadas": h.n,
+                "total_ms": h.soma * 1000,
+                "media_ms": h.soma / h.n * 1000,
+                "p50_ms": h.quantil(0.5) * 1000,
+                "p95_ms": h.quantil(0.95) * 1000,
+                "max_ms": h.maximo * 1000,
+            } for etapa, h in self.histogramas.items() if h.n]
+        return sorted(linhas, key=lambda linha: linha["total_ms"], reverse=True)
+
+    def texto_prometheus(self) -> str:
+        """
+        Exporta os histogramas no formato de texto do Prometheus.
+
+        Returns:
+            str: Métrica ``lixo_etapa_duracao_segundos`` com um rótulo ``etapa`` por etapa.
+        """
+        nome = "lixo_etapa_duracao_segundos"
+        linhas = [f"# HELP {nome} Duração das etapas do app e do LixoPrevisor.", f"# TYPE {nome} histogram"]
+        with self._lock:
+            for etapa, h in sorted(self.histogramas.items()):
+                rotulo = etapa.replace("\\", "\\\\").replace('"', '\\"')
+                acumulado = 0
+                for limite, contagem in zip((*h.limites, float("inf")), h.contagens):
+                    acumulado += contagem
+                    le = "+Inf" if limite == float("inf") else repr(limite)
+                    linhas.append(f'{nome}_bucket{{etapa="{rotulo}",le="{le}"}} {acumulado}')
+                linhas.append(f'{nome}_sum{{etapa="{rotulo}"}} {h.soma!r}')
+                linhas.append(f'{nome}_count{{etapa="{rotulo}"}} {h.n}')
+        return "\n".join(linhas) + "\n"
+
+    def limpar(self) -> None:
+        """Descarta todas as observações."""
+        with self._lock:
+            self.histogramas.clear()
+
+
+registro = RegistroMetricas()
+
+if ARQUIVO_LOG_METRICAS:
+    os.makedirs(os.path.dirname(ARQUIVO_LOG_METRICAS) or ".", exist_ok=True)
+    _manipulador = logging.FileHandler(ARQUIVO_LOG_METRICAS, encoding="utf-8")
+    _manipulador.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_manipulador)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+@contextmanager
+def _medir(etapa: str, rotulos: Dict) -> None:
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro.observar(etapa, time.perf_counter() - inicio, **rotulos)
+
+
+def span(etapa: str, **rotulos) -> ContextManager:
+    """
+    Mede o bloco ``with`` como uma ocorrência da etapa.
+
+    Args:
+        etapa (str): Nome da etapa (ex.: "app.grafico").
+        **rotulos: Informações extras para o log JSON.
+
+    Returns:
+        ContextManager: Contexto que mede o bloco, ou um contexto vazio com a coleta desativada.
+    """
+    if not registro.ativo:
+        return _CONTEXTO_VAZIO
+    return _medir(etapa, rotulos)
+
+
+def cronometrado(etapa: str) -> Callable[[Callable], Callable]:
+    """
+    Decorador que mede cada chamada da função como uma ocorrência da etapa.
+
+    Args:
+        etapa (str): Nome da etapa.
+
+    Returns:
+        Callable: Decorador.
+    """
+    def decorador(funcao: Callable) -> Callable:
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not registro.ativo:
+                return funcao(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                registro.observar(etapa, time.perf_counter() - inicio)
+        return envolvida
+    return decorador
+
+
+class ManipuladorMetricas(BaseHTTPRequestHandler):
+    """Atende GET /metrics no formato de texto do Prometheus."""
+
+    def log_message(self, formato, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        conteudo = registro.texto_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+
+def iniciar_servidor_metricas(porta: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Inicia o endpoint /metrics numa thread em segundo plano.
+
+    Args:
+        porta (int): Porta local; 0 escolhe uma porta livre.
+        host (str, optional): Endereço de escuta. Defaults to "127.0.0.1".
+
+    Returns:
+        Optional[ThreadingHTTPServer]: Servidor em execução, ou None se a porta estiver ocupada.
+    """
+    try:
+        servidor = ThreadingHTTPServer((host, porta), ManipuladorMetricas)
+    except OSError as e:
+        print(f"Endpoint de métricas não iniciado na porta {porta}: {e}")
+        return None
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -0,0 +1,265 @@
+"""
+Modelo do dashboard compartilhado por todas as sessões do processo.
+
+Cada versão (``VersaoModelo``) é montada por completo fora do caminho das
+sessões e nunca é alterada depois de publicada. Publicar uma versão nova é
+trocar uma única referência, então os leitores não usam lock: ``atual`` devolve
+a versão publicada, e uma sessão que a guardou continua usando a mesma versão
+até o fim da execução, mesmo que outra seja publicada no meio. O lock só
+serializa quem constrói versões, e os leitores nunca esperam por um treino.
+
+Uma thread em segundo plano verifica o CSV a cada ``intervalo_verificacao``
+segundos e monta uma versão nova quando a assinatura do arquivo muda, quando
+passa ``intervalo_retreino`` desde a última ou quando ``solicitar_retreino`` é
+chamado. Se a montagem falhar, a versão anterior continua em uso e o erro fica
+em ``erro``.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agregados import Agregados
+from armazem_features import armazem_do_historico
+from artefatos import ArtefatoModelo, assinatura_arquivo
+from calendario import aplicar_calendario
+from config import DIRETORIO_MODELOS, MODELO_RETREINO_INTERVALO, MODELO_VERIFICACAO_INTERVALO, MODO_PREVISAO, PROCESSOS_TREINO
+from ingestao import EstatisticasCarga, carregar_historico
+from metricas import cronometrado
+from modelo_linear import CodificadorCategorias, ModeloLinear
+from previsao import FEATURES_CALENDARIO, prever_lote
+from registro_modelos import RegistroModelos
+from treino import carregar_ou_treinar, carregar_registro_treinado
+
+
+@dataclass(frozen=True)
+class VersaoModelo:
+    """
+    Modelo publicado, com tudo o que as sessões leem dos dados que o treinaram.
+
+    O histórico bruto não é guardado: as sessões só usam o modelo, os tipos de
+    área e os agregados.
+
+    Attributes:
+        numero (int): Ordem da versão no processo (1 para a primeira carga).
+        artefato (ArtefatoModelo): Artefato persistido do modelo.
+        modelo (ModeloLinear): Modelo reconstruído do artefato.
+        le (CodificadorCategorias): Codificador de ``tipo_area``.
+        registro (RegistroModelos): Modelos por área no modo "area", ou None no modo "global".
+        tipos_area (dict): Tipo de área de cada área.
+        agregados (Agregados): Agregados do histórico, para gráficos e estatísticas.
+        estatisticas_carga (EstatisticasCarga): Tempo, origem e memória da carga dos dados.
+        assinatura (tuple): (mtime, tamanho) do CSV lido.
+        origem (str): "disco" se o artefato salvo foi reaproveitado, "treino" se o modelo foi treinado.
+        motivo (str): Por que a versão foi montada ("inicio", "dados", "agenda" ou "pedido").
+        publicado_em (float): Momento da publicação (epoch).
+    """
+
+    numero: int
+    artefato: ArtefatoModelo
+    modelo: ModeloLinear
+    le: CodificadorCategorias
+    registro: Optional[RegistroModelos]
+    tipos_area: Dict[str, str]
+    agregados: Agregados
+    estatisticas_carga: EstatisticasCarga
+    assinatura: Tuple[int, int]
+    origem: str
+    motivo: str
+    publicado_em: float
+
+    @property
+    def idade(self) -> float:
+        """Segundos desde a publicação."""
+        return time.time() - self.publicado_em
+
+    def prever(self, areas: Sequence[str], dias_semana: np.ndarray, chuva=0, feriado=0,
+               calendario: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """
+        Prevê as áreas informadas com uma única chamada, pelo modelo da área no modo "area" ou pelo global.
+
+        Args:
+            areas (Sequence[str]): Áreas a prever, presentes em ``tipos_area``.
+            dias_semana (np.ndarray): Dia da semana (0 = segunda) de cada dia previsto.
+            chuva (int ou np.ndarray, optional): 0 para sem chuva, 1 para com chuva, ou um valor por dia. Defaults to 0.
+            feriado (int ou np.ndarray, optional): 0 para sem feriado, 1 para com feriado, ou um valor por dia. Defaults to 0.
+            calendario (Dict[str, np.ndarray], optional): Valor por dia de cada coluna de ``FEATURES_CALENDARIO``
+                (ver ``calendario.calendario_do_periodo``). Defaults to None (todas 0).
+
+        Returns:
+            np.ndarray: Previsões com forma (n_areas, n_dias), na ordem de ``areas``.
+        """
+        tipo_area_num = self.le.transform([self.tipos_area[area] for area in areas])
+        if self.registro is not None:
+            return self.registro.prever(areas, tipo_area_num, self.modelo, dias_semana, chuva, feriado, calendario)
+        return prever_lote(self.modelo, tipo_area_num, dias_semana, chuva, feriado, calendario)
+
+
+@cronometrado("modelo_compartilhado.construir")
+def construir_versao(caminho: str, diretorio_modelos: str = DIRETORIO_MODELOS, retreinar: bool = False,
+                     numero: int = 1, motivo: str = "inicio", modo: str = MODO_PREVISAO,
+                     processos_treino: Optional[int] = PROCESSOS_TREINO) -> VersaoModelo:
+    """
+    Carrega o histórico e monta uma versão do modelo.
+
+    Args:
+        caminho (str): CSV do histórico de coletas.
+        diretorio_modelos (str, optional): Diretório dos artefatos de modelo. Defaults to DIRETORIO_MODELOS.
+        retreinar (bool, optional): Treina mesmo que exista um artefato salvo do mesmo CSV. Defaults to False.
+        numero (int, optional): Número da versão. Defaults to 1.
+        motivo (str, optional): Motivo da montagem. Defaults to "inicio".
+        modo (str, optional): "global" ou "area" (com os modelos por área de ``registro_modelos``). Defaults to MODO_PREVISAO.
+        processos_treino (int, optional): Processos do treino por área; None usa todos os núcleos. Defaults to PROCESSOS_TREINO.
+
+    Returns:
+        VersaoModelo: Versão pronta para publicar.
+    """
+    # A assinatura é lida antes dos dados: se o CSV mudar durante a carga, a próxima verificação monta outra versão
+    assinatura = assinatura_arquivo(caminho)
+    # Leitura em chunks com tipos compactos, passando pelo cache Parquet (ver ingestao.py)
+    dados, estatisticas_carga = carregar_historico(caminho)
+    aplicar_calendario(dados)
+    # Véspera e dia seguinte de feriado vêm do armazém de features, como no LixoPrevisor
+    armazem_do_historico(caminho, dados).anexar(dados, FEATURES_CALENDARIO)
+
+    treinado = carregar_ou_treinar(dados, caminho, diretorio_modelos, retreinar)
+    registro = None
+    if modo == "area":
+        registro, _ = carregar_registro_treinado(dados, caminho, diretorio_modelos, processos_treino)
+
+    return VersaoModelo(
+        numero=numero,
+        artefato=treinado.artefato,
+        modelo=treinado.modelo,
+        le=treinado.le,
+        registro=registro,
+        tipos_area=dados.drop_duplicates("area").set_index("area")["tipo_area"].astype(str).to_dict(),
+        agregados=Agregados.de_dados(dados),
+        estatisticas_carga=estatisticas_carga,
+        assinatura=assinatura,
+        origem=treinado.origem,
+        motivo=motivo,
+        publicado_em=time.time(),
+    )
+
+
+class ModeloCompartilhado:
+    """
+    Guarda a versão do modelo em uso no processo e a substitui em segundo plano.
+
+    Attributes:
+        caminho (str): CSV do histórico de coletas.
+        diretorio_modelos (str): Diretório dos artefatos de modelo.
+        modo (str): "global" ou "area", repassado a ``construir_versao``.
+        intervalo_verificacao (float): Segundos entre verificações do CSV.
+        intervalo_retreino (float): Segundos entre retreinos forçados, ou None.
+        erro (str): Falha da última tentativa de montar uma versão, ou None.
+        treinando (bool): True enquanto uma versão nova está sendo montada.
+    """
+
+    def __init__(self, caminho: str, diretorio_modelos: str = DIRETORIO_MODELOS,
+                 intervalo_verificacao: float = MODELO_VERIFICACAO_INTERVALO,
+                 intervalo_retreino: Optional[float] = MODELO_RETREINO_INTERVALO, modo: str = MODO_PREVISAO) -> None:
+        if modo not in ("global", "area"):
+            raise ValueError(f"Modo de previsão desconhecido: {modo!r} (use 'global' ou 'area')")
+        self.caminho = caminho
+        self.diretorio_modelos = diretorio_modelos
+        self.modo = modo
+        self.intervalo_verificacao = intervalo_verificacao
+        self.intervalo_retreino = intervalo_retreino
+        self.erro: Optional[str] = None
+        self.treinando = False
+        self._atual: Optional[VersaoModelo] = None
+        self._lock = threading.Lock()  # Só entre construtores; leitores não o usam
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._retreino_pedido = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def atual(self) -> Optional[VersaoModelo]:
+        """Versão publicada, ou None antes da primeira carga. Guarde-a numa variável para usá-la do começo ao fim."""
+        return self._atual
+
+    def _motivo(self) -> Optional[str]:
+        if self._retreino_pedido:
+            return "pedido"
+        if assinatura_arquivo(self.caminho) != self._atual.assinatura:
+            return "dados"
+        if self.intervalo_retreino is not None and self._atual.idade >= self.intervalo_retreino:
+            return "agenda"
+        return None
+
+    def atualizar(self, motivo: Optional[str] = None) -> Optional[VersaoModelo]:
+        """
+        Monta e publica uma versão nova se houver motivo, sem interromper quem lê a atual.
+
+        Args:
+            motivo (str, optional): Força a montagem com este motivo; None verifica o CSV e a agenda. Defaults to None.
+
+        Returns:
+            VersaoModelo: A versão publicada, ou None se não havia motivo.
+        """
+        with self._lock:
+            anterior = self._atual
+            if anterior is None:
+                motivo = "inicio"
+            elif motivo is None:
+                motivo = self._motivo()
+                if motivo is None:
+                    return None
+            self._retreino_pedido = False
+            self.treinando = True
+            try:
+                nova = construir_versao(self.caminho, self.diretorio_modelos, retreinar=motivo in ("agenda", "pedido"),
+                                        numero=1 if anterior is None else anterior.numero + 1, motivo=motivo,
+                                        modo=self.modo)
+            finally:
+                self.treinando = False
+            self._atual = nova  # Troca atômica: leitores veem a versão anterior ou a nova, nunca uma mistura
+            self.erro = None
+            return nova
+
+    def solicitar_retreino(self) -> None:
+        """Pede à thread um retreino imediato, mesmo sem mudança nos dados."""
+        self._retreino_pedido = True
+        self._acordar.set()
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo_verificacao)
+            self._acordar.clear()
+            if self._parar.is_set():
+                return
+            try:
+                self.atualizar()
+            except Exception as e:
+                # A versão anterior continua publicada; a próxima verificação tenta de novo
+                self.erro = f"{type(e).__name__}: {e}"
+
+    def iniciar(self) -> "ModeloCompartilhado":
+        """
+        Carrega a primeira versão (se ainda não houver uma) e inicia a thread de atualização.
+
+        Returns:
+            ModeloCompartilhado: O próprio objeto.
+
+        Raises:
+            ValueError: Se o CSV for inválido na primeira carga.
+        """
+        if self._atual is None:
+            self.atualizar()
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="modelo-compartilhado", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        """Encerra a thread de atualização (um treino em andamento termina antes)."""
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,114 @@
+"""
+Modelo linear e codificador de categorias em numpy, sem o scikit-learn.
+
+O caminho de previsão (artefato salvo → ``prever_lote``) só precisa de
+``coef_``, ``intercept_`` e das classes de ``tipo_area``. Estas classes têm os
+mesmos atributos do ``LinearRegression`` e do ``LabelEncoder``, então carregar
+um modelo salvo não importa o scikit-learn, que fica restrito ao treino.
+"""
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class ModeloLinear:
+    """
+    Regressão linear já ajustada, com a interface de previsão do ``LinearRegression``.
+
+    Attributes:
+        coef_ (np.ndarray): Coeficientes, na ordem de ``feature_names_in_``.
+        intercept_ (float): Intercepto.
+        feature_names_in_ (np.ndarray): Nomes das features.
+        n_features_in_ (int): Número de features.
+    """
+
+    def __init__(self, coeficientes: Sequence[float], intercepto: float, features: Sequence[str]) -> None:
+        self.coef_ = np.asarray(coeficientes, dtype=np.float64)
+        self.intercept_ = float(intercepto)
+        self.feature_names_in_ = np.array(features, dtype=object)
+        self.n_features_in_ = len(features)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Aplica o modelo às linhas de ``X``.
+
+        Args:
+            X (pd.DataFrame ou np.ndarray): Features; um DataFrame é reordenado pelas colunas de ``feature_names_in_``.
+
+        Returns:
+            np.ndarray: Uma previsão por linha.
+        """
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)]
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+class CodificadorCategorias:
+    """
+    Codifica categorias como inteiros pela posição nas classes ordenadas, como o ``LabelEncoder``.
+
+    Attributes:
+        classes_ (np.ndarray): Categorias conhecidas, em ordem crescente.
+    """
+
+    def __init__(self, classes: Sequence[str] = ()) -> None:
+        self.classes_ = np.array(sorted(classes), dtype=object)
+
+    def fit(self, valores) -> "CodificadorCategorias":
+        """
+        Define as classes a partir dos valores.
+
+        Args:
+            valores (array-like): Categorias observadas.
+
+        Returns:
+            CodificadorCategorias: O próprio codificador.
+        """
+        self.classes_ = np.array(sorted(pd.unique(np.asarray(valores, dtype=object))), dtype=object)
+        return self
+
+    def transform(self, valores) -> np.ndarray:
+        """
+        Converte categorias em códigos.
+
+        Args:
+            valores (array-like): Categorias a codificar.
+
+        Returns:
+            np.ndarray: Código de cada valor.
+
+        Raises:
+            ValueError: Se algum valor não estiver em ``classes_``.
+        """
+        valores = np.asarray(valores, dtype=object)
+        codigos = np.searchsorted(self.classes_, valores)
+        validos = codigos < len(self.classes_)
+        if not (validos.all() and (self.classes_[codigos] == valores).all()):
+            desconhecidos = np.setdiff1d(valores.astype(str), self.classes_.astype(str))
+            raise ValueError(f"Categorias desconhecidas: {', '.join(desconhecidos)}")
+        return codigos
+
+    def fit_transform(self, valores) -> np.ndarray:
+        """
+        Define as classes e codifica os mesmos valores.
+
+        Args:
+            valores (array-like): Categorias observadas.
+
+        Returns:
+            np.ndarray: Código de cada valor.
+        """
+        return self.fit(valores).transform(valores)
+
+    def inverse_transform(self, codigos) -> np.ndarray:
+        """
+        Converte códigos de volta em categorias.
+
+        Args:
+            codigos (array-like): Códigos gerados por ``transform``.
+
+        Returns:
+            np.ndarray: Categoria de cada código.
+        """
+        return self.classes_[np.asarray(codigos, dtype=np.int64)]
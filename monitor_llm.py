@@ -0,0 +1,182 @@
+import logging
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+
+import check_and_kill_process
+from config import (
+    MONITOR_LLM_BACKOFF_MAXIMO,
+    MONITOR_LLM_ESPERA_PORTA,
+    MONITOR_LLM_FALHAS_REINICIO,
+    MONITOR_LLM_INTERVALO,
+    MONITOR_LLM_TIMEOUT,
+    OLLAMA_API_BASE,
+    OLLAMA_AUTO_INICIAR,
+)
+
+logger = logging.getLogger("monitor_llm")
+
+
+@dataclass
+class EstadoLLM:
+    """
+    Último estado conhecido do backend do LLM.
+
+    Attributes:
+        pronto (bool): True se a última verificação respondeu com sucesso.
+        verificado_em (float): Momento da última verificação (epoch), ou None antes da primeira.
+        erro (str): Descrição da última falha, ou None.
+        falhas_seguidas (int): Verificações com falha desde o último sucesso.
+    """
+
+    pronto: bool = False
+    verificado_em: Optional[float] = None
+    erro: Optional[str] = None
+    falhas_seguidas: int = 0
+
+
+class MonitorLLM:
+    """
+    Verifica em segundo plano se a API do LLM está respondendo.
+
+    Uma thread consulta ``{base_url}/models`` (o mesmo endereço usado pelo chat)
+    a cada ``intervalo`` segundos enquanto o serviço responde, e com espera
+    exponencial até ``backoff_maximo`` enquanto falha. O resultado fica em
+    ``estado``, que pode ser lido a qualquer momento sem bloquear.
+
+    Se ``auto_iniciar`` estiver ativo e ninguém estiver escutando na porta, o
+    monitor tenta iniciar ``ollama serve`` nela. Um processo ``ollama`` que
+    ocupa a porta só é encerrado e reiniciado depois de ``falhas_reinicio``
+    verificações seguidas sem resposta: um servidor ocupado gerando uma
+    resposta longa pode perder uma verificação sem estar travado. O novo
+    servidor só é iniciado quando o antigo libera a porta (até
+    ``espera_porta`` segundos). Há uma tentativa por queda: depois de uma
+    verificação bem-sucedida, uma nova queda é tratada do mesmo jeito.
+
+    Attributes:
+        base_url (str): URL base da API compatível com OpenAI.
+        falhas_reinicio (int): Falhas seguidas antes de reiniciar o Ollama que ocupa a porta.
+        espera_porta (float): Segundos esperando a porta ser liberada pelo Ollama encerrado.
+        estado (EstadoLLM): Último estado conhecido.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_API_BASE, intervalo: float = MONITOR_LLM_INTERVALO,
+                 backoff_maximo: float = MONITOR_LLM_BACKOFF_MAXIMO, timeout: float = MONITOR_LLM_TIMEOUT,
+                 auto_iniciar: bool = OLLAMA_AUTO_INICIAR, falhas_reinicio: int = MONITOR_LLM_FALHAS_REINICIO,
+                 espera_porta: float = MONITOR_LLM_ESPERA_PORTA) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.intervalo = intervalo
+        self.backoff_maximo = backoff_maximo
+        self.timeout = timeout
+        self.auto_iniciar = auto_iniciar
+        self.falhas_reinicio = falhas_reinicio
+        self.espera_porta = espera_porta
+        self.estado = EstadoLLM()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._tentou_iniciar = False
+        self._sessao = requests.Session()
+
+    @property
+    def pronto(self) -> bool:
+        """True se a última verificação teve sucesso."""
+        return self.estado.pronto
+
+    @property
+    def porta(self) -> int:
+        """Porta TCP da API, extraída de ``base_url``."""
+        url = urlparse(self.base_url)
+        return url.port or (443 if url.scheme == "https" else 80)
+
+    def verificar(self) -> EstadoLLM:
+        """
+        Faz uma verificação imediata e atualiza ``estado``.
+
+        Returns:
+            EstadoLLM: O novo estado.
+        """
+        erro = None
+        try:
+            resposta = self._sessao.get(f"{self.base_url}/models", timeout=self.timeout)
+            if resposta.status_code != 200:
+                erro = f"HTTP {resposta.status_code} em {self.base_url}/models"
+        except requests.RequestException as e:
+            erro = f"{type(e).__name__}: sem resposta de {self.base_url}"
+        anterior = self.estado
+        # Substitui o objeto inteiro para que leitores nunca vejam um estado pela metade
+        self.estado = EstadoLLM(
+            pronto=erro is None,
+            verificado_em=time.time(),
+            erro=erro,
+            falhas_seguidas=0 if erro is None else anterior.falhas_seguidas + 1,
+        )
+        return self.estado
+
+    def _iniciar_ollama(self, falhas_seguidas: int) -> None:
+        pid = check_and_kill_process.find_pid_on_port(self.porta)
+        if pid is not None:
+            if not (check_and_kill_process.process_name(pid) or "").lower().startswith("ollama"):
+                self._tentou_iniciar = True
+                return  # A porta é de outro programa; não mexer
+            if falhas_seguidas < self.falhas_reinicio:
+                return  # Pode estar só ocupado; verificar de novo antes de encerrar
+            logger.warning("Ollama (PID %s) sem resposta em %d verificações seguidas; reiniciando na porta %d",
+                           pid, falhas_seguidas, self.porta)
+            check_and_kill_process.kill_process_on_port(self.porta)
+            if not self._aguardar_porta_livre():
+                # O SIGTERM ainda não fez efeito; a próxima verificação com falha tenta de novo
+                logger.error("A porta %d continua ocupada %.0f s depois de encerrar o Ollama", self.porta, self.espera_porta)
+                return
+        else:
+            logger.info("Nenhum processo na porta %d; iniciando o Ollama", self.porta)
+        self._tentou_iniciar = True
+        host = urlparse(self.base_url).hostname or "127.0.0.1"
+        try:
+            subprocess.Popen(["ollama", "serve"], env={**os.environ, "OLLAMA_HOST": f"{host}:{self.porta}"},
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            logger.error("Não foi possível iniciar o Ollama: %s", e)
+
+    def _aguardar_porta_livre(self) -> bool:
+        limite = time.monotonic() + self.espera_porta
+        while check_and_kill_process.find_pid_on_port(self.porta) is not None:
+            if time.monotonic() >= limite or self._parar.wait(0.1):
+                return False
+        return True
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            estado = self.verificar()
+            if estado.pronto:
+                self._tentou_iniciar = False  # Uma queda futura pode reiniciar o Ollama de novo
+                espera = self.intervalo
+            else:
+                if self.auto_iniciar and not self._tentou_iniciar:
+                    self._iniciar_ollama(estado.falhas_seguidas)
+                espera = min(self.backoff_maximo, 0.5 * 2 ** (estado.falhas_seguidas - 1))
+            self._parar.wait(espera)
+
+    def iniciar(self) -> "MonitorLLM":
+        """
+        Inicia a thread de verificação (se ainda não estiver rodando).
+
+        Returns:
+            MonitorLLM: O próprio monitor.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="monitor-llm", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        """Encerra a thread de verificação."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + 1)
@@ -0,0 +1,218 @@
+"""
+Planejamento de coletas extras a partir da matriz de previsões (áreas × dias).
+
+Uma área precisa de coleta extra no dia em que a previsão passa de
+``LIMITE_COLETA_EXTRA``; o excedente é o que a coleta regular não leva. As
+coletas extras são feitas pelos turnos livres da frota, e cada turno recolhe
+excedentes de uma ou mais áreas até a capacidade do caminhão.
+
+O plano do horizonte inteiro é calculado de uma vez, sem laços em Python. Em
+cada dia, os excedentes (do maior para o menor) e os turnos (do maior caminhão
+para o menor) são enfileirados e preenchidos em ordem: o total recolhido no
+dia é o máximo possível (o menor entre excedente e capacidade), as áreas mais
+críticas são atendidas primeiro, o menor número de turnos é usado e, no
+máximo, uma área por turno é dividida entre dois caminhões.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config import LIMITE_COLETA_EXTRA
+
+COLUNAS_FROTA = ["caminhao", "capacidade_kg"]
+# Paradas abaixo disso são resíduo de arredondamento entre intervalos que terminam no mesmo ponto
+TOLERANCIA_KG = 1e-6
+
+
+def precisa_coleta_extra(valores: np.ndarray, limite: float = LIMITE_COLETA_EXTRA) -> np.ndarray:
+    """
+    Marca os dias em que a previsão exige coleta extra.
+
+    Args:
+        valores (np.ndarray): Previsões em kg, de qualquer forma (um dia, uma área ou áreas × dias).
+        limite (float, optional): Quantidade a partir da qual a coleta regular não dá conta. Defaults to LIMITE_COLETA_EXTRA.
+
+    Returns:
+        np.ndarray: Máscara booleana com a forma de ``valores``.
+    """
+    return np.asarray(valores) > limite
+
+
+def frota_uniforme(caminhoes: int, capacidade_kg: float, turnos: int = 1) -> pd.DataFrame:
+    """
+    Frota de caminhões iguais, disponíveis todos os dias.
+
+    Args:
+        caminhoes (int): Número de caminhões.
+        capacidade_kg (float): Capacidade de cada caminhão por turno.
+        turnos (int, optional): Turnos livres por caminhão e dia. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: Tabela de frota para ``planejar_coletas``.
+    """
+    return pd.DataFrame({
+        "caminhao": [f"Caminhão {i + 1}" for i in range(caminhoes)],
+        "capacidade_kg": float(capacidade_kg),
+        "turnos": int(turnos),
+    })
+
+
+def turnos_disponiveis(frota: pd.DataFrame, datas: Sequence[datetime]) -> pd.DataFrame:
+    """
+    Expande a tabela de frota em um registro por turno disponível no horizonte.
+
+    Args:
+        frota (pd.DataFrame): ``caminhao`` e ``capacidade_kg`` (por turno); opcionalmente ``turnos``
+            (por dia, padrão 1) e ``data`` (AAAA-MM-DD; vazia ou ausente = todos os dias).
+        datas (Sequence[datetime]): Dias do horizonte.
+
+    Returns:
+        pd.DataFrame: Colunas dia (índice em ``datas``), caminhao, turno e capacidade_kg.
+    """
+    faltando = [coluna for coluna in COLUNAS_FROTA if coluna not in frota.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes na frota: {', '.join(faltando)}")
+    capacidades = frota["capacidade_kg"].astype(float).to_numpy()
+    turnos = frota["turnos"].astype(int).to_numpy() if "turnos" in frota.columns else np.ones(len(frota), dtype=int)
+    if (capacidades <= 0).any() or (turnos < 0).any():
+        raise ValueError("Capacidades da frota devem ser positivas e turnos não podem ser negativos")
+
+    n_dias = len(datas)
+    if "data" in frota.columns:
+        datas_frota = pd.to_datetime(frota["data"], format="ISO8601").dt.normalize()
+        dia = pd.DatetimeIndex(datas).normalize().get_indexer(datas_frota)
+        todos_os_dias = datas_frota.isna().to_numpy()
+    else:
+        dia = np.full(len(frota), -1)
+        todos_os_dias = np.ones(len(frota), dtype=bool)
+
+    # Linhas sem data valem para todos os dias; linhas com data fora do horizonte são ignoradas
+    dias_por_linha = np.where(todos_os_dias, n_dias, (dia >= 0).astype(int))
+    linha = np.repeat(np.arange(len(frota)), dias_por_linha)
+    inicio_linha = np.cumsum(dias_por_linha) - dias_por_linha
+    deslocamento = np.arange(len(linha)) - np.repeat(inicio_linha, dias_por_linha)
+    dia_turno = np.where(todos_os_dias[linha], deslocamento, dia[linha])
+
+    repeticoes = turnos[linha]
+    indice = np.repeat(np.arange(len(linha)), repeticoes)
+    turno = np.arange(len(indice)) - np.repeat(np.cumsum(repeticoes) - repeticoes, repeticoes) + 1
+    return pd.DataFrame({
+        "dia": dia_turno[indice],
+        "caminhao": frota["caminhao"].astype(str).to_numpy()[linha[indice]],
+        "turno": turno,
+        "capacidade_kg": capacidades[linha[indice]],
+    })
+
+
+@dataclass
+class PlanoColetas:
+    """
+    Plano de coletas extras de um horizonte.
+
+    Attributes:
+        violacoes (np.ndarray): Máscara (áreas × dias) das previsões acima do limite.
+        excedente (np.ndarray): Quilos acima do limite (áreas × dias); zero fora das violações.
+        agenda (pd.DataFrame): Uma linha por parada: data, caminhao, turno, ordem (no turno), area e recolhido_kg.
+        pendentes (pd.DataFrame): Área-dias não atendidos por completo: data, area, excedente_kg e pendente_kg.
+    """
+
+    violacoes: np.ndarray
+    excedente: np.ndarray
+    agenda: pd.DataFrame
+    pendentes: pd.DataFrame
+
+    @property
+    def resumo(self) -> Dict[str, float]:
+        """Totais do plano: violações, paradas, turnos usados e quilos excedentes, recolhidos e pendentes."""
+        recolhido = float(self.agenda["recolhido_kg"].sum())
+        excedente = float(self.excedente.sum())
+        return {
+            "violacoes": int(self.violacoes.sum()),
+            "paradas": len(self.agenda),
+            "turnos_usados": len(self.agenda.drop_duplicates(["data", "caminhao", "turno"])),
+            "excedente_kg": excedente,
+            "recolhido_kg": recolhido,
+            "pendente_kg": excedente - recolhido,
+        }
+
+
+def planejar_coletas(valores: np.ndarray, areas: Sequence[str], datas: Sequence[datetime], frota: pd.DataFrame,
+                     limite: float = LIMITE_COLETA_EXTRA) -> PlanoColetas:
+    """
+    Monta a agenda de coletas extras de todas as áreas e dias.
+
+    Args:
+        valores (np.ndarray): Previsões com forma (n_areas, n_dias), como ``MatrizPrevisoes.valores``.
+        areas (Sequence[str]): Áreas, na ordem das linhas de ``valores``.
+        datas (Sequence[datetime]): Datas, na ordem das colunas de ``valores``.
+        frota (pd.DataFrame): Caminhões e turnos livres (ver ``turnos_disponiveis``).
+        limite (float, optional): Quantidade diária que a coleta regular leva. Defaults to LIMITE_COLETA_EXTRA.
+
+    Returns:
+        PlanoColetas: Violações, agenda e área-dias que ficaram pendentes.
+    """
+    valores = np.asarray(valores, dtype=float)
+    n_areas, n_dias = valores.shape
+    if len(areas) != n_areas or len(datas) != n_dias:
+        raise ValueError(f"A matriz de previsões tem forma {valores.shape}, mas foram informadas {len(areas)} áreas e {len(datas)} datas")
+    violacoes = precisa_coleta_extra(valores, limite)
+    excedente = np.where(violacoes, valores - limite, 0.0)
+    datas = pd.DatetimeIndex(datas)
+    areas = np.asarray(areas, dtype=object)
+
+    # Violações por dia, da maior para a menor, e turnos por dia, do maior caminhão para o menor
+    area_v, dia_v = np.nonzero(violacoes)
+    kg_v = excedente[area_v, dia_v]
+    ordem = np.lexsort((-kg_v, dia_v))
+    area_v, dia_v, kg_v = area_v[ordem], dia_v[ordem], kg_v[ordem]
+    turnos = turnos_disponiveis(frota, datas)
+    turnos = turnos.iloc[np.lexsort((-turnos["capacidade_kg"].to_numpy(), turnos["dia"].to_numpy()))]
+    dia_t, kg_t = turnos["dia"].to_numpy(), turnos["capacidade_kg"].to_numpy()
+
+    # Cada dia ocupa um trecho próprio de uma reta; nele, excedentes e capacidades viram intervalos
+    # consecutivos. Cada sobreposição entre o intervalo de uma área e o de um turno é uma parada.
+    largura = max(excedente.sum(axis=0).max(initial=0.0), np.bincount(dia_t, kg_t, minlength=n_dias).max(initial=0.0)) + 1.0
+
+    def intervalos(dia: np.ndarray, kg: np.ndarray):
+        # Soma acumulada dentro de cada dia: com uma soma global menos o início do dia, o arredondamento
+        # separa fins que deveriam coincidir e cria paradas de frações de grama
+        fim = pd.Series(kg).groupby(dia).cumsum().to_numpy() + dia * largura
+        return fim - kg, fim
+
+    inicio_v, fim_v = intervalos(dia_v, kg_v)
+    inicio_t, fim_t = intervalos(dia_t, kg_t)
+    iv = it = np.zeros(0, dtype=int)
+    recolhido = np.zeros(0)
+    if len(kg_v) and len(kg_t):
+        pontos = np.unique(np.concatenate([inicio_v, fim_v, inicio_t, fim_t]))
+        segmento_inicio, segmento_fim = pontos[:-1], pontos[1:]
+        iv = np.maximum(np.searchsorted(inicio_v, segmento_inicio, side="right") - 1, 0)
+        it = np.maximum(np.searchsorted(inicio_t, segmento_inicio, side="right") - 1, 0)
+        parada = (segmento_inicio >= inicio_v[iv]) & (segmento_inicio < fim_v[iv]) & \
+                 (segmento_inicio >= inicio_t[it]) & (segmento_inicio < fim_t[it]) & \
+                 (segmento_fim - segmento_inicio >= TOLERANCIA_KG)
+        iv, it, recolhido = iv[parada], it[parada], (segmento_fim - segmento_inicio)[parada]
+
+    turnos_parada = turnos.iloc[it]
+    agenda = pd.DataFrame({
+        "data": datas[dia_v[iv]],
+        "caminhao": turnos_parada["caminhao"].to_numpy(),
+        "turno": turnos_parada["turno"].to_numpy(),
+        "area": areas[area_v[iv]],
+        "recolhido_kg": recolhido,
+    })
+    # As paradas de um turno são consecutivas, na ordem em que foram preenchidas
+    agenda.insert(3, "ordem", agenda.groupby(["data", "caminhao", "turno"], sort=False).cumcount() + 1)
+
+    pendente = kg_v - np.bincount(iv, recolhido, minlength=len(kg_v))
+    faltando = pendente > TOLERANCIA_KG
+    pendentes = pd.DataFrame({
+        "data": datas[dia_v[faltando]],
+        "area": areas[area_v[faltando]],
+        "excedente_kg": kg_v[faltando],
+        "pendente_kg": pendente[faltando],
+    })
+    return PlanoColetas(violacoes=violacoes, excedente=excedente, agenda=agenda, pendentes=pendentes)
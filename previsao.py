@@ -0,0 +1,157 @@
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ["dia_semana", "tipo_area_num", "chuva", "feriado", "vespera_feriado", "pos_feriado"]
+# Features lidas do calendário do armazém de features; sem data (semana padrão), valem 0
+FEATURES_CALENDARIO = ["vespera_feriado", "pos_feriado"]
+
+
+class MatrizPrevisoes(Mapping):
+    """
+    Resultado denso de uma previsão em lote (áreas × dias).
+
+    Também se comporta como um dicionário somente leitura ``{area: [previsões]}``,
+    montado sob demanda a partir da matriz, para manter compatível o código que
+    consumia o formato antigo.
+
+    Attributes:
+        areas (list): Áreas na ordem das linhas da matriz.
+        valores (np.ndarray): Matriz de previsões com forma (n_areas, n_dias).
+        datas (list): Datas de cada coluna, ou None quando a previsão não é datada.
+    """
+
+    def __init__(self, areas: Sequence[str], valores: np.ndarray, datas: Optional[List[datetime]] = None) -> None:
+        self.areas = list(areas)
+        self.valores = valores
+        self.datas = datas
+        self._indice = {area: i for i, area in enumerate(self.areas)}
+
+    def __getitem__(self, area: str) -> List[float]:
+        return self.valores[self._indice[area]].tolist()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.areas)
+
+    def __len__(self) -> int:
+        return len(self.areas)
+
+    def para_dataframe(self) -> pd.DataFrame:
+        """
+        Converte a matriz em DataFrame com as áreas no índice e os dias nas colunas.
+
+        Returns:
+            pd.DataFrame: Previsões indexadas por área.
+        """
+        colunas = self.datas if self.datas is not None else list(range(self.valores.shape[1]))
+        return pd.DataFrame(self.valores, index=self.areas, columns=colunas)
+
+
+def dias_da_semana(data_inicio: datetime, dias: int) -> np.ndarray:
+    """
+    Calcula o dia da semana (0 = segunda) de cada dia do período.
+
+    Args:
+        data_inicio (datetime): Primeiro dia do período.
+        dias (int): Número de dias.
+
+    Returns:
+        np.ndarray: Vetor com o dia da semana de cada dia.
+    """
+    return (data_inicio.weekday() + np.arange(dias)) % 7
+
+
+def datas_do_periodo(data_inicio: datetime, dias: int) -> List[datetime]:
+    """
+    Lista as datas do período começando em ``data_inicio``.
+
+    Args:
+        data_inicio (datetime): Primeiro dia do período.
+        dias (int): Número de dias.
+
+    Returns:
+        List[datetime]: Datas consecutivas do período.
+    """
+    return [data_inicio + timedelta(days=dia) for dia in range(dias)]
+
+
+def colunas_por_dia(dias_semana: np.ndarray, chuva=0, feriado=0,
+                    calendario: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """
+    Valor de cada feature que varia por dia (todas menos ``tipo_area_num``), com um elemento por dia.
+
+    Args:
+        dias_semana (np.ndarray): Dia da semana de cada dia previsto.
+        chuva (int ou np.ndarray, optional): 0 para sem chuva, 1 para com chuva, ou um valor por dia. Defaults to 0.
+        feriado (int ou np.ndarray, optional): 0 para sem feriado, 1 para com feriado, ou um valor por dia. Defaults to 0.
+        calendario (Dict[str, np.ndarray], optional): Valor por dia de cada coluna de ``FEATURES_CALENDARIO``
+            (ver ``calendario.calendario_do_periodo``). Defaults to None (todas 0).
+
+    Returns:
+        Dict[str, np.ndarray]: Vetor de cada feature, indexado pelo nome.
+    """
+    dias = np.asarray(dias_semana, dtype=float)
+    colunas = {"dia_semana": dias, "chuva": chuva, "feriado": feriado}
+    for coluna in FEATURES_CALENDARIO:
+        colunas[coluna] = 0 if calendario is None else calendario[coluna]
+    return {coluna: np.broadcast_to(np.asarray(valor, dtype=float), dias.shape) for coluna, valor in colunas.items()}
+
+
+def montar_features(tipo_area_num: np.ndarray, dias_semana: np.ndarray, chuva=0, feriado=0,
+                    calendario: Optional[Dict[str, np.ndarray]] = None) -> pd.DataFrame:
+    """
+    Monta a matriz de features de todas as combinações (área, dia) de uma só vez.
+
+    As linhas seguem a ordem área-major: as ``n_dias`` primeiras linhas são da
+    primeira área, e assim por diante.
+
+    Args:
+        tipo_area_num (np.ndarray): Tipo de área codificado de cada área.
+        dias_semana (np.ndarray): Dia da semana de cada dia previsto.
+        chuva (int ou np.ndarray, optional): 0 para sem chuva, 1 para com chuva, ou um valor por dia. Defaults to 0.
+        feriado (int ou np.ndarray, optional): 0 para sem feriado, 1 para com feriado, ou um valor por dia. Defaults to 0.
+        calendario (Dict[str, np.ndarray], optional): Valor por dia de cada coluna de ``FEATURES_CALENDARIO``. Defaults to None (todas 0).
+
+    Returns:
+        pd.DataFrame: Features com as colunas de ``FEATURES``.
+    """
+    n_areas, n_dias = len(tipo_area_num), len(dias_semana)
+    por_dia = colunas_por_dia(dias_semana, chuva, feriado, calendario)
+    colunas = {coluna: np.tile(valores, n_areas) for coluna, valores in por_dia.items()}
+    colunas["tipo_area_num"] = np.repeat(tipo_area_num, n_dias)
+    return pd.DataFrame(colunas, columns=FEATURES)
+
+
+def prever_lote(modelo, tipo_area_num: np.ndarray, dias_semana: np.ndarray, chuva=0, feriado=0,
+                calendario: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+    """
+    Prevê todas as áreas e dias com uma única chamada a ``modelo.predict``.
+
+    Para modelos lineares treinados com ``FEATURES`` (``coef_`` e ``intercept_``),
+    a matriz é obtida por broadcasting sem montar as features: o resultado é o
+    mesmo, sem o custo do DataFrame e da validação do scikit-learn, que domina
+    o tempo de previsões pequenas.
+
+    Args:
+        modelo: Modelo treinado com as colunas de ``FEATURES``.
+        tipo_area_num (np.ndarray): Tipo de área codificado de cada área.
+        dias_semana (np.ndarray): Dia da semana de cada dia previsto.
+        chuva (int ou np.ndarray, optional): 0 para sem chuva, 1 para com chuva, ou um valor por dia. Defaults to 0.
+        feriado (int ou np.ndarray, optional): 0 para sem feriado, 1 para com feriado, ou um valor por dia. Defaults to 0.
+        calendario (Dict[str, np.ndarray], optional): Valor por dia de cada coluna de ``FEATURES_CALENDARIO``. Defaults to None (todas 0).
+
+    Returns:
+        np.ndarray: Previsões com forma (n_areas, n_dias).
+    """
+    if list(getattr(modelo, "feature_names_in_", [])) == FEATURES and hasattr(modelo, "coef_"):
+        coef = dict(zip(FEATURES, np.ravel(modelo.coef_)))
+        por_area = coef["tipo_area_num"] * np.asarray(tipo_area_num, dtype=float)
+        por_dia = sum(coef[coluna] * valores for coluna, valores in colunas_por_dia(dias_semana, chuva, feriado, calendario).items())
+        return por_area[:, None] + por_dia[None, :] + modelo.intercept_
+    X = montar_features(tipo_area_num, dias_semana, chuva, feriado, calendario)
+    if X.empty:
+        return np.empty((len(tipo_area_num), len(dias_semana)))
+    return modelo.predict(X).reshape(len(tipo_area_num), len(dias_semana))
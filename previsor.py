@@ -0,0 +1,345 @@
+"""
+Previsão de coleta de lixo por área: o ``LixoPrevisor``.
+
+O scikit-learn só é importado quando um modelo é treinado: um modelo lido do
+artefato é montado em numpy (ver ``modelo_linear``), para que importar este
+módulo e os comandos de ``cli`` que só preveem sejam rápidos.
+"""
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agregados import Agregados
+from armazem_features import ArmazemFeatures, armazem_do_historico
+from artefatos import caminho_artefato
+from calendario import aplicar_calendario, calendario_do_periodo, feriados_do_periodo
+from config import DIRETORIO_MODELOS, MODO_PREVISAO, PROCESSOS_TREINO
+from ingestao import carregar_historico, concatenar_chunks, preparar_chunk
+from metricas import cronometrado
+from planejamento import precisa_coleta_extra
+from previsao import FEATURES, FEATURES_CALENDARIO, MatrizPrevisoes, datas_do_periodo, dias_da_semana, prever_lote
+from regressao_incremental import EstatisticasSuficientes
+from registro_modelos import caminho_registro, parametros_globais
+from treino import carregar_ou_treinar, carregar_registro_treinado, treinar_registro
+
+
+class LixoPrevisor:
+    """
+    Classe para previsão de coleta de lixo com base em dados históricos.
+
+    Attributes:
+        dados (pd.DataFrame): DataFrame com os dados históricos de coleta.
+        modelo (ModeloLinear): Modelo de regressão linear treinado.
+        le (CodificadorCategorias): Encoder para transformar o tipo de área em valores numéricos.
+        dias_semana (list): Nomes dos dias da semana.
+        areas (list): Lista de áreas de coleta.
+        tipo_area_por_area (np.ndarray): Tipo de área de cada área, na ordem de ``areas``.
+        tipo_area_num_por_area (np.ndarray): Tipo de área codificado de cada área, na ordem de ``areas``.
+        estatisticas (EstatisticasSuficientes): XᵀX e Xᵀy acumulados, usados por ``atualizar``.
+        estatisticas_carga (EstatisticasCarga): Tempo, origem e pico de memória da carga dos dados.
+        metricas (dict): Métricas de avaliação do modelo (MSE e R²).
+        artefato (ArtefatoModelo): Versão persistida do modelo em uso.
+        arquivo_dados (str): CSV de onde o histórico foi lido.
+        registro (RegistroModelos): Modelos por área no modo "area", ou None no modo "global".
+    """
+
+    @cronometrado("previsor.construcao")
+    def __init__(self, arquivo_dados: str, diretorio_modelos: str = DIRETORIO_MODELOS,
+                 refit_completo_a_cada: Optional[int] = None, modo: str = MODO_PREVISAO,
+                 processos_treino: Optional[int] = PROCESSOS_TREINO) -> None:
+        """
+        Inicializa a classe com o arquivo de dados.
+
+        Os dados são lidos pelo cache Parquet de ``ingestao``, e ``dia_semana`` e
+        os feriados vêm do calendário (ver ``calendario``); a véspera e o dia
+        seguinte de feriado são lidos do armazém de features. Se existir em
+        ``diretorio_modelos`` um artefato treinado com o mesmo conteúdo de
+        ``arquivo_dados``, o modelo é carregado dele; caso contrário é treinado
+        e o artefato é salvo para as próximas execuções.
+
+        Args:
+            arquivo_dados (str): Caminho para o arquivo CSV com os dados históricos.
+            diretorio_modelos (str, optional): Diretório dos artefatos de modelo. Defaults to DIRETORIO_MODELOS.
+            refit_completo_a_cada (int, optional): Se informado, a cada N chamadas de ``atualizar`` o modelo é reajustado do zero com ``refit_completo`` para verificar a deriva. Defaults to None.
+            modo (str, optional): "global" para um único modelo ou "area" para um modelo por área, com o global como alternativa para áreas com poucos dados. Defaults to MODO_PREVISAO.
+            processos_treino (int, optional): Processos usados no treino por área; None usa todos os núcleos. Defaults to PROCESSOS_TREINO.
+        """
+        if modo not in ("global", "area"):
+            raise ValueError(f"Modo de previsão desconhecido: {modo!r} (use 'global' ou 'area')")
+        self.refit_completo_a_cada = refit_completo_a_cada
+        self._atualizacoes = 0
+        self.arquivo_dados = arquivo_dados
+        self.dados, self.estatisticas_carga = carregar_historico(arquivo_dados)
+        print(self.estatisticas_carga)
+        self._linhas_arquivo = len(self.dados)
+        aplicar_calendario(self.dados)
+        self.features.anexar(self.dados, FEATURES_CALENDARIO)
+        self.caminho_artefato = caminho_artefato(arquivo_dados, diretorio_modelos)
+        treinado = carregar_ou_treinar(self.dados, arquivo_dados, diretorio_modelos)
+        self.le, self.modelo, self.estatisticas = treinado.le, treinado.modelo, treinado.estatisticas
+        self.artefato = treinado.artefato
+        self.metricas = self.artefato.metricas
+        if treinado.origem == "disco":
+            print(f"Modelo {self.artefato.versao} carregado de {self.caminho_artefato}")
+        else:
+            print(f"MSE: {self.metricas['mse']:.2f}")
+            print(f"R²: {self.metricas['r2']:.2f}")
+        self.dias_semana = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+        self.areas = np.asarray(self.dados["area"].unique())
+        primeira_ocorrencia = self.dados.drop_duplicates("area").set_index("area")["tipo_area"]
+        self.tipo_area_por_area = np.asarray(primeira_ocorrencia.loc[self.areas], dtype=object)
+        self.tipo_area_num_por_area = self.le.transform(self.tipo_area_por_area)
+
+        self.processos_treino = processos_treino
+        self.registro = None
+        if modo == "area":
+            self.caminho_registro = caminho_registro(arquivo_dados, diretorio_modelos)
+            inicio = time.perf_counter()
+            self.registro, resumo = carregar_registro_treinado(self.dados, arquivo_dados, diretorio_modelos, processos_treino)
+            self._exibir_resumo_registro(resumo, time.perf_counter() - inicio)
+
+    @property
+    def dados(self) -> pd.DataFrame:
+        """
+        Histórico de coletas, incluindo as linhas recebidas por ``atualizar``.
+
+        As linhas novas só são concatenadas ao histórico quando ele é lido, para
+        que ``atualizar`` não copie o histórico inteiro a cada lote.
+        """
+        if self._lotes_novos:
+            self._dados = concatenar_chunks([self._dados, *self._lotes_novos])
+            self._lotes_novos = []
+        return self._dados
+
+    @dados.setter
+    def dados(self, valor: pd.DataFrame) -> None:
+        self._dados = valor
+        self._lotes_novos = []
+        self._agregados = None
+        self._features = None
+
+    @property
+    def agregados(self) -> Agregados:
+        """
+        Agregados por área e período do histórico (ver ``agregados``).
+
+        São calculados no primeiro acesso e, depois disso, ``atualizar`` só soma
+        as linhas novas a eles.
+        """
+        if self._agregados is None:
+            self._agregados = Agregados.de_dados(self.dados)
+        return self._agregados
+
+    @property
+    def features(self) -> ArmazemFeatures:
+        """
+        Features de cada coleta do histórico: calendário, defasagens e médias móveis por área (ver ``armazem_features``).
+
+        No primeiro acesso o armazém é lido do disco ou materializado a partir
+        das linhas do CSV; depois disso, ``atualizar`` só acrescenta as linhas novas.
+        """
+        if self._features is None:
+            dados = self.dados
+            self._features = armazem_do_historico(self.arquivo_dados, dados.iloc[:self._linhas_arquivo])
+            self._features.acrescentar(dados.iloc[self._linhas_arquivo:])
+        return self._features
+
+    @cronometrado("previsor.treinar_registro")
+    def _treinar_registro(self, dados: pd.DataFrame) -> None:
+        """
+        Treina os modelos por área presentes em ``dados`` e salva o registro se algo mudou.
+
+        Args:
+            dados (pd.DataFrame): Histórico completo das áreas a treinar.
+        """
+        inicio = time.perf_counter()
+        resumo = treinar_registro(self.registro, dados, self.caminho_registro, self.processos_treino)
+        self._exibir_resumo_registro(resumo, time.perf_counter() - inicio)
+
+    @staticmethod
+    def _exibir_resumo_registro(resumo: Dict[str, int], segundos: float) -> None:
+        print(f"Modelos por área: {resumo['treinadas']} treinados, {resumo['reaproveitadas']} reaproveitados, "
+              f"{resumo['insuficientes']} com poucos dados (modelo global) em {segundos:.2f}s")
+
+    @cronometrado("previsor.atualizar")
+    def atualizar(self, novos_dados: pd.DataFrame) -> None:
+        """
+        Incorpora novas coletas ao modelo sem reajustar o histórico.
+
+        O custo é proporcional ao número de linhas novas: só as estatísticas
+        suficientes são atualizadas e o sistema normal (7×7) é resolvido de novo.
+        O resultado coincide, até a precisão numérica, com um ajuste completo em
+        todo o histórico. Um ``tipo_area`` inédito é acrescentado ao codificador;
+        como isso renumera as classes, só nesse caso o histórico é recodificado.
+
+        Args:
+            novos_dados (pd.DataFrame): Novas linhas com as colunas do CSV (data, area, quantidade_lixo, tipo_area e, opcionalmente, chuva e feriado).
+        """
+        novos = preparar_chunk(novos_dados)
+        aplicar_calendario(novos)
+
+        tipos_novos = np.setdiff1d(novos["tipo_area"].astype(str).unique(), self.le.classes_)
+        if len(tipos_novos) > 0:
+            self.le.classes_ = np.array(sorted([*self.le.classes_, *tipos_novos]), dtype=object)
+            self.dados["tipo_area_num"] = self.le.transform(self.dados["tipo_area"])
+            self.tipo_area_num_por_area = self.le.transform(self.tipo_area_por_area)
+        novos["tipo_area_num"] = self.le.transform(novos["tipo_area"])
+        self.features.acrescentar(novos)
+        self.features.anexar(novos, FEATURES_CALENDARIO)
+
+        primeira_ocorrencia = novos.drop_duplicates("area")
+        areas_novas = ~primeira_ocorrencia["area"].isin(self.areas).to_numpy()
+        if areas_novas.any():
+            tipos = np.asarray(primeira_ocorrencia["tipo_area"], dtype=object)[areas_novas]
+            self.areas = np.concatenate([self.areas, np.asarray(primeira_ocorrencia["area"], dtype=object)[areas_novas]])
+            self.tipo_area_por_area = np.concatenate([self.tipo_area_por_area, tipos])
+            self.tipo_area_num_por_area = np.concatenate([self.tipo_area_num_por_area, self.le.transform(tipos)])
+
+        self._lotes_novos.append(novos[self._dados.columns])
+        self.estatisticas.acumular(novos)
+        if self._agregados is not None:
+            self._agregados.acumular(novos)
+        self.modelo = self.estatisticas.modelo(self.le)
+        if self.registro is not None:
+            # Só as áreas que receberam linhas são reajustadas, com todo o histórico delas
+            afetadas = novos["area"].unique()
+            self._treinar_registro(self.dados[self.dados["area"].isin(afetadas)])
+        print(f"Modelo atualizado com {len(novos)} novos registros.")
+
+        self._atualizacoes += 1
+        if self.refit_completo_a_cada and self._atualizacoes % self.refit_completo_a_cada == 0:
+            self.refit_completo()
+
+    @cronometrado("previsor.refit_completo")
+    def refit_completo(self) -> Dict[str, float]:
+        """
+        Reajusta o modelo do zero em todo o histórico e mede a deriva do modelo incremental.
+
+        As estatísticas suficientes também são recalculadas, descartando qualquer
+        erro numérico acumulado pelas atualizações.
+
+        Returns:
+            Dict[str, float]: Maior diferença absoluta entre os coeficientes e diferença do intercepto.
+        """
+        from sklearn.linear_model import LinearRegression
+
+        modelo_incremental = self.modelo
+        self.modelo = LinearRegression()
+        self.modelo.fit(self.dados[FEATURES], self.dados["quantidade_lixo"])
+        self.estatisticas = EstatisticasSuficientes.de_dados(self.dados)
+        deriva = {
+            "coeficientes": float(np.abs(self.modelo.coef_ - modelo_incremental.coef_).max()),
+            "intercepto": float(abs(self.modelo.intercept_ - modelo_incremental.intercept_)),
+        }
+        print(f"Refit completo: deriva máxima dos coeficientes {deriva['coeficientes']:.2e}, do intercepto {deriva['intercepto']:.2e}")
+        return deriva
+
+    @cronometrado("previsor.prever_matriz")
+    def prever_matriz(self, dias_semana: np.ndarray, chuva=0, feriado=0,
+                      calendario: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """
+        Prevê todas as áreas para os dias da semana informados, no modo configurado.
+
+        Args:
+            dias_semana (np.ndarray): Dia da semana (0 = segunda) de cada dia previsto.
+            chuva (int ou np.ndarray, optional): 0 para sem chuva, 1 para com chuva, ou um valor por dia. Defaults to 0.
+            feriado (int ou np.ndarray, optional): 0 para sem feriado, 1 para com feriado, ou um valor por dia. Defaults to 0.
+            calendario (Dict[str, np.ndarray], optional): Valor por dia de cada coluna de ``FEATURES_CALENDARIO``
+                (ver ``calendario.calendario_do_periodo``). Defaults to None (todas 0).
+
+        Returns:
+            np.ndarray: Previsões com forma (n_areas, n_dias), na ordem de ``areas``.
+        """
+        if self.registro is not None:
+            return self.registro.prever(self.areas, self.tipo_area_num_por_area, self.modelo, dias_semana, chuva, feriado, calendario)
+        return prever_lote(self.modelo, self.tipo_area_num_por_area, dias_semana, chuva, feriado, calendario)
+
+    def parametros_por_area(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parâmetros lineares efetivos de cada área no modo configurado, para avaliar muitos cenários de uma vez.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Interceptos (n_areas,) e coeficientes (n_areas, len(FEATURES_AREA)), na ordem de ``areas``.
+        """
+        if self.registro is not None:
+            return self.registro.parametros(self.areas, self.tipo_area_num_por_area, self.modelo)
+        return parametros_globais(self.tipo_area_num_por_area, self.modelo)
+
+    @cronometrado("previsor.prever_proxima_semana")
+    def prever_proxima_semana(self, chuva: int = 0, feriado: int = 0) -> MatrizPrevisoes:
+        """
+        Prever a quantidade de lixo para a próxima semana em cada área.
+
+        Args:
+            chuva (int, optional): 0 para sem chuva, 1 para com chuva. Defaults to 0.
+            feriado (int, optional): 0 para sem feriado, 1 para com feriado. Defaults to 0.
+
+        Returns:
+            MatrizPrevisoes: Previsões para cada área, onde a chave é o nome da área e o valor é uma lista com as previsões de segunda a domingo.
+        """
+        valores = self.prever_matriz(np.arange(7), chuva, feriado)
+        return MatrizPrevisoes(self.areas, valores)
+
+    @cronometrado("previsor.prever_dias_especificos")
+    def prever_dias_especificos(self, data_inicio: datetime, dias: int, chuva=0, feriado=None) -> MatrizPrevisoes:
+        """
+        Prever a quantidade de lixo para dias específicos.
+
+        Todas as áreas e dias são previstos com uma única chamada ao modelo. A
+        véspera e o dia seguinte de feriado vêm do calendário do período.
+
+        Args:
+            data_inicio (datetime): Data inicial para a previsão.
+            dias (int): Número de dias a serem previstos.
+            chuva (int ou np.ndarray, optional): 0 para sem chuva, 1 para com chuva, ou um valor por dia. Defaults to 0.
+            feriado (int ou np.ndarray, optional): 0 para sem feriado, 1 para com feriado, um valor por dia, ou None
+                para os feriados do calendário de Mossoró. Defaults to None.
+
+        Returns:
+            MatrizPrevisoes: Matriz (áreas × dias) com as previsões, acessível também como dicionário onde a chave é o nome da área e o valor é uma lista com as previsões para os dias especificados.
+        """
+        if feriado is None:
+            feriado = feriados_do_periodo(data_inicio, dias)
+        valores = self.prever_matriz(dias_da_semana(data_inicio, dias), chuva, feriado, calendario_do_periodo(data_inicio, dias))
+        return MatrizPrevisoes(self.areas, valores, datas_do_periodo(data_inicio, dias))
+
+    def exibir_previsoes(self, previsoes: Dict[str, List[float]], data_inicio: datetime = None, dias: int = None) -> None:
+        """
+        Exibe as previsões de coleta de lixo.
+
+        Args:
+            previsoes (Dict[str, List[float]]): Dicionário com as previsões para cada área.
+            data_inicio (datetime, optional): Data inicial para a previsão. Defaults to None.
+            dias (int, optional): Número de dias a serem previstos. Defaults to None.
+        """
+        if data_inicio is not None and dias is not None:
+            rotulos = [f"{data:%d/%m/%Y} ({self.dias_semana[data.weekday()]})" for data in datas_do_periodo(data_inicio, dias)]
+        else:
+            rotulos = self.dias_semana
+        for area, previsao in previsoes.items():
+            print(f"\nPrevisões para {area}:")
+            for rotulo, valor, extra in zip(rotulos, previsao, precisa_coleta_extra(previsao)):
+                print(f"{rotulo}: {valor:.0f} kg")
+                if extra:
+                    print("Recomendação: Agendar coleta extra!")
+
+    def simular_interativamente(self) -> None:
+        """
+        Permite ao usuário simular previsões de coleta de lixo.
+        """
+        data_inicio_str = input("Digite a data inicial da simulação (dd/mm/aaaa): ")
+        try:
+            data_inicio = datetime.strptime(data_inicio_str, "%d/%m/%Y")
+        except ValueError:
+            print("Data inválida. Use o formato dd/mm/aaaa.")
+            return
+
+        dias = int(input("Digite o número de dias para a simulação: "))
+        chuva = int(input("Haverá chuva na semana? (0 = não, 1 = sim): "))
+        feriado = int(input("Todos os dias são feriado? (0 = não, usar o calendário; 1 = sim): "))
+
+        previsoes = self.prever_dias_especificos(data_inicio, dias, chuva, feriado or None)
+        self.exibir_previsoes(previsoes, data_inicio, dias)
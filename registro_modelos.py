@@ -0,0 +1,290 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import MIN_AMOSTRAS_AREA
+from previsao import FEATURES, colunas_por_dia
+from regressao_incremental import FEATURES_BASE
+
+# Dentro de uma área o tipo é constante, então o modelo por área usa só as demais features
+FEATURES_AREA = FEATURES_BASE
+
+# Abaixo disso o custo de iniciar processos e serializar os dados supera o ganho do paralelismo
+_MIN_LINHAS_PARALELO = 1_000_000
+
+
+def parametros_globais(tipo_area_num_por_area: np.ndarray, modelo_global) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Intercepto e coeficientes que o modelo global dá a cada área, no formato de ``RegistroModelos.parametros``.
+
+    Args:
+        tipo_area_num_por_area (np.ndarray): Tipo de área codificado de cada área.
+        modelo_global: Modelo linear treinado com as colunas de ``FEATURES``.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Interceptos (n_areas,) e coeficientes (n_areas, len(FEATURES_AREA)).
+    """
+    coef_global = dict(zip(FEATURES, np.ravel(modelo_global.coef_)))
+    interceptos = modelo_global.intercept_ + coef_global["tipo_area_num"] * np.asarray(tipo_area_num_por_area, dtype=float)
+    coeficientes = np.tile([coef_global[f] for f in FEATURES_AREA], (len(interceptos), 1))
+    return interceptos, coeficientes
+
+
+def prever_linear(interceptos: np.ndarray, coeficientes: np.ndarray, dias_semana: np.ndarray, chuva=0, feriado=0,
+                  calendario: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+    """
+    Aplica os parâmetros por área a um período, com chuva e feriado fixos ou por dia.
+
+    Args:
+        interceptos (np.ndarray): Intercepto de cada área (n_areas,).
+        coeficientes (np.ndarray): Coeficientes de ``FEATURES_AREA`` de cada área (n_areas, len(FEATURES_AREA)).
+        dias_semana (np.ndarray): Dia da semana de cada dia previsto.
+        chuva (int ou np.ndarray, optional): Valor único ou um por dia. Defaults to 0.
+        feriado (int ou np.ndarray, optional): Valor único ou um por dia. Defaults to 0.
+        calendario (Dict[str, np.ndarray], optional): Valor por dia de cada coluna de ``FEATURES_CALENDARIO``. Defaults to None (todas 0).
+
+    Returns:
+        np.ndarray: Previsões com forma (n_areas, n_dias).
+    """
+    colunas = colunas_por_dia(dias_semana, chuva, feriado, calendario)
+    X = np.column_stack([colunas[f] for f in FEATURES_AREA])
+    return interceptos[:, None] + coeficientes @ X.T
+
+
+@dataclass
+class ModeloArea:
+    """
+    Regressão linear de uma área.
+
+    Attributes:
+        coeficientes (list): Coeficientes na ordem de ``FEATURES_AREA``.
+        intercepto (float): Intercepto da regressão.
+        n (int): Linhas usadas no ajuste.
+        impressao (str): Impressão digital dos dados da área no ajuste.
+    """
+
+    coeficientes: List[float]
+    intercepto: float
+    n: int
+    impressao: str
+
+
+def impressoes_por_area(dados: pd.DataFrame) -> Dict[str, str]:
+    """
+    Calcula uma impressão digital dos dados de cada área, independente da ordem das linhas.
+
+    Args:
+        dados (pd.DataFrame): Dados com ``area``, ``data``, ``quantidade_lixo`` e as colunas de ``FEATURES_AREA``.
+
+    Returns:
+        Dict[str, str]: Impressão digital de cada área.
+    """
+    hashes = pd.util.hash_pandas_object(dados[["data", *FEATURES_AREA, "quantidade_lixo"]], index=False)
+    agregados = hashes.groupby(dados["area"], observed=True).agg(["sum", "count"])
+    return {str(area): f"{int(soma) & 0xFFFFFFFFFFFFFFFF:016x}-{int(contagem)}"
+            for area, (soma, contagem) in agregados.iterrows()}
+
+
+def _ajustar_lote(lote: List[Tuple[str, np.ndarray, np.ndarray]]) -> List[Tuple[str, np.ndarray, float, int]]:
+    # Executado nos processos do pool: mínimos quadrados centrados, como o LinearRegression
+    resultados = []
+    for area, X, y in lote:
+        medias, media_y = X.mean(axis=0), y.mean()
+        coeficientes = np.linalg.lstsq(X - medias, y - media_y, rcond=None)[0]
+        resultados.append((area, coeficientes, float(media_y - medias @ coeficientes), len(y)))
+    return resultados
+
+
+class RegistroModelos:
+    """
+    Modelos de regressão por área, com o modelo global como alternativa.
+
+    Áreas com pelo menos ``min_amostras`` linhas ganham um modelo próprio; as
+    demais são previstas pelo modelo global (por tipo de área). O treino roda
+    num pool de processos e pula as áreas cujos dados não mudaram desde o último
+    ajuste, comparando a impressão digital dos dados de cada área.
+
+    Attributes:
+        modelos (dict): Modelo de cada área com dados suficientes.
+        min_amostras (int): Linhas mínimas para uma área ter modelo próprio.
+    """
+
+    def __init__(self, min_amostras: int = MIN_AMOSTRAS_AREA) -> None:
+        self.modelos: Dict[str, ModeloArea] = {}
+        self.min_amostras = min_amostras
+
+    def __len__(self) -> int:
+        return len(self.modelos)
+
+    def treinar(self, dados: pd.DataFrame, processos: Optional[int] = None) -> Dict[str, int]:
+        """
+        Ajusta os modelos das áreas presentes em ``dados`` cujos dados mudaram.
+
+        Áreas ausentes de ``dados`` não são alteradas, então ``dados`` pode conter
+        só as áreas afetadas por uma atualização (com todo o histórico delas).
+
+        Args:
+            dados (pd.DataFrame): Histórico com ``area``, ``data``, ``quantidade_lixo`` e as colunas de ``FEATURES_AREA``.
+            processos (int, optional): Processos do pool; None usa todos os núcleos e 1 treina no processo atual. Defaults to None.
+
+        Returns:
+            Dict[str, int]: Áreas treinadas, reaproveitadas e sem dados suficientes (previstas pelo modelo global).
+        """
+        impressoes = impressoes_por_area(dados)
+        posicoes = dados.groupby("area", observed=True, sort=False).indices
+        X = dados[FEATURES_AREA].to_numpy(dtype=np.float64)
+        y = dados["quantidade_lixo"].to_numpy(dtype=np.float64)
+
+        pendentes, insuficientes, reaproveitadas = [], 0, 0
+        for area, linhas in posicoes.items():
+            area = str(area)
+            if len(linhas) < self.min_amostras:
+                self.modelos.pop(area, None)
+                insuficientes += 1
+            elif area in self.modelos and self.modelos[area].impressao == impressoes[area]:
+                reaproveitadas += 1
+            else:
+                pendentes.append((area, X[linhas], y[linhas]))
+
+        processos = processos or os.cpu_count() or 1
+        linhas_pendentes = sum(len(y_area) for _, _, y_area in pendentes)
+        if processos > 1 and len(pendentes) > 1 and linhas_pendentes >= _MIN_LINHAS_PARALELO:
+            # Vários lotes por processo equilibram áreas de tamanhos diferentes
+            n_lotes = min(len(pendentes), processos * 4)
+            lotes = [pendentes[i::n_lotes] for i in range(n_lotes)]
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                resultados = [r for lote in executor.map(_ajustar_lote, lotes) for r in lote]
+        else:
+            resultados = _ajustar_lote(pendentes)
+
+        for area, coeficientes, intercepto, n in resultados:
+            self.modelos[area] = ModeloArea([float(c) for c in coeficientes], intercepto, n, impressoes[area])
+        return {"treinadas": len(resultados), "reaproveitadas": reaproveitadas, "insuficientes": insuficientes}
+
+    def parametros(self, areas: Sequence[str], tipo_area_num_por_area: np.ndarray, modelo_global) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Monta intercepto e coeficientes de cada área, usando o modelo global nas áreas sem modelo próprio.
+
+        Args:
+            areas (Sequence[str]): Áreas, na ordem desejada.
+            tipo_area_num_por_area (np.ndarray): Tipo de área codificado de cada área.
+            modelo_global: Modelo linear treinado com as colunas de ``FEATURES``.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Interceptos (n_areas,) e coeficientes (n_areas, len(FEATURES_AREA)).
+        """
+        interceptos, coeficientes = parametros_globais(tipo_area_num_por_area, modelo_global)
+        for i, area in enumerate(areas):
+            modelo = self.modelos.get(str(area))
+            if modelo is not None:
+                interceptos[i] = modelo.intercepto
+                coeficientes[i] = modelo.coeficientes
+        return interceptos, coeficientes
+
+    def prever(self, areas: Sequence[str], tipo_area_num_por_area: np.ndarray, modelo_global,
+               dias_semana: np.ndarray, chuva=0, feriado=0, calendario: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """
+        Prevê todas as áreas e dias de uma vez.
+
+        Args:
+            areas (Sequence[str]): Áreas a prever.
+            tipo_area_num_por_area (np.ndarray): Tipo de área codificado de cada área.
+            modelo_global: Modelo usado nas áreas sem modelo próprio.
+            dias_semana (np.ndarray): Dia da semana de cada dia previsto.
+            chuva (int ou np.ndarray, optional): 0 para sem chuva, 1 para com chuva, ou um valor por dia. Defaults to 0.
+            feriado (int ou np.ndarray, optional): 0 para sem feriado, 1 para com feriado, ou um valor por dia. Defaults to 0.
+            calendario (Dict[str, np.ndarray], optional): Valor por dia de cada coluna de ``FEATURES_CALENDARIO``. Defaults to None (todas 0).
+
+        Returns:
+            np.ndarray: Previsões com forma (n_areas, n_dias).
+        """
+        interceptos, coeficientes = self.parametros(areas, tipo_area_num_por_area, modelo_global)
+        return prever_linear(interceptos, coeficientes, dias_semana, chuva, feriado, calendario)
+
+    def para_dict(self) -> Dict:
+        """
+        Converte o registro para um dicionário serializável em JSON.
+
+        Returns:
+            Dict: Features, limiar de amostras e modelos por área.
+        """
+        return {
+            "features": list(FEATURES_AREA),
+            "min_amostras": self.min_amostras,
+            "modelos": {area: asdict(modelo) for area, modelo in self.modelos.items()},
+        }
+
+    @classmethod
+    def de_dict(cls, conteudo: Dict) -> "RegistroModelos":
+        """
+        Reconstrói o registro salvo com ``para_dict``.
+
+        Args:
+            conteudo (Dict): Registro serializado.
+
+        Returns:
+            RegistroModelos: Registro reconstruído.
+        """
+        registro = cls(conteudo["min_amostras"])
+        registro.modelos = {area: ModeloArea(**modelo) for area, modelo in conteudo["modelos"].items()}
+        return registro
+
+
+def caminho_registro(arquivo_dados: str, diretorio: str) -> str:
+    """
+    Caminho do registro de modelos por área associado a um arquivo de dados.
+
+    Args:
+        arquivo_dados (str): CSV com os dados históricos.
+        diretorio (str): Diretório dos artefatos.
+
+    Returns:
+        str: Caminho do arquivo JSON do registro.
+    """
+    nome = os.path.splitext(os.path.basename(arquivo_dados))[0]
+    return os.path.join(diretorio, f"{nome}.areas.json")
+
+
+def salvar_registro(registro: RegistroModelos, caminho: str) -> None:
+    """
+    Salva o registro em JSON de forma atômica.
+
+    Args:
+        registro (RegistroModelos): Registro a salvar.
+        caminho (str): Caminho de destino.
+    """
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump({**registro.para_dict(), "salvo_em": time.time()}, arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def carregar_registro(caminho: str, min_amostras: int = MIN_AMOSTRAS_AREA) -> RegistroModelos:
+    """
+    Carrega o registro salvo, ou um registro vazio se ele não existir ou for de outro formato.
+
+    Modelos de áreas cujos dados mudaram continuam no registro e são refeitos
+    por ``RegistroModelos.treinar``, que compara as impressões digitais.
+
+    Args:
+        caminho (str): Caminho do registro.
+        min_amostras (int, optional): Linhas mínimas por área. Defaults to MIN_AMOSTRAS_AREA.
+
+    Returns:
+        RegistroModelos: Registro carregado ou vazio.
+    """
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            conteudo = json.load(arquivo)
+        if conteudo.get("features") == FEATURES_AREA and conteudo.get("min_amostras") == min_amostras:
+            return RegistroModelos.de_dict(conteudo)
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return RegistroModelos(min_amostras)
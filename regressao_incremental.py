@@ -0,0 +1,144 @@
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modelo_linear import CodificadorCategorias, ModeloLinear
+from previsao import FEATURES
+
+# Features que não dependem da codificação do tipo de área, precedidas do termo constante
+FEATURES_BASE = [f for f in FEATURES if f != "tipo_area_num"]
+
+
+class EstatisticasSuficientes:
+    """
+    Estatísticas suficientes (XᵀX, Xᵀy e contagem) da regressão linear do LixoPrevisor.
+
+    As estatísticas são guardadas por ``tipo_area`` sobre as features que não
+    dependem da codificação do tipo. Assim, quando um tipo novo aparece e o
+    codificador renumera as classes, o sistema normal é remontado com os novos
+    códigos sem revisitar o histórico.
+
+    Attributes:
+        por_tipo (dict): Para cada tipo de área, o par (BᵀB, Bᵀy) com B = [1, FEATURES_BASE].
+    """
+
+    def __init__(self) -> None:
+        self.por_tipo: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def de_dados(cls, dados: pd.DataFrame) -> "EstatisticasSuficientes":
+        """
+        Calcula as estatísticas de um DataFrame de coletas.
+
+        Args:
+            dados (pd.DataFrame): Dados com ``tipo_area``, ``quantidade_lixo`` e as colunas de ``FEATURES_BASE``.
+
+        Returns:
+            EstatisticasSuficientes: Estatísticas dos dados.
+        """
+        estatisticas = cls()
+        estatisticas.acumular(dados)
+        return estatisticas
+
+    @property
+    def n(self) -> int:
+        """Número total de linhas acumuladas."""
+        return int(sum(G[0, 0] for G, _ in self.por_tipo.values()))
+
+    def acumular(self, dados: pd.DataFrame) -> None:
+        """
+        Soma às estatísticas as linhas de ``dados``. Custo O(linhas novas).
+
+        Args:
+            dados (pd.DataFrame): Dados com ``tipo_area``, ``quantidade_lixo`` e as colunas de ``FEATURES_BASE``.
+        """
+        base = np.column_stack([np.ones(len(dados)), dados[FEATURES_BASE].to_numpy(dtype=np.float64)])
+        y = dados["quantidade_lixo"].to_numpy(dtype=np.float64)
+        tipos = dados["tipo_area"].astype(str).to_numpy()
+        for tipo in np.unique(tipos):
+            mascara = tipos == tipo
+            B, y_tipo = base[mascara], y[mascara]
+            G, h = self.por_tipo.get(tipo, (np.zeros((B.shape[1], B.shape[1])), np.zeros(B.shape[1])))
+            self.por_tipo[tipo] = (G + B.T @ B, h + B.T @ y_tipo)
+
+    def sistema_normal(self, codigos: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Monta ZᵀZ e Zᵀy para Z = [1, FEATURES] com os códigos de tipo informados.
+
+        Args:
+            codigos (Dict[str, int]): Código numérico de cada tipo de área.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: As matrizes ZᵀZ e Zᵀy.
+        """
+        posicao_tipo = 1 + FEATURES.index("tipo_area_num")
+        dimensao = len(FEATURES) + 1
+        ZtZ, Zty = np.zeros((dimensao, dimensao)), np.zeros(dimensao)
+        for tipo, (G, h) in self.por_tipo.items():
+            # Z = T·B: a coluna do tipo é o termo constante multiplicado pelo código
+            T = np.delete(np.eye(dimensao), posicao_tipo, axis=1)
+            T[posicao_tipo, 0] = codigos[tipo]
+            ZtZ += T @ G @ T.T
+            Zty += T @ h
+        return ZtZ, Zty
+
+    def resolver(self, codigos: Dict[str, int]) -> Tuple[np.ndarray, float]:
+        """
+        Resolve os mínimos quadrados com intercepto.
+
+        Assim como ``LinearRegression``, centraliza as features e usa a solução de
+        norma mínima, então colunas constantes (ex.: ``chuva`` sempre 0) ficam com
+        coeficiente 0.
+
+        Args:
+            codigos (Dict[str, int]): Código numérico de cada tipo de área.
+
+        Returns:
+            Tuple[np.ndarray, float]: Coeficientes na ordem de ``FEATURES`` e intercepto.
+        """
+        ZtZ, Zty = self.sistema_normal(codigos)
+        n = ZtZ[0, 0]
+        medias, media_y = ZtZ[0, 1:] / n, Zty[0] / n
+        Sxx = ZtZ[1:, 1:] - n * np.outer(medias, medias)
+        Sxy = Zty[1:] - n * medias * media_y
+        coeficientes = np.linalg.lstsq(Sxx, Sxy, rcond=None)[0]
+        return coeficientes, float(media_y - medias @ coeficientes)
+
+    def modelo(self, le: CodificadorCategorias) -> ModeloLinear:
+        """
+        Monta um modelo equivalente a um ``LinearRegression`` ajustado em todas as linhas acumuladas.
+
+        Args:
+            le (CodificadorCategorias): Encoder com todas as classes de ``tipo_area`` acumuladas.
+
+        Returns:
+            ModeloLinear: Modelo pronto para ``predict``.
+        """
+        codigos = {str(tipo): i for i, tipo in enumerate(le.classes_)}
+        coeficientes, intercepto = self.resolver(codigos)
+        return ModeloLinear(coeficientes, intercepto, FEATURES)
+
+    def para_dict(self) -> Dict[str, Dict[str, list]]:
+        """
+        Converte as estatísticas para um dicionário serializável em JSON.
+
+        Returns:
+            Dict[str, Dict[str, list]]: Estatísticas por tipo de área.
+        """
+        return {tipo: {"BtB": G.tolist(), "Bty": h.tolist()} for tipo, (G, h) in self.por_tipo.items()}
+
+    @classmethod
+    def de_dict(cls, conteudo: Dict[str, Dict[str, list]]) -> "EstatisticasSuficientes":
+        """
+        Reconstrói as estatísticas salvas com ``para_dict``.
+
+        Args:
+            conteudo (Dict[str, Dict[str, list]]): Estatísticas por tipo de área.
+
+        Returns:
+            EstatisticasSuficientes: Estatísticas reconstruídas.
+        """
+        estatisticas = cls()
+        estatisticas.por_tipo = {tipo: (np.array(v["BtB"]), np.array(v["Bty"])) for tipo, v in conteudo.items()}
+        return estatisticas
@@ -0,0 +1,100 @@
+import functools
+import io
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from metricas import cronometrado
+from planejamento import precisa_coleta_extra
+
+
+@functools.lru_cache(maxsize=None)
+def estilo_tabela():
+    """
+    Estilo das tabelas dos PDFs. O reportlab só é importado aqui, na primeira exportação.
+
+    Returns:
+        TableStyle: Estilo compartilhado por todos os relatórios.
+    """
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ])
+
+
+def tabela_previsoes(dias: Sequence[str], previsoes: np.ndarray) -> pd.DataFrame:
+    """
+    Monta a tabela de previsões exibida e exportada pelo dashboard.
+
+    Args:
+        dias (Sequence[str]): Rótulo de cada dia.
+        previsoes (np.ndarray): Quantidade prevista (kg) de cada dia.
+
+    Returns:
+        pd.DataFrame: Colunas "Dia", "Quantidade (kg)" e "Coleta Extra".
+    """
+    previsoes = np.asarray(previsoes)
+    return pd.DataFrame({
+        "Dia": list(dias),
+        "Quantidade (kg)": previsoes.round(0),
+        "Coleta Extra": np.where(precisa_coleta_extra(previsoes), "Sim", "Não"),
+    })
+
+
+@cronometrado("relatorios.csv")
+def gerar_csv(tabela: pd.DataFrame) -> str:
+    """
+    Exporta a tabela de previsões em CSV.
+
+    Args:
+        tabela (pd.DataFrame): Tabela de ``tabela_previsoes``.
+
+    Returns:
+        str: Conteúdo do arquivo CSV.
+    """
+    return tabela.to_csv(index=False)
+
+
+@cronometrado("relatorios.pdf")
+def gerar_pdf(titulo: str, periodo: str, tabela: pd.DataFrame) -> bytes:
+    """
+    Gera o relatório em PDF com a tabela de previsões.
+
+    Args:
+        titulo (str): Título do relatório.
+        periodo (str): Descrição do período previsto.
+        tabela (pd.DataFrame): Tabela de ``tabela_previsoes``.
+
+    Returns:
+        bytes: Conteúdo do arquivo PDF.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table
+
+    pdf_buffer = io.BytesIO()
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    linhas = [["Dia", "Quantidade (kg)", "Coleta Extra"]]
+    linhas += [[dia, f"{quantidade:.0f}", extra] for dia, quantidade, extra in tabela.itertuples(index=False)]
+    table = Table(linhas)
+    table.setStyle(estilo_tabela())
+    doc.build([
+        Paragraph(titulo, styles['Heading1']),
+        Paragraph(f"Período: {periodo}", styles['Normal']),
+        table,
+    ])
+    return pdf_buffer.getvalue()
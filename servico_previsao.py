@@ -0,0 +1,296 @@
+"""
+Serviço HTTP/JSON de previsões em lote, sem a interface do Streamlit.
+
+Mantém um ``LixoPrevisor`` carregado em memória e atende vários cenários por
+requisição:
+
+    python servico_previsao.py --dados lixo_mossoro.csv --porta 8765 --trabalhadores 4
+
+    POST /previsoes
+    {"consultas": [{"inicio": "2025-03-03", "dias": 7, "chuva": 0, "feriado": 0, "areas": ["Centro"]}]}
+
+Cada consulta devolve ``areas``, ``datas`` e ``valores`` (matriz áreas × dias,
+em kg). ``areas`` é opcional; sem ela, todas as áreas são previstas. Sem
+``feriado``, os feriados vêm do calendário de Mossoró (ver ``calendario``).
+Consultas inválidas são recusadas com 400 e corpos acima de ``SERVICO_MAX_CORPO``
+bytes com 413.
+``GET /saude`` e ``GET /estatisticas`` informam o estado do serviço, e ``GET /metrics``
+exporta a duração das etapas no formato do Prometheus (com ``METRICAS_ATIVAS``).
+"""
+import argparse
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from calendario import calendario_do_periodo, feriados_do_periodo
+from config import (
+    MODO_PREVISAO,
+    SERVICO_FILA_MAXIMA,
+    SERVICO_MAX_CONSULTAS,
+    SERVICO_MAX_CORPO,
+    SERVICO_MAX_DIAS,
+    SERVICO_PORTA,
+    SERVICO_TRABALHADORES,
+)
+from previsor import LixoPrevisor
+from metricas import registro
+from previsao import datas_do_periodo, dias_da_semana
+
+
+class ServicoOcupado(Exception):
+    """A fila de cenários está cheia; o cliente deve tentar de novo mais tarde."""
+
+
+class ServicoPrevisao:
+    """
+    Executa consultas de previsão num pool de threads, com um modelo aquecido.
+
+    Consultas com o mesmo cenário (início, dias, chuva, feriado) que chegam
+    enquanto ele ainda está sendo calculado compartilham o mesmo resultado, mesmo
+    vindas de requisições diferentes. Cada cenário prevê todas as áreas com uma
+    única chamada ao modelo; o filtro por área é feito depois. Quando há mais de
+    ``fila_maxima`` cenários pendentes, novas consultas são recusadas com
+    ``ServicoOcupado`` em vez de acumular latência.
+
+    Attributes:
+        previsor (LixoPrevisor): Previsor com os dados e o modelo carregados.
+        fila_maxima (int): Cenários pendentes aceitos antes de recusar.
+        requisicoes (int): Requisições atendidas.
+        consultas (int): Consultas recebidas.
+        coalescidas (int): Consultas que aproveitaram um cenário já em andamento.
+        recusadas (int): Requisições recusadas por fila cheia.
+    """
+
+    def __init__(self, previsor: LixoPrevisor, trabalhadores: int = SERVICO_TRABALHADORES,
+                 fila_maxima: int = SERVICO_FILA_MAXIMA) -> None:
+        self.previsor = previsor
+        self.fila_maxima = fila_maxima
+        self.requisicoes = 0
+        self.consultas = 0
+        self.coalescidas = 0
+        self.recusadas = 0
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="previsao")
+        self._em_andamento: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._indice_areas = {area: i for i, area in enumerate(previsor.areas)}
+
+    def _prever_cenario(self, inicio: datetime, dias: int, chuva: int, feriado: Optional[int]) -> np.ndarray:
+        if feriado is None:  # Consulta sem "feriado": os feriados do calendário de Mossoró
+            feriado = feriados_do_periodo(inicio, dias)
+        valores = self.previsor.prever_matriz(dias_da_semana(inicio, dias), chuva, feriado, calendario_do_periodo(inicio, dias))
+        valores.setflags(write=False)
+        return valores
+
+    def _concluir(self, chave: Tuple, futuro: Future) -> None:
+        with self._lock:
+            if self._em_andamento.get(chave) is futuro:
+                del self._em_andamento[chave]
+
+    def _agendar(self, chaves: List[Tuple]) -> List[Future]:
+        # A capacidade é conferida para o lote inteiro antes de submeter qualquer
+        # cenário: um pedido recusado não deixa cenários órfãos ocupando a fila
+        with self._lock:
+            novas = list(dict.fromkeys(chave for chave in chaves if chave not in self._em_andamento))
+            if len(self._em_andamento) + len(novas) > self.fila_maxima:
+                raise ServicoOcupado(f"{len(self._em_andamento)} cenários na fila, {len(novas)} novos no pedido")
+            self.coalescidas += len(chaves) - len(novas)
+            submetidos = {chave: self._executor.submit(self._prever_cenario, *chave) for chave in novas}
+            self._em_andamento.update(submetidos)
+            futuros = [self._em_andamento[chave] for chave in chaves]
+        for chave, futuro in submetidos.items():
+            futuro.add_done_callback(lambda _, chave=chave, futuro=futuro: self._concluir(chave, futuro))
+        return futuros
+
+    def _validar(self, consulta: Dict) -> Tuple[Tuple, List[int]]:
+        try:
+            inicio = datetime.strptime(consulta["inicio"], "%Y-%m-%d")
+            dias = int(consulta.get("dias", 7))
+            chuva = int(consulta.get("chuva", 0))
+            feriado = None if consulta.get("feriado") is None else int(consulta["feriado"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"consulta inválida {consulta!r}: {e}") from e
+        if not 1 <= dias <= SERVICO_MAX_DIAS:
+            raise ValueError(f"'dias' deve estar entre 1 e {SERVICO_MAX_DIAS}")
+        if chuva not in (0, 1) or feriado not in (None, 0, 1):
+            raise ValueError("'chuva' e 'feriado' devem ser 0 ou 1")
+        areas = consulta.get("areas")
+        if areas is not None and not isinstance(areas, list):
+            raise ValueError("'areas' deve ser uma lista")
+        invalidas = [area for area in areas or [] if not isinstance(area, str)]
+        if invalidas:
+            raise ValueError(f"'areas' deve conter só nomes de áreas (texto), recebido {invalidas[0]!r}")
+        if areas is None:
+            linhas = list(range(len(self.previsor.areas)))
+        else:
+            desconhecidas = [area for area in areas if area not in self._indice_areas]
+            if desconhecidas:
+                raise ValueError(f"áreas desconhecidas: {', '.join(map(str, desconhecidas))}")
+            linhas = [self._indice_areas[area] for area in areas]
+        return (inicio, dias, chuva, feriado), linhas
+
+    def prever(self, consultas: List[Dict]) -> List[Dict]:
+        """
+        Atende um lote de consultas.
+
+        Args:
+            consultas (List[Dict]): Consultas com ``inicio`` (AAAA-MM-DD) e, opcionalmente, ``dias``, ``chuva``, ``feriado`` e ``areas``.
+
+        Returns:
+            List[Dict]: Para cada consulta, ``areas``, ``datas`` e ``valores`` (lista de linhas, uma por área).
+
+        Raises:
+            ValueError: Se alguma consulta for inválida (nenhuma é executada).
+            ServicoOcupado: Se os cenários novos do lote não couberem na fila (nenhum é executado).
+        """
+        if not isinstance(consultas, list) or not consultas:
+            raise ValueError("'consultas' deve ser uma lista não vazia")
+        if len(consultas) > SERVICO_MAX_CONSULTAS:
+            raise ValueError(f"no máximo {SERVICO_MAX_CONSULTAS} consultas por requisição")
+        validadas = [self._validar(consulta) for consulta in consultas]
+        try:
+            futuros = self._agendar([chave for chave, _ in validadas])
+        except ServicoOcupado:
+            with self._lock:
+                self.recusadas += 1
+            raise
+        with self._lock:
+            self.requisicoes += 1
+            self.consultas += len(consultas)
+
+        resultados = []
+        for (chave, linhas), futuro in zip(validadas, futuros):
+            inicio, dias = chave[0], chave[1]
+            valores = futuro.result()
+            resultados.append({
+                "areas": [self.previsor.areas[i] for i in linhas],
+                "datas": [data.date().isoformat() for data in datas_do_periodo(inicio, dias)],
+                "valores": valores[linhas].tolist(),
+            })
+        return resultados
+
+    def estatisticas(self) -> Dict[str, int]:
+        """
+        Contadores do serviço.
+
+        Returns:
+            Dict[str, int]: Requisições, consultas, coalescidas, recusadas e cenários pendentes.
+        """
+        return {
+            "requisicoes": self.requisicoes,
+            "consultas": self.consultas,
+            "coalescidas": self.coalescidas,
+            "recusadas": self.recusadas,
+            "pendentes": len(self._em_andamento),
+        }
+
+    def encerrar(self) -> None:
+        """Aguarda os cenários em andamento e encerra o pool."""
+        self._executor.shutdown(wait=True)
+
+
+class ManipuladorPrevisao(BaseHTTPRequestHandler):
+    """Atende POST /previsoes, GET /saude e GET /estatisticas."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive: clientes de alta taxa reaproveitam a conexão
+    servico: ServicoPrevisao = None
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _enviar_json(self, status: int, corpo: dict, cabecalhos: Dict[str, str] = None) -> None:
+        conteudo = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(conteudo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def do_GET(self):
+        if self.path == "/saude":
+            self._enviar_json(200, {"status": "ok", "versao": self.servico.previsor.artefato.versao,
+                                    "areas": len(self.servico.previsor.areas)})
+        elif self.path == "/estatisticas":
+            self._enviar_json(200, self.servico.estatisticas())
+        elif self.path == "/metrics":
+            conteudo = registro.texto_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(conteudo)))
+            self.end_headers()
+            self.wfile.write(conteudo)
+        else:
+            self._enviar_json(404, {"erro": "não encontrado"})
+
+    def do_POST(self):
+        if self.path != "/previsoes":
+            self._enviar_json(404, {"erro": "não encontrado"})
+            return
+        try:
+            tamanho = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            tamanho = -1
+        if not 0 <= tamanho <= SERVICO_MAX_CORPO:
+            # O corpo não é lido, então a conexão é fechada para que ele não seja tomado pelo próximo pedido
+            self.close_connection = True
+            if tamanho > SERVICO_MAX_CORPO:
+                self._enviar_json(413, {"erro": f"corpo com {tamanho} bytes, acima do limite de {SERVICO_MAX_CORPO}"},
+                                  {"Connection": "close"})
+            else:
+                self._enviar_json(400, {"erro": "Content-Length inválido"}, {"Connection": "close"})
+            return
+        try:
+            pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+            resultados = self.servico.prever(pedido.get("consultas"))
+        except (ValueError, AttributeError) as e:
+            self._enviar_json(400, {"erro": str(e)})
+        except ServicoOcupado as e:
+            self._enviar_json(503, {"erro": f"serviço ocupado ({e})"}, {"Retry-After": "1"})
+        except Exception as e:  # Falha do modelo: o cliente recebe a resposta em vez de perder a conexão
+            self._enviar_json(500, {"erro": f"erro interno: {type(e).__name__}: {e}"})
+        else:
+            self._enviar_json(200, {"versao": self.servico.previsor.artefato.versao, "resultados": resultados})
+
+
+def iniciar_servidor(servico: ServicoPrevisao, porta: int = SERVICO_PORTA, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Inicia o servidor HTTP numa thread em segundo plano.
+
+    Args:
+        servico (ServicoPrevisao): Serviço que executa as consultas.
+        porta (int, optional): Porta local; 0 escolhe uma porta livre. Defaults to SERVICO_PORTA.
+        host (str, optional): Endereço de escuta. Defaults to "127.0.0.1".
+
+    Returns:
+        ThreadingHTTPServer: Servidor em execução.
+    """
+    manipulador = type("Manipulador", (ManipuladorPrevisao,), {"servico": servico})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço HTTP de previsões de coleta de lixo em lote.")
+    parser.add_argument("--dados", default="lixo_mossoro.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=SERVICO_PORTA)
+    parser.add_argument("--trabalhadores", type=int, default=SERVICO_TRABALHADORES)
+    parser.add_argument("--fila-maxima", type=int, default=SERVICO_FILA_MAXIMA)
+    parser.add_argument("--modo", choices=["global", "area"], default=MODO_PREVISAO, help="um modelo global ou um modelo por área")
+    args = parser.parse_args()
+    servico = ServicoPrevisao(LixoPrevisor(args.dados, modo=args.modo), args.trabalhadores, args.fila_maxima)
+    servidor = iniciar_servidor(servico, args.porta, args.host)
+    print(f"Serviço de previsões em http://{args.host}:{servidor.server_port} ({args.trabalhadores} trabalhadores)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+        servico.encerrar()
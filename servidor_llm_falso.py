@@ -0,0 +1,128 @@
+"""
+Servidor falso compatível com a API de chat do OpenAI/Ollama, para desenvolvimento e testes.
+
+Responde sempre com o mesmo texto, palavra por palavra, sem precisar do Ollama:
+
+    python servidor_llm_falso.py --porta 11435 --atraso 0.05
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPOSTA_PADRAO = "Centro e Nova Betânia são as áreas com maior produção prevista; considere uma coleta extra no fim de semana."
+
+
+class ManipuladorLLMFalso(BaseHTTPRequestHandler):
+    """Atende /v1/models e /v1/chat/completions (com e sem stream)."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, como o Ollama
+    resposta = RESPOSTA_PADRAO
+    atraso = 0.0  # Segundos entre tokens
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _enviar_json(self, status: int, corpo: dict) -> None:
+        conteudo = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def _encerrado(self) -> bool:
+        # Servidor parado por ``encerrar_servidor``: a conexão keep-alive cai sem resposta, como numa queda do Ollama
+        if getattr(self.server, "encerrado", False):
+            self.close_connection = True
+            return True
+        return False
+
+    def do_GET(self):
+        if self._encerrado():
+            return
+        if self.path.rstrip("/").endswith("/models"):
+            self._enviar_json(200, {"object": "list", "data": [{"id": "deepscaler", "object": "model"}]})
+        else:
+            self._enviar_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self._encerrado():
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._enviar_json(404, {"error": "not found"})
+            return
+        pedido = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        tokens = self.resposta.split(" ")[: pedido.get("max_tokens") or None]
+        if not pedido.get("stream"):
+            time.sleep(self.atraso * len(tokens))
+            self._enviar_json(200, {
+                "object": "chat.completion",
+                "model": pedido.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(tokens)}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def evento(corpo) -> None:
+            dados = f"data: {corpo if isinstance(corpo, str) else json.dumps(corpo, ensure_ascii=False)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(dados):X}\r\n".encode() + dados + b"\r\n")
+            self.wfile.flush()
+
+        for i, token in enumerate(tokens):
+            time.sleep(self.atraso)
+            texto = token if i == 0 else f" {token}"
+            evento({"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": texto}}]})
+        if (pedido.get("stream_options") or {}).get("include_usage"):
+            evento({"object": "chat.completion.chunk", "choices": [], "usage": {"completion_tokens": len(tokens)}})
+        evento("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def iniciar_servidor(porta: int = 0, resposta: str = RESPOSTA_PADRAO, atraso: float = 0.0) -> ThreadingHTTPServer:
+    """
+    Inicia o servidor falso numa thread em segundo plano.
+
+    Args:
+        porta (int, optional): Porta local; 0 escolhe uma porta livre. Defaults to 0.
+        resposta (str, optional): Texto devolvido em todas as respostas. Defaults to RESPOSTA_PADRAO.
+        atraso (float, optional): Segundos entre tokens. Defaults to 0.0.
+
+    Returns:
+        ThreadingHTTPServer: Servidor em execução; a URL base é ``http://127.0.0.1:{server_port}/v1``.
+    """
+    manipulador = type("Manipulador", (ManipuladorLLMFalso,), {"resposta": resposta, "atraso": atraso})
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), manipulador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def encerrar_servidor(servidor: ThreadingHTTPServer) -> None:
+    """
+    Para o servidor e derruba as conexões keep-alive abertas na próxima requisição delas.
+
+    Args:
+        servidor (ThreadingHTTPServer): Servidor devolvido por ``iniciar_servidor``.
+    """
+    servidor.encerrado = True
+    servidor.shutdown()
+    servidor.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor falso da API de chat do Ollama.")
+    parser.add_argument("--porta", type=int, default=11435)
+    parser.add_argument("--atraso", type=float, default=0.05, help="segundos entre tokens")
+    args = parser.parse_args()
+    servidor = iniciar_servidor(args.porta, atraso=args.atraso)
+    print(f"Servidor falso em http://127.0.0.1:{servidor.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
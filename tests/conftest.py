@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks.gerar_dados import gerar_historico
+
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    """Diretório temporário como diretório de trabalho, para que caches, modelos e quarentenas fiquem nele."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def historico(diretorio):
+    """CSV sintético com 12 áreas (três tipos) e 200 dias a partir de 01/01/2000, cobrindo o Carnaval."""
+    return gerar_historico(str(diretorio / "historico.csv"), 2400, areas=12)
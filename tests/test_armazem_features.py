@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from armazem_features import ArmazemFeatures, armazem_do_historico, materializar_features
+from calendario import atributos_calendario
+from ingestao import carregar_historico
+from previsao import FEATURES_CALENDARIO
+
+DEFASAGENS, JANELAS = [1, 7], [3, 14]
+
+
+@pytest.fixture
+def dados(historico):
+    dados, _ = carregar_historico(historico)
+    # Remove um terço das coletas ao acaso, para que faltem dias em todas as áreas
+    return dados[np.random.default_rng(0).random(len(dados)) > 1 / 3].reset_index(drop=True)
+
+
+def _forca_bruta(dados: pd.DataFrame) -> pd.DataFrame:
+    # Por área, indexada pelo dia: defasagem por deslocamento de calendário e média pelos dias anteriores
+    partes = []
+    for _, da_area in dados.groupby("area", observed=True):
+        serie = da_area.set_index("data")["quantidade_lixo"].astype(float)
+        diaria = serie.asfreq("D")
+        colunas = {f"lag_{k}": diaria.shift(k).reindex(serie.index).to_numpy() for k in DEFASAGENS}
+        for w in JANELAS:
+            colunas[f"media_{w}"] = diaria.shift(1).rolling(w, min_periods=1).mean().reindex(serie.index).to_numpy()
+        partes.append(pd.DataFrame(colunas, index=da_area.index))
+    return pd.concat(partes).loc[dados.index]
+
+
+def test_defasagens_coincidem_com_o_calculo_por_area(dados):
+    matriz = materializar_features(dados, DEFASAGENS, JANELAS)
+    esperado = _forca_bruta(dados)
+    for coluna in esperado.columns:
+        np.testing.assert_allclose(matriz[coluna].to_numpy(), esperado[coluna].to_numpy(), rtol=1e-6, equal_nan=True,
+                                   err_msg=coluna)
+
+
+def test_acrescentar_coincide_com_materializar_tudo(dados):
+    # O histórico até 30 dias antes do fim, depois três lotes de 10 dias
+    cortes = dados["data"].max() - pd.to_timedelta([30, 20, 10, 0], unit="D")
+    armazem = ArmazemFeatures.de_dados(dados[dados["data"] <= cortes[0]], DEFASAGENS, JANELAS)
+    for inicio, fim in zip(cortes[:-1], cortes[1:]):
+        armazem.acrescentar(dados[(dados["data"] > inicio) & (dados["data"] <= fim)])
+    assert armazem.origem == "completo" and armazem.ultimo_dia == cortes[-1]
+    completo = materializar_features(dados, DEFASAGENS, JANELAS)
+    obtido = armazem.linhas(dados)
+    np.testing.assert_allclose(obtido.to_numpy(dtype=float), completo[armazem.colunas].to_numpy(dtype=float), equal_nan=True)
+
+
+def test_anexar_copia_o_calendario_do_armazem(historico, dados):
+    armazem = armazem_do_historico(historico, dados)
+    embaralhados = dados.sample(frac=1, random_state=0)
+    armazem.anexar(embaralhados, FEATURES_CALENDARIO)
+    esperado = atributos_calendario(embaralhados["data"], FEATURES_CALENDARIO)
+    pd.testing.assert_frame_equal(embaralhados[FEATURES_CALENDARIO], esperado, check_dtype=False)
+
+    with pytest.raises(ValueError):
+        armazem.anexar(dados.assign(data=dados["data"] + pd.Timedelta(days=1000)), FEATURES_CALENDARIO)
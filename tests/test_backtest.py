@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from armazem_features import armazem_do_historico
+from backtest import executar_backtest
+from calendario import aplicar_calendario
+from ingestao import carregar_historico
+from previsao import FEATURES, FEATURES_CALENDARIO
+from registro_modelos import FEATURES_AREA
+
+HORIZONTE, PASSO, TREINO_MINIMO, MIN_AMOSTRAS = 5, 20, 100, 130
+
+
+@pytest.fixture
+def dados(historico):
+    dados, _ = carregar_historico(historico)
+    aplicar_calendario(dados)
+    armazem_do_historico(historico, dados).anexar(dados, FEATURES_CALENDARIO)
+    classes = sorted(dados["tipo_area"].astype(str).unique())
+    dados["tipo_area_num"] = dados["tipo_area"].astype(str).map({tipo: i for i, tipo in enumerate(classes)})
+    return dados
+
+
+def _erros_refit(dados: pd.DataFrame, modo: str, janela) -> pd.DataFrame:
+    # Um LinearRegression por corte (e por área com dados suficientes), ajustado e avaliado linha a linha
+    dia = (dados["data"] - dados["data"].min()).dt.days.to_numpy()
+    erros = []
+    for corte in range(TREINO_MINIMO, dia.max() + 1, PASSO):
+        treino = (dia < corte) & (dia >= (corte - janela if janela else 0))
+        teste = (dia >= corte) & (dia < corte + HORIZONTE)
+        y = dados["quantidade_lixo"].to_numpy(dtype=float)
+        previsto = LinearRegression().fit(dados.loc[treino, FEATURES], y[treino]).predict(dados.loc[teste, FEATURES])
+        if modo == "area":
+            for area in dados.loc[teste, "area"].unique():
+                da_area = (dados["area"] == area).to_numpy()
+                if (treino & da_area).sum() >= MIN_AMOSTRAS:
+                    proprio = LinearRegression().fit(dados.loc[treino & da_area, FEATURES_AREA], y[treino & da_area])
+                    previsto[da_area[teste]] = proprio.predict(dados.loc[teste & da_area, FEATURES_AREA])
+        erros.append(pd.DataFrame({
+            "area": dados.loc[teste, "area"].astype(str).to_numpy(),
+            "horizonte": dia[teste] - corte + 1,
+            "absoluto": np.abs(previsto - y[teste]),
+        }))
+    return pd.concat(erros).groupby(["area", "horizonte"])["absoluto"].agg(avaliacoes="size", mae="mean").reset_index()
+
+
+@pytest.mark.parametrize("modo, janela", [("global", None), ("area", None), ("global", 150), ("area", 150)])
+def test_erros_coincidem_com_refits_do_scikit_learn(dados, modo, janela):
+    resultado = executar_backtest(dados, modo, HORIZONTE, PASSO, janela, TREINO_MINIMO, MIN_AMOSTRAS, processos=1)
+    esperado = _erros_refit(dados, modo, janela)
+    obtido = resultado.por_area_horizonte.assign(area=lambda df: df["area"].astype(str))
+    comparacao = esperado.merge(obtido, on=["area", "horizonte"], how="outer", suffixes=("_refit", ""), validate="1:1")
+    assert len(comparacao) == len(esperado) == len(obtido)
+    np.testing.assert_array_equal(comparacao["avaliacoes"], comparacao["avaliacoes_refit"])
+    np.testing.assert_allclose(comparacao["mae"], comparacao["mae_refit"], rtol=1e-7)
+    assert len(resultado.cortes) == len(range(TREINO_MINIMO, (dados["data"].max() - dados["data"].min()).days + 1, PASSO))
+
+
+def test_treino_minimo_maior_que_o_historico_e_recusado(dados):
+    with pytest.raises(ValueError):
+        executar_backtest(dados, treino_minimo=10_000, processos=1)
@@ -0,0 +1,24 @@
+from cache_previsoes import CacheLRU
+
+
+def test_lru_descarta_o_menos_usado_recentemente():
+    cache = CacheLRU(capacidade=3)
+    calculados = []
+
+    def obter(chave):
+        return cache.obter(chave, lambda: calculados.append(chave) or chave.upper())
+
+    for chave in "abc":
+        obter(chave)
+    assert obter("a") == "A"  # Acerto: "a" passa a ser o mais recente
+    obter("d")  # Descarta "b", o menos usado
+    obter("e")  # Descarta "c"
+    assert calculados == ["a", "b", "c", "d", "e"]
+    obter("a")
+    obter("b")  # Recalculado, e descarta "d"
+    assert calculados == ["a", "b", "c", "d", "e", "b"]
+    obter("e")
+    obter("a")
+    assert calculados == ["a", "b", "c", "d", "e", "b"]  # Restaram "e", "a" e "b"
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["itens"], estatisticas["acertos"], estatisticas["falhas"], estatisticas["descartes"]) == (3, 4, 6, 3)
@@ -0,0 +1,53 @@
+import itertools
+
+import pytest
+
+import cache_respostas
+from cache_respostas import CacheRespostas
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    # Um instante distinto por chamada, para que a ordem de acesso nunca empate
+    instantes = itertools.count(1_000_000.0)
+    monkeypatch.setattr(cache_respostas.time, "time", lambda: next(instantes))
+
+
+def test_cache_de_respostas_descarta_as_menos_acessadas(diretorio, relogio):
+    cache = CacheRespostas(str(diretorio / "respostas.sqlite3"), ttl=1e9, max_itens=3)
+    escopo = CacheRespostas.escopo("modelo", {"temperatura": 0.2}, "v1")
+    for numero in range(1, 4):
+        cache.guardar(f"pergunta {numero}", escopo, f"resposta {numero}")
+    assert cache.obter("pergunta 1", escopo).resposta == "resposta 1"  # A 2 passa a ser a menos acessada
+
+    cache.guardar("pergunta 4", escopo, "resposta 4")
+    assert cache.obter("pergunta 2", escopo) is None
+    assert [cache.obter(f"pergunta {n}", escopo).resposta for n in (1, 3, 4)] == ["resposta 1", "resposta 3", "resposta 4"]
+
+    cache.guardar("pergunta 5", escopo, "resposta 5")  # A 1 foi lida antes da 3 e da 4
+    assert cache.obter("pergunta 1", escopo) is None
+    assert cache.obter("pergunta 3", escopo) is not None
+
+
+def test_cache_de_respostas_expira_pelo_ttl(diretorio, relogio):
+    cache = CacheRespostas(str(diretorio / "respostas.sqlite3"), ttl=5, max_itens=10)
+    escopo = CacheRespostas.escopo("modelo", {}, "v1")
+    cache.guardar("Quanto lixo amanhã?", escopo, "300 kg")
+    assert cache.obter("quanto lixo amanha", escopo).exata
+    for _ in range(5):
+        cache.obter("outra pergunta", escopo)
+    assert cache.obter("Quanto lixo amanhã?", escopo) is None
+
+
+def test_pergunta_parecida_so_aproveita_resposta_com_os_mesmos_numeros_e_negacoes(diretorio, relogio):
+    cache = CacheRespostas(str(diretorio / "respostas.sqlite3"), ttl=1e9, max_itens=10, similaridade_minima=0.7)
+    escopo = CacheRespostas.escopo("modelo", {}, "v1")
+    cache.guardar("Quanto lixo o Centro gerou em 2023?", escopo, "120 t")
+    cache.guardar("Quais áreas precisam de coleta extra?", escopo, "Centro e Alto")
+
+    parecida = cache.obter("quanto lixo o centro gerou em 2023 no total", escopo)
+    assert parecida is not None and not parecida.exata and parecida.resposta == "120 t"
+    assert cache.obter("Quanto lixo o Centro gerou em 2024?", escopo) is None
+    assert cache.obter("Quais áreas não precisam de coleta extra?", escopo) is None
+    assert CacheRespostas(str(diretorio / "respostas.sqlite3"), ttl=1e9).obter(
+        "quanto lixo o centro gerou em 2023 no total", escopo) is None  # Sem limiar, só o acerto exato
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from calendario import atributos_calendario
+from cenarios import avaliar_cenarios, preparar_cenarios
+from previsor import LixoPrevisor
+
+# Carnaval de 2025 em 03/03 e 04/03 (feriados no calendário de Mossoró); 05/03 é dia útil
+DATAS = ["2025-03-03", "2025-03-04", "2025-03-05"]
+
+
+def test_feriado_ausente_vem_do_calendario_e_o_explicito_prevalece():
+    do_calendario = atributos_calendario(pd.to_datetime(DATAS), ["feriado"])["feriado"].to_numpy(dtype=float)
+    assert do_calendario.tolist() == [1.0, 1.0, 0.0]
+
+    sem_coluna = preparar_cenarios(pd.DataFrame({"cenario": "base", "data": DATAS}))
+    np.testing.assert_array_equal(sem_coluna["feriado"], do_calendario)
+    assert (sem_coluna["chuva"] == 0).all()
+
+    # Células vazias vêm do calendário; 0 num feriado e 1 num dia útil são mantidos
+    parcial = preparar_cenarios(pd.DataFrame({"cenario": "base", "data": DATAS * 2,
+                                              "feriado": [np.nan, 0, np.nan, np.nan, np.nan, 1]}))
+    assert parcial["feriado"].tolist() == [1.0, 0.0, 0.0, 1.0, 1.0, 1.0]
+
+
+def test_cenario_sem_feriado_coincide_com_o_feriado_do_calendario(historico):
+    previsor = LixoPrevisor(historico, "modelos")
+    cenarios = pd.DataFrame({"cenario": np.repeat(["seco", "chuvoso"], len(DATAS)), "data": DATAS * 2,
+                             "chuva": np.repeat([0.0, 1.0], len(DATAS))})
+    explicito = cenarios.assign(feriado=np.tile([1.0, 1.0, 0.0], 2))
+    pd.testing.assert_frame_equal(avaliar_cenarios(previsor, cenarios).por_cenario,
+                                  avaliar_cenarios(previsor, explicito).por_cenario)
@@ -0,0 +1,43 @@
+import pytest
+
+from cliente_llm import ClienteLLM
+from servidor_llm_falso import RESPOSTA_PADRAO, encerrar_servidor, iniciar_servidor
+
+MENSAGENS = [{"role": "user", "content": "Quais áreas precisam de coleta extra?"}]
+
+
+@pytest.fixture
+def cliente():
+    servidor = iniciar_servidor(atraso=0.001)
+    cliente = ClienteLLM(f"http://127.0.0.1:{servidor.server_port}/v1", tentativas=0)
+    yield cliente
+    cliente.fechar()
+    encerrar_servidor(servidor)
+
+
+def test_stream_remonta_o_texto_em_utf8_e_preenche_as_metricas(cliente):
+    resposta = cliente.conversar_stream(MENSAGENS)
+    assert resposta.metricas is None
+    texto = "".join(resposta)
+    assert texto == RESPOSTA_PADRAO and "Betânia" in texto
+
+    metricas = resposta.metricas
+    assert metricas.tokens == len(RESPOSTA_PADRAO.split(" "))
+    assert 0 < metricas.tempo_primeiro_token <= metricas.duracao
+    assert metricas.tokens_por_segundo > 0
+    assert cliente.metricas[-1] is metricas
+
+
+def test_max_tokens_trunca_a_resposta(cliente):
+    resposta = cliente.conversar_stream(MENSAGENS, max_tokens=3)
+    assert "".join(resposta) == " ".join(RESPOSTA_PADRAO.split(" ")[:3])
+    assert resposta.metricas.tokens == 3
+    assert cliente.conversar(MENSAGENS, max_tokens=3) == "Centro e Nova"
+
+
+def test_stream_fechado_antes_do_fim_registra_as_metricas(cliente):
+    resposta = cliente.conversar_stream(MENSAGENS)
+    pedacos = iter(resposta)
+    assert next(pedacos) == "Centro"
+    pedacos.close()
+    assert resposta.metricas is not None and resposta.metricas.tokens == 1
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from exportacao_lote import ExportadorLote, escrever_tabela
+
+DATAS = list(pd.date_range("2025-03-03", periods=7))
+
+
+def _esperar(exportacao, timeout: float = 10.0) -> None:
+    limite = time.monotonic() + timeout
+    while exportacao.estado == "executando" and time.monotonic() < limite:
+        time.sleep(0.01)
+
+
+def test_threads_escrevendo_a_mesma_tabela_nao_disputam_o_temporario(diretorio):
+    areas = [f"Area {i}" for i in range(600)]
+    valores = np.random.default_rng(0).uniform(100, 900, (len(areas), len(DATAS)))
+    caminho = str(diretorio / "tabela.csv")
+    erros = []
+
+    def escrever():
+        try:
+            escrever_tabela(caminho, areas, ["residencial"] * len(areas), DATAS, valores)
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=escrever) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert erros == []
+    assert len(pd.read_csv(caminho)) == len(areas) * len(DATAS)
+    assert [p.name for p in diretorio.iterdir()] == ["tabela.csv"]
+
+
+def test_exportacoes_terminadas_sao_esquecidas_por_quantidade_e_idade(diretorio):
+    exportador = ExportadorLote(str(diretorio / "exportacoes"), trabalhadores=1, retencao=60, maximo_terminadas=2)
+    sem_areas = ([], [], DATAS, np.zeros((0, len(DATAS))))
+    exportacoes = []
+    for _ in range(3):
+        exportacoes.append(exportador.iniciar(*sem_areas))
+        _esperar(exportacoes[-1])
+    assert [e.estado for e in exportacoes] == ["concluida"] * 3
+
+    # Ao iniciar a quarta, a mais antiga passa do máximo de terminadas
+    exportacoes.append(exportador.iniciar(*sem_areas))
+    _esperar(exportacoes[-1])
+    assert [exportador.obter(e.id) for e in exportacoes] == [None, *exportacoes[1:]]
+
+    # Terminadas há mais tempo que a retenção também saem
+    exportacoes[1].concluida_em -= 120
+    exportador.iniciar(*sem_areas)
+    assert exportador.obter(exportacoes[1].id) is None
+    assert exportador.obter(exportacoes[3].id) is exportacoes[3]
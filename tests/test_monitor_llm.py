@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+import check_and_kill_process
+import monitor_llm
+from monitor_llm import MonitorLLM
+from servidor_llm_falso import encerrar_servidor, iniciar_servidor
+
+
+def _esperar(condicao, timeout: float = 5.0) -> bool:
+    limite = time.monotonic() + timeout
+    while not condicao():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def _monitor(porta: int, **opcoes) -> MonitorLLM:
+    return MonitorLLM(f"http://127.0.0.1:{porta}/v1", intervalo=0.05, backoff_maximo=0.05, timeout=0.5, **opcoes)
+
+
+class OllamaFalso:
+    """``ollama serve`` simulado pelo servidor falso: pode travar (porta ocupada sem responder) e demora a sair."""
+
+    PID = 4242
+
+    def __init__(self, porta: int, atraso_saida: float = 0.3) -> None:
+        self.porta = porta
+        self.atraso_saida = atraso_saida
+        self.servidor = None
+        self.ocupada = False
+        self.inicios = self.encerramentos = self.falhas_bind = 0
+
+    def serve(self, *args, **kwargs) -> None:  # No lugar de subprocess.Popen
+        if self.ocupada:
+            self.falhas_bind += 1  # O Ollama de verdade sairia com "address already in use"
+            return
+        self.inicios += 1
+        self.ocupada = True
+        self.servidor = iniciar_servidor(self.porta)
+
+    def travar(self) -> None:
+        encerrar_servidor(self.servidor)
+        self.servidor = None
+
+    def pid_na_porta(self, porta: int):
+        return self.PID if self.ocupada else None
+
+    def encerrar(self, porta: int) -> int:  # SIGTERM: o processo só libera a porta depois de um tempo
+        self.encerramentos += 1
+        threading.Timer(self.atraso_saida, lambda: setattr(self, "ocupada", False)).start()
+        return self.PID
+
+
+@pytest.fixture
+def porta():
+    servidor = iniciar_servidor()
+    encerrar_servidor(servidor)
+    return servidor.server_port
+
+
+def test_monitor_acompanha_quedas_e_retornos_do_servidor(porta):
+    servidor = iniciar_servidor(porta)
+    monitor = _monitor(porta, auto_iniciar=False).iniciar()
+    try:
+        assert _esperar(lambda: monitor.pronto)
+        encerrar_servidor(servidor)
+        assert _esperar(lambda: monitor.estado.falhas_seguidas >= 3)
+        assert "sem resposta" in monitor.estado.erro
+        servidor = iniciar_servidor(porta)
+        assert _esperar(lambda: monitor.pronto)
+        assert monitor.estado.falhas_seguidas == 0
+    finally:
+        monitor.parar()
+        encerrar_servidor(servidor)
+
+
+def test_ollama_travado_e_reiniciado_a_cada_queda_depois_de_liberar_a_porta(porta, monkeypatch):
+    ollama = OllamaFalso(porta)
+    monkeypatch.setattr(check_and_kill_process, "find_pid_on_port", ollama.pid_na_porta)
+    monkeypatch.setattr(check_and_kill_process, "process_name", lambda pid: "ollama")
+    monkeypatch.setattr(check_and_kill_process, "kill_process_on_port", ollama.encerrar)
+    monkeypatch.setattr(monitor_llm.subprocess, "Popen", ollama.serve)
+    ollama.serve()
+    monitor = _monitor(porta, auto_iniciar=True, falhas_reinicio=3, espera_porta=2.0).iniciar()
+    try:
+        assert _esperar(lambda: monitor.pronto)
+        for queda in (1, 2):
+            ollama.travar()
+            assert _esperar(lambda: not monitor.pronto)
+            assert _esperar(lambda: monitor.pronto)
+            assert (ollama.encerramentos, ollama.inicios, ollama.falhas_bind) == (queda, queda + 1, 0)
+    finally:
+        monitor.parar()
+        if ollama.servidor is not None:
+            ollama.travar()
+
+
+def test_porta_de_outro_programa_nunca_e_encerrada(porta, monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(check_and_kill_process, "find_pid_on_port", lambda porta: 1234)
+    monkeypatch.setattr(check_and_kill_process, "process_name", lambda pid: "python")
+    monkeypatch.setattr(check_and_kill_process, "kill_process_on_port", lambda porta: chamadas.append("kill"))
+    monkeypatch.setattr(monitor_llm.subprocess, "Popen", lambda *args, **kwargs: chamadas.append("popen"))
+    monitor = _monitor(porta, auto_iniciar=True, falhas_reinicio=1).iniciar()
+    try:
+        assert _esperar(lambda: monitor.estado.falhas_seguidas >= 5)
+    finally:
+        monitor.parar()
+    assert chamadas == []
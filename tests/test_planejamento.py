@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from planejamento import TOLERANCIA_KG, frota_uniforme, planejar_coletas
+
+LIMITE = 1000.0
+
+
+def _previsoes(n_areas: int, n_dias: int, semente: int):
+    rng = np.random.default_rng(semente)
+    valores = rng.uniform(400, 2500, (n_areas, n_dias))
+    areas = [f"Area {i}" for i in range(n_areas)]
+    datas = list(pd.date_range("2025-03-03", periods=n_dias, freq="D"))
+    return valores, areas, datas
+
+
+@pytest.mark.parametrize("caminhoes, capacidade, turnos", [(1, 800.0, 1), (3, 1500.0, 2), (40, 5000.0, 1)])
+def test_total_recolhido_por_dia_e_o_menor_entre_excedente_e_capacidade(caminhoes, capacidade, turnos):
+    valores, areas, datas = _previsoes(30, 14, semente=caminhoes)
+    plano = planejar_coletas(valores, areas, datas, frota_uniforme(caminhoes, capacidade, turnos), LIMITE)
+
+    excedente = np.clip(valores - LIMITE, 0, None).sum(axis=0)
+    recolhido = plano.agenda.groupby("data")["recolhido_kg"].sum().reindex(datas, fill_value=0.0).to_numpy()
+    np.testing.assert_allclose(recolhido, np.minimum(excedente, caminhoes * turnos * capacidade), rtol=1e-9)
+    assert plano.resumo["pendente_kg"] == pytest.approx(excedente.sum() - recolhido.sum(), abs=1e-6)
+
+
+def test_paradas_respeitam_a_capacidade_e_o_excedente_de_cada_area():
+    valores, areas, datas = _previsoes(30, 14, semente=7)
+    frota = pd.DataFrame({"caminhao": ["Grande", "Pequeno"], "capacidade_kg": [3000.0, 1200.0], "turnos": [2, 1]})
+    plano = planejar_coletas(valores, areas, datas, frota, LIMITE)
+
+    por_turno = plano.agenda.groupby(["data", "caminhao", "turno"])["recolhido_kg"].sum()
+    capacidades = frota.set_index("caminhao")["capacidade_kg"]
+    assert (por_turno.to_numpy() <= capacidades.loc[por_turno.index.get_level_values("caminhao")].to_numpy() + 1e-6).all()
+
+    por_area_dia = plano.agenda.groupby(["area", "data"])["recolhido_kg"].sum()
+    excedente = pd.DataFrame(np.clip(valores - LIMITE, 0, None), index=areas, columns=datas).stack()
+    assert (por_area_dia <= excedente.loc[por_area_dia.index] + 1e-6).all()
+    # A menor área atendida no dia nunca tem excedente maior que uma pendente do mesmo dia
+    for data, pendentes in plano.pendentes.groupby("data"):
+        atendidas = plano.agenda.loc[plano.agenda["data"] == data, "area"].unique()
+        completas = [a for a in atendidas if a not in set(pendentes["area"])]
+        if completas:
+            assert excedente.loc[completas, data].min() >= pendentes["excedente_kg"].max() - 1e-6
+
+
+@pytest.mark.parametrize("n_areas, n_dias, semente", [(200, 14, semente) for semente in range(20)] + [(5000, 42, 0)])
+def test_nenhuma_parada_residual_e_no_maximo_uma_area_dividida_por_troca_de_turno(n_areas, n_dias, semente):
+    # Os padrões do dashboard: o arredondamento da soma acumulada criava paradas de 1e-13 kg
+    rng = np.random.default_rng(semente)
+    valores = rng.uniform(300, 1500, (n_areas, n_dias))
+    areas, datas = [f"Area {i}" for i in range(n_areas)], list(pd.date_range("2025-03-03", periods=n_dias, freq="D"))
+    plano = planejar_coletas(valores, areas, datas, frota_uniforme(4, 2000.0, 1), 700.0)
+
+    assert (plano.agenda["recolhido_kg"] >= TOLERANCIA_KG).all()
+    for _, do_dia in plano.agenda.groupby("data"):
+        turnos = do_dia.groupby(["caminhao", "turno"]).ngroups
+        divididas = (do_dia.groupby("area").size() > 1).sum()
+        assert divididas <= turnos - 1
+
+
+def test_sem_violacoes_nao_agenda_coletas():
+    valores, areas, datas = _previsoes(5, 7, semente=0)
+    plano = planejar_coletas(np.minimum(valores, LIMITE), areas, datas, frota_uniforme(2, 1000.0), LIMITE)
+    assert plano.agenda.empty and plano.pendentes.empty
+    assert plano.resumo["violacoes"] == 0
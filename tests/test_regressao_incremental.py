@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from previsao import FEATURES
+from previsor import LixoPrevisor
+from regressao_incremental import EstatisticasSuficientes
+
+
+def _lote(previsor: LixoPrevisor, dias: int, areas, tipo_area: str, semente: int) -> pd.DataFrame:
+    # Coletas dos dias seguintes ao fim do histórico, no formato do CSV
+    rng = np.random.default_rng(semente)
+    datas = pd.date_range(previsor.dados["data"].max() + pd.Timedelta(days=1), periods=dias, freq="D")
+    return pd.DataFrame({
+        "data": np.repeat(datas.strftime("%d/%m/%Y"), len(areas)),
+        "area": np.tile(areas, dias),
+        "quantidade_lixo": rng.uniform(100, 900, dias * len(areas)).round(1),
+        "tipo_area": tipo_area,
+        "chuva": rng.integers(0, 2, dias * len(areas)),
+        "feriado": 0,
+    })
+
+
+def test_estatisticas_acumuladas_por_partes_iguais_as_do_todo(historico):
+    previsor = LixoPrevisor(historico, "modelos")
+    dados = previsor.dados
+    partes = EstatisticasSuficientes()
+    for parte in np.array_split(np.arange(len(dados)), 5):
+        partes.acumular(dados.iloc[parte])
+    todo = EstatisticasSuficientes.de_dados(dados)
+    assert partes.n == todo.n == len(dados)
+    codigos = {tipo: i for i, tipo in enumerate(previsor.le.classes_)}
+    np.testing.assert_allclose(partes.resolver(codigos)[0], todo.resolver(codigos)[0], rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("modo", ["global", "area"])
+def test_atualizar_coincide_com_refit_completo(historico, modo):
+    previsor = LixoPrevisor(historico, "modelos", modo=modo)
+    areas = list(previsor.areas[:3])
+    previsor.atualizar(_lote(previsor, 20, areas, "residencial", semente=1))
+    # Tipo e área inéditos: o codificador renumera as classes e o histórico é recodificado
+    previsor.atualizar(_lote(previsor, 40, ["Area nova"], "hospitalar", semente=2))
+
+    referencia = LinearRegression().fit(previsor.dados[FEATURES], previsor.dados["quantidade_lixo"])
+    np.testing.assert_allclose(previsor.modelo.coef_, referencia.coef_, rtol=1e-7, atol=1e-7)
+    assert previsor.modelo.intercept_ == pytest.approx(referencia.intercept_, rel=1e-7)
+    deriva = previsor.refit_completo()
+    assert deriva["coeficientes"] < 1e-6 and deriva["intercepto"] < 1e-6
+    assert "Area nova" in previsor.areas
+    assert previsor.prever_proxima_semana()["Area nova"]
+
+
+def test_atualizar_le_o_calendario_do_armazem(historico):
+    previsor = LixoPrevisor(historico, "modelos")
+    # 01/01/2000 é feriado e o histórico termina antes do fim do ano: o lote cobre o Natal e o Ano-Novo
+    ultimo = previsor.dados["data"].max()
+    dias = (pd.Timestamp("2001-01-03") - ultimo).days
+    previsor.atualizar(_lote(previsor, dias, list(previsor.areas[:1]), "residencial", semente=3))
+    novos = previsor.dados[previsor.dados["data"] > ultimo].set_index("data")
+    assert novos.loc["2000-12-24", "vespera_feriado"] == 1
+    assert novos.loc["2000-12-26", "pos_feriado"] == 1
+    assert novos.loc["2000-12-31", "vespera_feriado"] == 1
+    assert novos.loc["2000-12-20", ["vespera_feriado", "pos_feriado"]].sum() == 0
+    assert len(previsor.features.matriz) == len(previsor.dados)
@@ -0,0 +1,54 @@
+import http.client
+import json
+
+import pytest
+
+from config import SERVICO_MAX_CORPO
+from previsor import LixoPrevisor
+from servico_previsao import ServicoPrevisao, iniciar_servidor
+
+
+@pytest.fixture
+def conexao(historico):
+    servico = ServicoPrevisao(LixoPrevisor(historico, "modelos"), trabalhadores=2)
+    servidor = iniciar_servidor(servico, porta=0)
+    conexao = http.client.HTTPConnection("127.0.0.1", servidor.server_port, timeout=10)
+    yield conexao
+    conexao.close()
+    servidor.shutdown()
+    servidor.server_close()
+    servico.encerrar()
+
+
+def _postar(conexao, pedido):
+    conexao.request("POST", "/previsoes", json.dumps(pedido), {"Content-Type": "application/json"})
+    resposta = conexao.getresponse()
+    return resposta.status, json.loads(resposta.read())
+
+
+def test_previsao_das_areas_pedidas(conexao):
+    status, corpo = _postar(conexao, {"consultas": [{"inicio": "2025-03-03", "dias": 3, "areas": ["Area 00001"]}]})
+    assert status == 200
+    resultado = corpo["resultados"][0]
+    assert resultado["areas"] == ["Area 00001"] and len(resultado["valores"][0]) == 3
+
+
+@pytest.mark.parametrize("areas", [[["Area 00001"]], [{"nome": "Area 00001"}], [1], "Area 00001"])
+def test_areas_fora_do_formato_sao_recusadas_com_400(conexao, areas):
+    status, corpo = _postar(conexao, {"consultas": [{"inicio": "2025-03-03", "areas": areas}]})
+    assert status == 400
+    assert "areas" in corpo["erro"]
+    if isinstance(areas, list):
+        assert repr(areas[0]) in corpo["erro"]
+    # A conexão keep-alive continua utilizável
+    assert _postar(conexao, {"consultas": [{"inicio": "2025-03-03"}]})[0] == 200
+
+
+def test_corpo_acima_do_limite_e_recusado_sem_ser_lido(conexao):
+    conexao.putrequest("POST", "/previsoes")
+    conexao.putheader("Content-Length", str(SERVICO_MAX_CORPO + 1))
+    conexao.endheaders()
+    resposta = conexao.getresponse()
+    assert resposta.status == 413
+    assert resposta.getheader("Connection") == "close"
+    assert str(SERVICO_MAX_CORPO) in json.loads(resposta.read())["erro"]
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from ingestao import carregar_historico
+from validacao import CHAVE_DUPLICADA, CHUVA_INVALIDA, MOTIVOS, QUANTIDADE_INVALIDA, ValidadorHistorico, validar_linhas
+
+CABECALHO = "data,area,quantidade_lixo,tipo_area,chuva,feriado\n"
+LINHAS = [
+    "01/03/2024,Centro,500,comercial,0,0",        # válida
+    "02/03/2024,Centro,510,comercial,1,0",        # válida
+    "2024-03-03,Centro,520,comercial,0,0",        # data fora do formato
+    "04/03/2024,,530,comercial,0,0",              # área vazia
+    "05/03/2024,Centro,-1,comercial,0,0",         # quantidade negativa
+    "06/03/2024,Centro,abc,comercial,2,0",        # quantidade não numérica e chuva inválida
+    "01/03/2024,Centro,999,comercial,0,0",        # (data, area) repetida da primeira linha
+    "01/03/2024,Alto,480,residencial,0,1",        # válida: mesma data, outra área
+    "07/03/2024,Alto,490,  ,0,3",                 # tipo de área em branco e feriado inválido
+]
+
+
+def test_carga_separa_as_linhas_rejeitadas_na_quarentena(diretorio):
+    (diretorio / "coletas.csv").write_text(CABECALHO + "\n".join(LINHAS) + "\n", encoding="utf-8")
+    dados, estatisticas = carregar_historico("coletas.csv")
+
+    assert len(dados) == 3
+    assert estatisticas.rejeitadas == 6
+    quarentena = pd.read_csv(estatisticas.quarentena)
+    assert len(quarentena) == 6
+    # Número da linha no arquivo, contando o cabeçalho como 1
+    assert quarentena["linha"].tolist() == [4, 5, 6, 7, 8, 10]
+    assert quarentena.loc[quarentena["linha"] == 7, "motivos"].item() == "; ".join(
+        [MOTIVOS[QUANTIDADE_INVALIDA], MOTIVOS[CHUVA_INVALIDA]])
+
+    # A segunda carga (do cache Parquet, com pyarrow) conta as mesmas rejeições
+    dados, estatisticas = carregar_historico("coletas.csv")
+    assert (len(dados), estatisticas.rejeitadas) == (3, 6)
+
+
+def test_carga_sem_rejeicoes_remove_a_quarentena_anterior(diretorio):
+    arquivo = diretorio / "coletas.csv"
+    arquivo.write_text(CABECALHO + "\n".join(LINHAS) + "\n", encoding="utf-8")
+    _, estatisticas = carregar_historico("coletas.csv")
+    quarentena = estatisticas.quarentena
+
+    arquivo.write_text(CABECALHO + "\n".join([LINHAS[0], LINHAS[1], LINHAS[7]]) + "\n", encoding="utf-8")
+    dados, estatisticas = carregar_historico("coletas.csv")
+    assert (len(dados), estatisticas.rejeitadas, estatisticas.quarentena) == (3, 0, None)
+    assert not (diretorio / quarentena).exists()
+
+
+def test_duplicadas_sao_encontradas_entre_chunks(diretorio):
+    chunk = pd.DataFrame({
+        "data": ["01/03/2024", "02/03/2024", "03/03/2024"],
+        "area": ["Centro", "Centro", "Alto"],
+        "quantidade_lixo": [500, 510, 520],
+        "tipo_area": ["comercial", "comercial", "residencial"],
+    })
+    validador = ValidadorHistorico(str(diretorio / "quarentena.csv"))
+    primeiro = validador.validar(chunk)
+    # Duas repetidas do chunk anterior, uma repetida dentro do próprio chunk e uma nova
+    segundo = validador.validar(pd.DataFrame({
+        "data": ["01/03/2024", "03/03/2024", "04/03/2024", "04/03/2024"],
+        "area": ["Centro", "Alto", "Centro", "Centro"],
+        "quantidade_lixo": [1, 2, 3, 4],
+        "tipo_area": ["comercial", "residencial", "comercial", "comercial"],
+    }, index=range(3, 7)))
+    validador.concluir()
+
+    assert (len(primeiro), len(segundo)) == (3, 1)
+    assert segundo["quantidade_lixo"].tolist() == [3.0]
+    assert (validador.linhas, validador.rejeitadas) == (7, 3)
+    assert validador.por_motivo == {MOTIVOS[CHAVE_DUPLICADA]: 3}
+    assert pd.read_csv(diretorio / "quarentena.csv")["linha"].tolist() == [5, 6, 8]
+
+
+def test_validar_linhas_devolve_um_motivo_por_linha():
+    tipado, motivos = validar_linhas(pd.DataFrame([linha.split(",") for linha in LINHAS],
+                                                  columns=CABECALHO.strip().split(",")))
+    assert len(tipado) == len(motivos) == len(LINHAS)
+    assert np.count_nonzero(motivos) == 6
+    assert tipado["chuva"].dtype == np.int8
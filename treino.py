@@ -0,0 +1,142 @@
+"""
+Treino e carga do modelo de previsão, compartilhados pelo ``LixoPrevisor`` e pelo modelo do dashboard.
+
+``carregar_ou_treinar`` reaproveita o artefato salvo do mesmo CSV ou treina e
+salva um novo; ``carregar_registro_treinado`` faz o mesmo com os modelos por
+área (modo "area"). Qualquer mudança no treino (features, métricas, calendário)
+é feita só aqui.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from artefatos import ArtefatoModelo, caminho_artefato, carregar_artefato, salvar_artefato
+from backtest import divisao_temporal
+from metricas import cronometrado
+from modelo_linear import CodificadorCategorias, ModeloLinear
+from previsao import FEATURES
+from regressao_incremental import EstatisticasSuficientes
+from registro_modelos import RegistroModelos, caminho_registro, carregar_registro, salvar_registro
+
+
+@dataclass
+class ModeloTreinado:
+    """
+    Modelo global pronto para prever, lido do artefato ou recém-treinado.
+
+    Attributes:
+        artefato (ArtefatoModelo): Artefato persistido do modelo.
+        modelo (ModeloLinear): Modelo global.
+        le (CodificadorCategorias): Codificador de ``tipo_area``.
+        estatisticas (EstatisticasSuficientes): XᵀX e Xᵀy do histórico, para atualizações incrementais.
+        origem (str): "disco" se o artefato salvo foi reaproveitado, "treino" se o modelo foi treinado.
+    """
+
+    artefato: ArtefatoModelo
+    modelo: ModeloLinear
+    le: CodificadorCategorias
+    estatisticas: EstatisticasSuficientes
+    origem: str
+
+
+@cronometrado("treino.avaliar")
+def avaliar_modelo(dados: pd.DataFrame) -> Dict[str, float]:
+    """
+    Mede o modelo num ajuste com as coletas mais antigas, avaliado nos 20% mais recentes (ver ``divisao_temporal``).
+
+    Args:
+        dados (pd.DataFrame): Histórico com ``data``, ``quantidade_lixo`` e as colunas de ``FEATURES``.
+
+    Returns:
+        Dict[str, float]: MSE e R² nas datas posteriores ao treino.
+    """
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    X = dados[FEATURES]
+    y = dados["quantidade_lixo"]
+    treino = divisao_temporal(dados["data"])
+    y_previsto = LinearRegression().fit(X[treino], y[treino]).predict(X[~treino])
+    return {"mse": mean_squared_error(y[~treino], y_previsto), "r2": r2_score(y[~treino], y_previsto)}
+
+
+@cronometrado("treino.carregar_ou_treinar")
+def carregar_ou_treinar(dados: pd.DataFrame, arquivo_dados: str, diretorio_modelos: str,
+                        retreinar: bool = False) -> ModeloTreinado:
+    """
+    Carrega o modelo do artefato de ``arquivo_dados`` ou treina e salva um novo.
+
+    O modelo final é ajustado em todo o histórico a partir das estatísticas
+    suficientes, que ficam no artefato para ``LixoPrevisor.atualizar``. A coluna
+    ``tipo_area_num`` é preenchida em ``dados`` com o codificador usado.
+
+    Args:
+        dados (pd.DataFrame): Histórico com o calendário aplicado (ver ``calendario.aplicar_calendario``); alterado no lugar.
+        arquivo_dados (str): CSV de onde ``dados`` foi lido.
+        diretorio_modelos (str): Diretório dos artefatos.
+        retreinar (bool, optional): Treina mesmo que exista um artefato salvo do mesmo CSV. Defaults to False.
+
+    Returns:
+        ModeloTreinado: Modelo, codificador, estatísticas e artefato.
+    """
+    caminho = caminho_artefato(arquivo_dados, diretorio_modelos)
+    artefato = None if retreinar else carregar_artefato(caminho, arquivo_dados)
+    if artefato is not None:
+        le = artefato.codificador()
+        dados["tipo_area_num"] = le.transform(dados["tipo_area"])
+        if artefato.estatisticas is not None:
+            estatisticas = EstatisticasSuficientes.de_dict(artefato.estatisticas)
+        else:
+            estatisticas = EstatisticasSuficientes.de_dados(dados)
+        return ModeloTreinado(artefato, artefato.modelo(), le, estatisticas, "disco")
+
+    le = CodificadorCategorias()
+    dados["tipo_area_num"] = le.fit_transform(dados["tipo_area"])
+    metricas = avaliar_modelo(dados)
+    estatisticas = EstatisticasSuficientes.de_dados(dados)
+    modelo = estatisticas.modelo(le)
+    artefato = ArtefatoModelo.de_modelo(modelo, le, arquivo_dados, metricas, estatisticas.para_dict())
+    salvar_artefato(artefato, caminho)
+    return ModeloTreinado(artefato, modelo, le, estatisticas, "treino")
+
+
+def treinar_registro(registro: RegistroModelos, dados: pd.DataFrame, caminho: str,
+                     processos: Optional[int] = None) -> Dict[str, int]:
+    """
+    Treina os modelos por área presentes em ``dados`` e salva o registro se algo mudou.
+
+    Args:
+        registro (RegistroModelos): Registro a atualizar.
+        dados (pd.DataFrame): Histórico completo das áreas a treinar.
+        caminho (str): Arquivo do registro.
+        processos (int, optional): Processos do pool de treino; None usa todos os núcleos. Defaults to None.
+
+    Returns:
+        Dict[str, int]: Resumo de ``RegistroModelos.treinar``.
+    """
+    areas_antes = len(registro)
+    resumo = registro.treinar(dados, processos)
+    if resumo["treinadas"] or len(registro) != areas_antes:
+        salvar_registro(registro, caminho)
+    return resumo
+
+
+@cronometrado("treino.registro")
+def carregar_registro_treinado(dados: pd.DataFrame, arquivo_dados: str, diretorio_modelos: str,
+                               processos: Optional[int] = None) -> Tuple[RegistroModelos, Dict[str, int]]:
+    """
+    Carrega o registro de modelos por área de ``arquivo_dados`` e reajusta as áreas cujos dados mudaram.
+
+    Args:
+        dados (pd.DataFrame): Histórico com o calendário aplicado.
+        arquivo_dados (str): CSV de onde ``dados`` foi lido.
+        diretorio_modelos (str): Diretório dos artefatos.
+        processos (int, optional): Processos do pool de treino; None usa todos os núcleos. Defaults to None.
+
+    Returns:
+        Tuple[RegistroModelos, Dict[str, int]]: Registro atualizado e salvo, e o resumo do treino.
+    """
+    caminho = caminho_registro(arquivo_dados, diretorio_modelos)
+    registro = carregar_registro(caminho)
+    return registro, treinar_registro(registro, dados, caminho, processos)
@@ -0,0 +1,265 @@
+"""
+Validação do histórico de coletas, com quarentena das linhas rejeitadas.
+
+Cada chunk é conferido de uma vez, com operações vetorizadas: data no formato
+DD/MM/AAAA, área e tipo de área preenchidos, quantidade numérica entre 0 e
+``QUANTIDADE_MAXIMA_KG``, chuva e feriado iguais a 0 ou 1, e uma só coleta por
+(data, area). Os problemas de cada linha viram bits de uma máscara; linhas com
+algum bit ligado vão para o arquivo de quarentena com os motivos, e as demais
+seguem para a carga. Só a falta de uma coluna obrigatória interrompe a carga,
+porque aí nenhuma linha pode ser aproveitada.
+
+As chaves (data, area) são guardadas como hashes de 64 bits num array ordenado,
+então as duplicadas são encontradas entre chunks sem manter o histórico em memória.
+"""
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import QUANTIDADE_MAXIMA_KG
+
+COLUNAS_OBRIGATORIAS = ["data", "area", "quantidade_lixo", "tipo_area"]
+COLUNAS_OPCIONAIS = ["chuva", "feriado"]  # Preenchidas com 0 quando ausentes
+TIPOS_COLUNAS = {
+    "area": "category",
+    "tipo_area": "category",
+    "quantidade_lixo": "float32",
+    "chuva": "int8",
+    "feriado": "int8",
+}
+FORMATO_DATA = "%d/%m/%Y"
+
+# Um bit por motivo de rejeição, na ordem em que aparecem na quarentena
+DATA_INVALIDA = 1
+AREA_VAZIA = 2
+TIPO_AREA_VAZIO = 4
+QUANTIDADE_INVALIDA = 8
+CHUVA_INVALIDA = 16
+FERIADO_INVALIDO = 32
+CHAVE_DUPLICADA = 64
+MOTIVOS = {
+    DATA_INVALIDA: "data inválida (use DD/MM/AAAA)",
+    AREA_VAZIA: "área vazia",
+    TIPO_AREA_VAZIO: "tipo de área vazio",
+    QUANTIDADE_INVALIDA: f"quantidade_lixo não numérica, negativa ou acima de {QUANTIDADE_MAXIMA_KG} kg",
+    CHUVA_INVALIDA: "chuva diferente de 0 ou 1",
+    FERIADO_INVALIDO: "feriado diferente de 0 ou 1",
+    CHAVE_DUPLICADA: "(data, area) repetida",
+}
+_INVALIDA_POR_FLAG = {"chuva": CHUVA_INVALIDA, "feriado": FERIADO_INVALIDO}
+
+
+def validar_linhas(chunk: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Confere e converte todas as linhas de um chunk numa passada.
+
+    Args:
+        chunk (pd.DataFrame): Linhas lidas do CSV (ou recebidas de outra fonte).
+
+    Returns:
+        Tuple[pd.DataFrame, np.ndarray]: O chunk com as colunas de ``COLUNAS_OBRIGATORIAS`` e
+        ``COLUNAS_OPCIONAIS`` nos tipos de ``TIPOS_COLUNAS`` (valores inválidos viram NaT, NaN ou 0),
+        e a máscara de motivos de cada linha (0 = válida). Duplicadas só são procuradas dentro do chunk.
+
+    Raises:
+        ValueError: Se faltar uma coluna obrigatória.
+    """
+    tipado, motivos, _ = _validar(chunk, np.zeros(0, dtype=np.uint64))
+    return tipado, motivos
+
+
+def _validar(chunk: pd.DataFrame, anteriores: np.ndarray) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    # Como validar_linhas, marcando também as chaves já presentes em ``anteriores`` (ordenado);
+    # devolve ainda as chaves ordenadas das linhas aceitas
+    for col in COLUNAS_OBRIGATORIAS:
+        if col not in chunk.columns:
+            raise ValueError(f"A coluna '{col}' não está presente no arquivo CSV!")
+    motivos = np.zeros(len(chunk), dtype=np.uint8)
+
+    datas = pd.to_datetime(chunk["data"], format=FORMATO_DATA, errors="coerce")
+    motivos |= np.where(datas.isna().to_numpy(), DATA_INVALIDA, 0).astype(np.uint8)
+    textos = {}
+    for col, bit in (("area", AREA_VAZIA), ("tipo_area", TIPO_AREA_VAZIO)):
+        # Conferido nas categorias (poucas), não nas linhas: vazio é ausente ou só espaços
+        texto = chunk[col].astype("category")
+        if texto.cat.categories.inferred_type != "string":  # Números ou tipos mistos: compara como texto
+            texto = chunk[col].astype(str).where(chunk[col].notna()).astype("category")
+        em_branco = np.append(texto.cat.categories.str.strip() == "", True)  # Código -1 (ausente) indexa o True do fim
+        motivos |= np.where(em_branco[texto.cat.codes], bit, 0).astype(np.uint8)
+        textos[col] = texto
+    quantidade = pd.to_numeric(chunk["quantidade_lixo"], errors="coerce").to_numpy(dtype=float)
+    # NaN falha nas duas comparações, então também é marcado
+    motivos |= np.where(~((quantidade >= 0) & (quantidade <= QUANTIDADE_MAXIMA_KG)), QUANTIDADE_INVALIDA, 0).astype(np.uint8)
+    flags = {}
+    for col, bit in _INVALIDA_POR_FLAG.items():
+        if col in chunk.columns:
+            valores = pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=float)
+            invalida = ~((valores == 0) | (valores == 1))
+            motivos |= np.where(invalida, bit, 0).astype(np.uint8)
+            flags[col] = np.where(invalida, 0, valores)
+        else:
+            flags[col] = np.zeros(len(chunk))
+
+    tipado = pd.DataFrame({
+        "data": datas.to_numpy(),
+        "area": textos["area"],
+        "quantidade_lixo": quantidade,
+        "tipo_area": textos["tipo_area"],
+        **flags,
+    }, index=chunk.index).astype(TIPOS_COLUNAS)
+
+    # Duplicadas entre as linhas que passaram nas demais regras: uma única ordenação acha as repetidas no
+    # chunk e deixa as buscas em ``anteriores`` em ordem, percorrendo o array guardado quase sequencialmente
+    candidatas = np.flatnonzero(motivos == 0)
+    chaves = chaves_data_area(tipado)[candidatas]
+    ordem = np.argsort(chaves)
+    repetidas = np.zeros(len(chaves), dtype=bool)
+    repetidas[1:] = chaves[ordem[1:]] == chaves[ordem[:-1]]
+    if repetidas.any():
+        # Só com repetidas a ordem entre chaves iguais importa: a ordenação estável mantém a primeira ocorrência
+        ordem = np.argsort(chaves, kind="stable")
+    candidatas, chaves = candidatas[ordem], chaves[ordem]
+    repetidas[1:] = chaves[1:] == chaves[:-1]
+    if len(anteriores):
+        posicoes = np.minimum(np.searchsorted(anteriores, chaves), len(anteriores) - 1)
+        repetidas |= anteriores[posicoes] == chaves
+    motivos[candidatas[repetidas]] |= CHAVE_DUPLICADA
+    return tipado, motivos, chaves[~repetidas]
+
+
+def chaves_data_area(tipado: pd.DataFrame) -> np.ndarray:
+    """
+    Hash de 64 bits de (data, area) de cada linha.
+
+    As áreas são categóricas, então só as categorias distintas passam pelo hash
+    de texto; as linhas só indexam o resultado.
+
+    Args:
+        tipado (pd.DataFrame): Chunk já convertido por ``validar_linhas``.
+
+    Returns:
+        np.ndarray: Chaves uint64, uma por linha.
+    """
+    area = tipado["area"].cat
+    hash_area = pd.util.hash_array(np.asarray(area.categories, dtype=object))
+    hash_area = np.append(hash_area, np.uint64(0))[area.codes]  # Código -1 (área vazia) indexa o 0 do fim
+    dias = tipado["data"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    return hash_area ^ pd.util.hash_array(dias)
+
+
+def descrever_motivos(motivos: np.ndarray) -> np.ndarray:
+    """
+    Texto dos motivos de cada linha, separados por "; ".
+
+    Args:
+        motivos (np.ndarray): Máscaras de ``validar_linhas``.
+
+    Returns:
+        np.ndarray: Um texto por linha (vazio nas linhas válidas).
+    """
+    distintas, posicoes = np.unique(motivos, return_inverse=True)
+    textos = np.array(["; ".join(texto for bit, texto in MOTIVOS.items() if m & bit) for m in distintas], dtype=object)
+    return textos[posicoes]
+
+
+def contar_motivos(motivos: np.ndarray) -> Dict[str, int]:
+    """
+    Linhas com cada motivo (uma linha pode ter vários).
+
+    Args:
+        motivos (np.ndarray): Máscaras de ``validar_linhas``.
+
+    Returns:
+        Dict[str, int]: Contagem por motivo, só dos que ocorreram.
+    """
+    return {texto: int(np.count_nonzero(motivos & bit)) for bit, texto in MOTIVOS.items() if (motivos & bit).any()}
+
+
+class ValidadorHistorico:
+    """
+    Valida os chunks de uma carga e separa as linhas rejeitadas na quarentena.
+
+    A quarentena é um CSV com as colunas originais das linhas rejeitadas,
+    ``linha`` (número da linha no arquivo, contando o cabeçalho como 1) e
+    ``motivos``. Ela é escrita num temporário e só substitui a anterior em
+    ``concluir``; uma carga sem rejeições remove a quarentena antiga.
+
+    Attributes:
+        quarentena (str): Arquivo de quarentena, ou None para só contar as rejeições.
+        linhas (int): Linhas recebidas.
+        rejeitadas (int): Linhas rejeitadas.
+        por_motivo (dict): Linhas rejeitadas por motivo.
+    """
+
+    def __init__(self, quarentena: Optional[str] = None) -> None:
+        self.quarentena = quarentena
+        self.linhas = 0
+        self.rejeitadas = 0
+        self.por_motivo: Dict[str, int] = {}
+        self._chaves = np.zeros(0, dtype=np.uint64)  # Ordenadas, das linhas aceitas nos chunks anteriores
+        self._temporario = f"{quarentena}.{os.getpid()}.tmp" if quarentena else None
+        self._arquivo = None
+
+    def validar(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Valida um chunk, envia as linhas rejeitadas para a quarentena e devolve as aceitas.
+
+        Args:
+            chunk (pd.DataFrame): Próximo chunk do arquivo, na ordem de leitura.
+
+        Returns:
+            pd.DataFrame: Linhas aceitas, nos tipos de ``TIPOS_COLUNAS``.
+        """
+        tipado, motivos, chaves = _validar(chunk, self._chaves)
+        # Duas sequências ordenadas concatenadas: a ordenação estável (timsort) as intercala em tempo linear
+        self._chaves = np.sort(np.concatenate([self._chaves, chaves]), kind="stable")
+
+        aceitas = np.flatnonzero(motivos == 0)
+        rejeitadas = np.flatnonzero(motivos)
+        if len(rejeitadas):
+            self._quarentenar(chunk.iloc[rejeitadas], rejeitadas, motivos[rejeitadas])
+        self.linhas += len(chunk)
+        if not len(rejeitadas):
+            return tipado
+        validas = tipado.iloc[aceitas]
+        return validas.assign(**{col: validas[col].cat.remove_unused_categories() for col in ("area", "tipo_area")})
+
+    def _quarentenar(self, linhas: pd.DataFrame, posicoes: np.ndarray, motivos: np.ndarray) -> None:
+        self.rejeitadas += len(linhas)
+        for texto, quantidade in contar_motivos(motivos).items():
+            self.por_motivo[texto] = self.por_motivo.get(texto, 0) + quantidade
+        if self._temporario is None:
+            return
+        saida = linhas.assign(linha=self.linhas + posicoes + 2, motivos=descrever_motivos(motivos))
+        if self._arquivo is None:
+            os.makedirs(os.path.dirname(self._temporario) or ".", exist_ok=True)
+            self._arquivo = open(self._temporario, "w", encoding="utf-8", newline="")
+            saida.to_csv(self._arquivo, index=False)
+        else:
+            saida.to_csv(self._arquivo, index=False, header=False)
+
+    def concluir(self) -> None:
+        """Publica a quarentena desta carga (ou remove a anterior, se nada foi rejeitado)."""
+        if self.quarentena is None:
+            return
+        if self._arquivo is not None:
+            self._arquivo.close()
+            os.replace(self._temporario, self.quarentena)
+        elif os.path.exists(self.quarentena):
+            os.remove(self.quarentena)
+
+    def descartar(self) -> None:
+        """Abandona uma carga interrompida sem tocar na quarentena anterior."""
+        if self._arquivo is not None:
+            self._arquivo.close()
+            os.remove(self._temporario)
+
+    def resumo(self) -> str:
+        """Texto curto com as rejeições por motivo."""
+        if not self.rejeitadas:
+            return f"{self.linhas} linhas validadas, nenhuma rejeitada"
+        motivos = ", ".join(f"{texto}: {self.por_motivo[texto]}" for texto in MOTIVOS.values() if texto in self.por_motivo)
+        destino = f" (quarentena em {self.quarentena})" if self.quarentena else ""
+        return f"{self.rejeitadas} de {self.linhas} linhas rejeitadas{destino}: {motivos}"